@@ -0,0 +1,39 @@
+import importlib.util
+import os
+import sys
+from datetime import date, timedelta
+from types import ModuleType
+from typing import List
+
+# Charts are rendered off screen
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def load_module(name: str, relative_path: str) -> ModuleType:
+    """
+    Loads a module of the repository from its file.
+
+    `logging/logging.py` cannot be imported by name, the stdlib `logging` package is
+    imported first and takes the name.
+    """
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def weekly_revenue_rows(points: int) -> List[dict]:
+    """Builds rows as the sales trajectory query returns them, one per product and week."""
+    from tools.types import ProductEnum
+
+    products = list(ProductEnum)
+    first_week = date(2024, 1, 1)
+    return [{"products_product": products[i % len(products)].value,
+             "products_product__sort_": f"{i % len(products):02d}",
+             "revenue_usage_week": (first_week + timedelta(weeks=i // len(products))).isoformat(),
+             "revenue_revenue_sales": 1000.0 + (i * 7919) % 5000}
+            for i in range(points)]
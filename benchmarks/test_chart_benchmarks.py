@@ -0,0 +1,82 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter
+
+pytest.importorskip("pytest_benchmark")
+
+from conftest import weekly_revenue_rows
+from tools.charts import charts as chart_tools
+from tools.charts import render_cache
+from tools.charts.charts import create_bar_chart, create_chart_tool, create_line_chart, create_scatter_chart
+from tools.charts.renderer import get_chart_renderer
+from tools.types import SalesTrajectoryResponse, WeeklyRevenue
+
+
+def sales_trajectory(points: int) -> str:
+    return json.dumps({"status": {"status": "success", "message": "ok"}, "data": weekly_revenue_rows(points)})
+
+
+@pytest.fixture(autouse=True)
+def no_chart_cache(monkeypatch):
+    # Every round must draw the chart, not return the previous round's image
+    monkeypatch.setattr(render_cache, "_chart_cache", render_cache.ChartCache(max_bytes=0, cache_dir=None))
+
+
+# A bar per point takes minutes at 100k points, the large cases are line and scatter charts
+@pytest.mark.parametrize("chart_type,points,rounds", [("bar", 1_000, 10), ("line", 1_000, 10),
+                                                      ("line", 100_000, 3), ("scatter", 100_000, 3)])
+def test_create_chart_tool(benchmark, chart_type, points, rounds):
+    # Through the wrappers the agent calls, the line and scatter charts are grouped by product
+    create_chart = {"bar": create_bar_chart, "line": create_line_chart, "scatter": create_scatter_chart}[chart_type]
+    chart = benchmark.pedantic(create_chart, args=(sales_trajectory(points),), rounds=rounds, iterations=1)
+    assert chart.status.status == "success", chart.status.message
+
+
+# Eight 10k point charts at once, the time should fall as cores are added
+def test_concurrent_chart_rendering(benchmark):
+    payload = sales_trajectory(10_000)
+    get_chart_renderer().start()
+
+    def render_all():
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            return list(executor.map(lambda _: create_chart_tool(payload, "line", group_by="products_product"), range(8)))
+
+    charts = benchmark.pedantic(render_all, rounds=3, iterations=1)
+    assert all(chart.status.status == "success" for chart in charts)
+    benchmark.extra_info["cpus"] = os.cpu_count()
+
+
+def test_cached_chart(benchmark, monkeypatch):
+    monkeypatch.setattr(render_cache, "_chart_cache", render_cache.ChartCache(cache_dir=None))
+    payload = sales_trajectory(100_000)
+    create_chart_tool(payload, "line", group_by="products_product")
+    chart = benchmark(create_chart_tool, payload, "line", group_by="products_product")
+    assert chart.status.status == "success", chart.status.message
+
+
+# Everything before the draw, from the payload to the plotted arrays, row by row and columnar
+@pytest.mark.parametrize("path", ["_validated_series", "_columnar_series"])
+def test_chart_series_ingestion(benchmark, path):
+    payload = sales_trajectory(100_000)
+    series = benchmark(getattr(chart_tools, path), payload, "line", "revenue_usage_week", "revenue_revenue_sales",
+                       "products_product")
+    assert sum(len(s.x) for s in series) == 100_000
+
+
+@pytest.mark.parametrize("points", [1_000, 100_000])
+def test_weekly_revenue_validation(benchmark, points):
+    rows = weekly_revenue_rows(points)
+    adapter = TypeAdapter(List[WeeklyRevenue])
+    validated = benchmark(adapter.validate_python, rows)
+    assert len(validated) == points
+
+
+@pytest.mark.parametrize("points", [1_000, 100_000])
+def test_sales_trajectory_parsing(benchmark, points):
+    payload = sales_trajectory(points)
+    response = benchmark(SalesTrajectoryResponse.model_validate_json, payload)
+    assert len(response.data) == points
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from concord_sql_agent.state.query_budget import QueryBudget
+from concord_sql_agent.tools import query_execution_tool
+from concord_sql_agent.utils.result_encoding import encode_results
+
+QUERY = "SELECT account_name, revenue_month, product, gross_revenue FROM `concord-prod.service_cloudbi_reporting.revenue_weekly`"
+
+
+def revenue_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "account_name": [f"Account {i % 500:05d}" for i in range(rows)],
+        "revenue_month": pd.date_range("2024-01-01", periods=12, freq="MS").repeat(rows // 12 + 1)[:rows].date,
+        "product": rng.choice(["Compute", "Storage", "BigQuery", "Looker", "Vertex AI"], rows),
+        "gross_revenue": rng.gamma(2.0, 5000.0, rows),
+        "sales_revenue": rng.gamma(2.0, 4000.0, rows),
+        "cud": np.where(rng.random(rows) < 0.5, np.nan, -rng.gamma(2.0, 300.0, rows)),
+    })
+
+
+class FakeRows:
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+
+    def to_dataframe(self, *args, **kwargs) -> pd.DataFrame:
+        return self.df
+
+
+class FakeQueryJob:
+    job_id = "benchmark_job"
+    location = "US"
+    state = "DONE"
+    error_result = None
+    total_bytes_processed = 1024 ** 2
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+
+    def result(self, timeout=None) -> FakeRows:
+        return FakeRows(self.df)
+
+
+class FakeClient:
+    """Returns a prepared result for every query, so only the tool's own work is measured."""
+    location = "US"
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+
+    def query(self, query, job_config=None, job_id=None, timeout=None, **kwargs) -> FakeQueryJob:
+        return FakeQueryJob(self.df)
+
+
+class NoResultCache:
+    def get(self, query):
+        return None
+
+    def table_versions(self, query):
+        return {}
+
+    def put(self, query, df, parameters=None, table_modified=None):
+        pass
+
+
+@pytest.fixture
+def stub_bigquery(monkeypatch):
+    def install(df: pd.DataFrame):
+        budget = QueryBudget(estimator=lambda query, query_parameters: 1024 ** 2)
+        monkeypatch.setattr(query_execution_tool, "get_bq_client", lambda: FakeClient(df))
+        monkeypatch.setattr(query_execution_tool, "get_result_cache", lambda: NoResultCache())
+        monkeypatch.setattr(query_execution_tool, "get_query_budget", lambda: budget)
+    return install
+
+
+@pytest.mark.parametrize("rows", [100, 5_000, 200_000])
+def test_execute_query(benchmark, stub_bigquery, rows):
+    stub_bigquery(revenue_frame(rows))
+    result = benchmark(query_execution_tool.execute_query, QUERY)
+    assert not result.startswith("The following Error occurred")
+
+
+@pytest.mark.parametrize("output_format", ["markdown", "csv", "json", "arrow", "summary"])
+def test_encode_results(benchmark, output_format):
+    df = revenue_frame(10_000)
+    benchmark(encode_results, df, output_format)
@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from conftest import load_module
+
+LINE = "2025-01-01 00:00:00,000 - sales_team.agent - INFO - " + "x" * 80 + "\n"
+WRITES_PER_THREAD = 2_000
+
+
+@pytest.fixture(scope="module")
+def log_stream_class():
+    return load_module("vexel_logging", "logging/logging.py").LogStream
+
+
+@pytest.fixture(scope="module")
+def tracer():
+    trace_module = pytest.importorskip("tracer.trace")
+    if not trace_module.OPEN_TELEMETRY_AVAILABLE:
+        pytest.skip("OpenTelemetry is not installed")
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+    class DiscardingExporter(SpanExporter):
+        """Stands in for Cloud Trace, so spans are batched and exported without a network call."""
+        def export(self, spans):
+            return SpanExportResult.SUCCESS
+
+    trace_module.CloudTraceSpanExporter = DiscardingExporter
+    trace_module.Tracer._instance = None
+    trace_module.Tracer._initialized = False
+    return trace_module.Tracer("vexel-benchmarks")
+
+
+def write_concurrently(stream, threads: int) -> None:
+    def writer():
+        for _ in range(WRITES_PER_THREAD):
+            stream.write(LINE)
+
+    workers = [threading.Thread(target=writer) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+@pytest.mark.parametrize("threads", [1, 8])
+@pytest.mark.parametrize("buffer_size", [1024 * 1024, 64 * 1024])
+def test_log_stream_write(benchmark, log_stream_class, threads, buffer_size):
+    def setup():
+        stream = log_stream_class(buffer_size=buffer_size)
+        stream.subscribe(lambda message: None)
+        return (stream, threads), {}
+
+    benchmark.pedantic(write_concurrently, setup=setup, rounds=5, iterations=1)
+
+
+def test_start_span(benchmark, tracer):
+    def span():
+        with tracer.start_span("benchmark"):
+            pass
+
+    benchmark(span)
+
+
+def test_start_span_with_attributes_and_baggage(benchmark, tracer):
+    attributes = {"query.hash": "0123456789abcdef", "query.rows": 500}
+    baggage_items = {"session.id": "session-1", "user.id": "user-1"}
+
+    def span():
+        with tracer.start_span("benchmark", attributes=attributes, baggage_items=baggage_items):
+            pass
+
+    benchmark(span)
+
+
+def test_nested_spans(benchmark, tracer):
+    def spans():
+        with tracer.start_span("parent"):
+            with tracer.start_span("child"):
+                tracer.add_event("child_event")
+
+    benchmark(spans)
@@ -35,4 +35,4 @@ root_agent = Agent(
     generate_content_config=types.GenerateContentConfig(
         temperature=0.1,
     )
-)
\ No newline at end of file
+)
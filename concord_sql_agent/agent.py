@@ -15,6 +15,7 @@ You are the **`root_agent`**. Your purpose is to act as a central coordinator, m
 It's your job to ensure a smooth handoff between these two agents.
 1.  When the **`bigquery_query_builder`** finalizes a query, you must pass it to the **`bigquery_sql_executor_agent`**.
 2.  If the execution fails or the user wants to make a change, you must pass the task back to the **`bigquery_query_builder`** to iterate.
+3.  If the user asks for a full briefing of an account, pass the task with the account name directly to the **`bigquery_sql_executor_agent`**.
 """
 
 root_agent = Agent(
@@ -0,0 +1,2 @@
+from .client import EmulatorClient, get_emulator_client
+from .data_generator import generate
@@ -0,0 +1,290 @@
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterator, Optional
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+from google.api_core.exceptions import BadRequest, Conflict, NotFound
+from google.cloud import bigquery
+
+from .data_generator import DEFAULT_ACCOUNTS, DEFAULT_WEEKS, bigquery_type, generate
+from .dialect import to_duckdb
+
+EMULATOR_PROJECT = "concord-prod"
+EMULATOR_DATASET = "service_cloudbi_reporting"
+
+# A file keeps the generated data between runs, the default regenerates it in memory
+EMULATOR_DATABASE = os.environ.get("CONCORD_EMULATOR_DATABASE", ":memory:")
+EMULATOR_ACCOUNTS = int(os.environ.get("CONCORD_EMULATOR_ACCOUNTS", str(DEFAULT_ACCOUNTS)))
+EMULATOR_WEEKS = int(os.environ.get("CONCORD_EMULATOR_WEEKS", str(DEFAULT_WEEKS)))
+
+# Added to every query, to exercise timeouts, polling and cancellation without BigQuery
+EMULATOR_QUERY_DELAY_SECONDS = float(os.environ.get("CONCORD_EMULATOR_QUERY_DELAY_SECONDS", "0"))
+
+EMULATOR_WORKERS = 8
+
+# Finished jobs kept, with their results, for get_job and list_rows, least recently used first out
+EMULATOR_MAX_JOBS = int(os.environ.get("CONCORD_EMULATOR_MAX_JOBS", "256"))
+
+_TABLE_RE = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)", re.IGNORECASE)
+
+
+class EmulatorRowIterator:
+    """The finished result of an emulated query, with the parts of RowIterator the tools use."""
+    def __init__(self, table: pa.Table):
+        self._table = table
+        self.total_rows = table.num_rows
+        self.schema = [schema_field(field) for field in table.schema]
+
+    def to_arrow(self, *args, **kwargs) -> pa.Table:
+        return self._table
+
+    def to_dataframe(self, *args, **kwargs) -> pd.DataFrame:
+        return self._table.to_pandas()
+
+    def to_arrow_iterable(self, bqstorage_client=None, max_queue_size=None) -> Iterator[pa.RecordBatch]:
+        return iter(self._table.to_batches())
+
+    def __iter__(self) -> Iterator[bigquery.Row]:
+        field_to_index = {name: i for i, name in enumerate(self._table.column_names)}
+        for values in zip(*(column.to_pylist() for column in self._table.columns)):
+            yield bigquery.Row(values, field_to_index)
+
+
+class EmulatorQueryJob:
+    """A query running on the emulator's thread pool, with the parts of QueryJob the tools use."""
+    def __init__(self, client: "EmulatorClient", job_id: str, query: str, sql: str, total_bytes_processed: int,
+                 future: Optional[Future] = None, cursor: Optional[duckdb.DuckDBPyConnection] = None):
+        self.job_id = job_id
+        self.location = client.location
+        self.project = client.project
+        self.query = query
+        self.translated_query = sql
+        self.total_bytes_processed = total_bytes_processed
+        self.destination = f"{client.project}._emulator_results.{job_id}"
+        self._future = future
+        self._cursor = cursor
+
+    @property
+    def state(self) -> str:
+        return "DONE" if self._future is None or self._future.done() else "RUNNING"
+
+    @property
+    def error_result(self) -> Optional[dict]:
+        if self._future is None or not self._future.done():
+            return None
+        if self._future.cancelled():
+            return {"reason": "stopped", "message": "Job execution was cancelled."}
+        error = self._future.exception()
+        return {"reason": "invalidQuery", "message": str(error)} if error else None
+
+    def done(self, *args, **kwargs) -> bool:
+        return self.state == "DONE"
+
+    def reload(self, *args, **kwargs) -> None:
+        # The state is read from the future, there is nothing to fetch
+        pass
+
+    def result(self, timeout: Optional[float] = None, *args, **kwargs) -> EmulatorRowIterator:
+        """
+        Waits for the query and returns its rows.
+
+        Raises:
+            TimeoutError: If the query did not finish in time.
+            BadRequest: If DuckDB rejected the query.
+        """
+        if self._future is None:
+            return EmulatorRowIterator(pa.table({}))
+        try:
+            return EmulatorRowIterator(self._future.result(timeout=timeout))
+        except duckdb.Error as e:
+            raise BadRequest(f"{e}\n\nTranslated query:\n{self.translated_query}")
+
+    def cancel(self, *args, **kwargs) -> bool:
+        if self._future is not None and not self._future.cancel() and self._cursor is not None:
+            self._cursor.interrupt()
+        return True
+
+
+def schema_field(field: pa.Field) -> bigquery.SchemaField:
+    """Converts an Arrow field to the BigQuery schema field of the same shape."""
+    data_type, mode = field.type, "NULLABLE"
+    if pa.types.is_list(data_type):
+        data_type, mode = data_type.value_type, "REPEATED"
+    if pa.types.is_struct(data_type):
+        return bigquery.SchemaField(field.name, "RECORD", mode=mode,
+                                    fields=[schema_field(child) for child in data_type])
+    return bigquery.SchemaField(field.name, bigquery_type(data_type), mode=mode)
+
+
+def _arrow_table(cursor: duckdb.DuckDBPyConnection) -> pa.Table:
+    # `fetch_arrow_table` was renamed `to_arrow_table` in newer DuckDB releases
+    fetch = getattr(cursor, "to_arrow_table", None) or cursor.fetch_arrow_table
+    return fetch()
+
+
+def _query_parameters(job_config: Optional[bigquery.QueryJobConfig]) -> Dict[str, Any]:
+    parameters = {}
+    for parameter in (job_config.query_parameters if job_config else None) or []:
+        value = parameter.value
+        if parameter.type_ == "DATE" and isinstance(value, str):
+            value = date.fromisoformat(value)
+        parameters[parameter.name] = value
+    return parameters
+
+
+class EmulatorClient:
+    """
+    An offline stand-in for the concord-prod BigQuery client, backed by DuckDB.
+
+    It serves synthetic `revenue_weekly` and `revenue_daily` tables with the nested layout
+    of the production tables, and implements the subset of `bigquery.Client` the agents
+    use: queries run asynchronously on a thread pool under BigQuery job semantics,
+    including dry runs, named parameters, job id conflicts and cancellation. Queries are
+    translated to DuckDB by `dialect.to_duckdb`, so SQL outside its coverage may fail.
+    """
+    def __init__(self, database: str = EMULATOR_DATABASE,
+                 accounts: int = EMULATOR_ACCOUNTS,
+                 weeks: int = EMULATOR_WEEKS,
+                 query_delay_seconds: float = EMULATOR_QUERY_DELAY_SECONDS,
+                 today: Optional[date] = None,
+                 max_jobs: int = EMULATOR_MAX_JOBS):
+        self.project = EMULATOR_PROJECT
+        self.location = "US"
+        self.query_delay_seconds = query_delay_seconds
+        self.today = today
+        self._con = duckdb.connect(database)
+        self._executor = ThreadPoolExecutor(max_workers=EMULATOR_WORKERS, thread_name_prefix="bq-emulator")
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, EmulatorQueryJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        tables = {row[0] for row in self._con.execute("SELECT table_name FROM duckdb_tables()").fetchall()}
+        if "revenue_weekly" not in tables:
+            started = time.time()
+            counts = generate(self._con, accounts=accounts, weeks=weeks, end_date=today)
+            print(f"Generated the emulator's tables {counts} in {time.time() - started:.1f}s.")
+        self.created = datetime.now(timezone.utc)
+
+    def _estimate_bytes(self, sql: str) -> int:
+        # DuckDB has no per-query scan statistics, charge the full size of every table read
+        names = {name.lower() for name in _TABLE_RE.findall(sql)}
+        if not names:
+            return 0
+        rows = self._con.cursor().execute("SELECT table_name, estimated_size, column_count FROM duckdb_tables()").fetchall()
+        return sum(size * columns * 8 for name, size, columns in rows if name.lower() in names)
+
+    def _run(self, cursor: duckdb.DuckDBPyConnection, sql: str, parameters: Dict[str, Any]) -> pa.Table:
+        try:
+            if self.query_delay_seconds:
+                time.sleep(self.query_delay_seconds)
+            return _arrow_table(cursor.execute(sql, parameters))
+        finally:
+            cursor.close()
+
+    def query(self, query: str, job_config: Optional[bigquery.QueryJobConfig] = None,
+              job_id: Optional[str] = None, job_id_prefix: Optional[str] = None,
+              location: Optional[str] = None, timeout: Optional[float] = None, **kwargs) -> EmulatorQueryJob:
+        """
+        Starts a query, see `bigquery.Client.query`.
+
+        Raises:
+            Conflict: If a job with the given job_id already exists.
+            BadRequest: If a dry run found the query invalid.
+        """
+        sql = to_duckdb(query, self.today)
+        parameters = _query_parameters(job_config)
+        job_id = job_id or f"{job_id_prefix or 'job_'}{uuid.uuid4().hex}"
+
+        if job_config is not None and job_config.dry_run:
+            try:
+                self._con.cursor().execute(f"EXPLAIN {sql}", parameters)
+            except duckdb.Error as e:
+                raise BadRequest(f"{e}\n\nTranslated query:\n{sql}")
+            return EmulatorQueryJob(self, job_id, query, sql, self._estimate_bytes(sql))
+
+        with self._lock:
+            if job_id in self._jobs:
+                raise Conflict(f"Already Exists: Job {self.project}:{self.location}.{job_id}")
+            cursor = self._con.cursor()
+            future = self._executor.submit(self._run, cursor, sql, parameters)
+            query_job = EmulatorQueryJob(self, job_id, query, sql, self._estimate_bytes(sql), future, cursor)
+            self._jobs[job_id] = query_job
+            self._evict_jobs()
+        return query_job
+
+    def _evict_jobs(self) -> None:
+        # Running jobs are never evicted, so they may briefly take the job count over its bound
+        finished = [job_id for job_id, query_job in self._jobs.items() if query_job.done()]
+        for job_id in finished[:max(len(self._jobs) - self.max_jobs, 0)]:
+            del self._jobs[job_id]
+
+    def _job(self, job_id: str) -> Optional[EmulatorQueryJob]:
+        with self._lock:
+            query_job = self._jobs.get(job_id)
+            if query_job is not None:
+                self._jobs.move_to_end(job_id)
+            return query_job
+
+    def get_job(self, job_id: str, location: Optional[str] = None, timeout: Optional[float] = None,
+                **kwargs) -> EmulatorQueryJob:
+        query_job = self._job(job_id)
+        if query_job is None:
+            raise NotFound(f"Not found: Job {self.project}:{self.location}.{job_id}")
+        return query_job
+
+    def list_rows(self, table, start_index: int = 0, max_results: Optional[int] = None,
+                  **kwargs) -> EmulatorRowIterator:
+        """Reads rows of a query job's destination, or of one of the emulator's tables."""
+        table_id = str(table).rsplit(".", 1)[-1]
+        query_job = self._job(table_id)
+        if query_job is not None:
+            rows = query_job.result().to_arrow()
+        else:
+            rows = _arrow_table(self._con.cursor().execute(f'SELECT * FROM "{table_id}"'))
+        length = rows.num_rows - start_index if max_results is None else max_results
+        page = EmulatorRowIterator(rows.slice(start_index, max(length, 0)))
+        page.total_rows = rows.num_rows
+        return page
+
+    def get_table(self, table_ref, *args, **kwargs) -> bigquery.Table:
+        """Returns the metadata of an emulated table, see `bigquery.Client.get_table`."""
+        table_ref = str(table_ref).strip("`")
+        project, dataset, table_id = ([self.project, EMULATOR_DATASET] + table_ref.split("."))[-3:]
+        try:
+            schema = self._con.cursor().execute(f'SELECT * FROM "{table_id}" LIMIT 0').arrow().schema
+        except duckdb.CatalogException:
+            raise NotFound(f"Not found: Table {project}:{dataset}.{table_id}")
+        created = str(int(self.created.timestamp() * 1000))
+        return bigquery.Table.from_api_repr({
+            "tableReference": {"projectId": project, "datasetId": dataset, "tableId": table_id},
+            "schema": {"fields": [schema_field(field).to_api_repr() for field in schema]},
+            "creationTime": created,
+            "lastModifiedTime": created,
+            "description": f"Synthetic {table_id} served by the BigQuery emulator.",
+        })
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._con.close()
+
+
+_emulator_client: Optional[EmulatorClient] = None
+_emulator_client_lock = threading.Lock()
+
+
+def get_emulator_client() -> EmulatorClient:
+    """Returns the process wide emulator, generating its data on first use."""
+    global _emulator_client
+    if _emulator_client is None:
+        with _emulator_client_lock:
+            if _emulator_client is None:
+                _emulator_client = EmulatorClient()
+    return _emulator_client
@@ -0,0 +1,176 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import duckdb
+import pyarrow as pa
+
+# The GTM product hierarchy the synthetic revenue is spread over, as (level 2, level 3)
+PRODUCTS = [
+    ("Infrastructure", "Compute"),
+    ("Infrastructure", "Storage"),
+    ("Infrastructure", "Networking"),
+    ("Data Analytics", "BigQuery"),
+    ("Data Analytics", "Looker"),
+    ("AI", "Vertex AI"),
+    ("Security", "Security Command Center"),
+    ("Workspace", "Workspace"),
+]
+
+DEFAULT_ACCOUNTS = 100
+DEFAULT_WEEKS = 52
+
+# Columns the synthetic tables are partitioned and clustered on, as in concord-prod
+PARTITION_COLUMN = "partition_date"
+CLUSTERING_COLUMNS = ["customer_details"]
+
+_TABLE_DESCRIPTIONS = {
+    "revenue_weekly": "Synthetic weekly revenue per account and product.",
+    "revenue_daily": "Synthetic daily revenue per account and product.",
+}
+
+
+def account_name(account_id: int) -> str:
+    """Returns the name of a synthetic account, e.g. Account 00042."""
+    return f"Account {account_id:05d}"
+
+
+def _revenue_select(step_days: int, periods: int, accounts: int, products: int, start_date: date, seed: int) -> str:
+    """
+    Builds the rows of a revenue table in SQL. Amounts are derived from a hash of the
+    row's coordinates, so any scale is generated in one pass and reproducibly per seed.
+    """
+    product_values = ", ".join(f"({i}, '{level_2}', '{level_3}')"
+                               for i, (level_2, level_3) in enumerate(PRODUCTS[:products]))
+    return f"""
+WITH accounts AS (SELECT range AS account_id FROM range({accounts})),
+     periods AS (SELECT range AS period, CAST(DATE '{start_date.isoformat()}' + INTERVAL (range * {step_days}) DAY AS DATE) AS partition_date
+                 FROM range({periods})),
+     products AS (SELECT * FROM (VALUES {product_values}) AS p(product_id, level_2, level_3)),
+     grid AS (
+         SELECT a.account_id, p.period, p.partition_date, pr.product_id, pr.level_2, pr.level_3,
+                (hash(a.account_id, p.period, pr.product_id, {seed}) % 1000000) / 1000000.0 AS r1,
+                (hash(pr.product_id, a.account_id, p.period, {seed} + 1) % 1000000) / 1000000.0 AS r2,
+                -- Larger accounts spend more, with a product mix that varies per account
+                CAST((1 + hash(a.account_id, {seed}) % 50) * (1 + hash(a.account_id, pr.product_id, {seed}) % 10) * {step_days} AS DOUBLE) AS scale
+         FROM accounts AS a, periods AS p, products AS pr)
+SELECT
+    partition_date,
+    CAST(date_trunc('month', partition_date) AS DATE) AS invoice_month_start,
+    struct_pack(account_id := printf('A%05d', account_id),
+                account_name := printf('Account %05d', account_id),
+                billing_account_id := printf('%06X-%06X', account_id, account_id * 7)) AS customer_details,
+    struct_pack(gtm_product_hierarchy := struct_pack(gtm_product_level_1 := 'Google Cloud',
+                                                     gtm_product_level_2 := level_2,
+                                                     gtm_product_level_3 := level_3,
+                                                     gtm_product_level_4 := level_3 || ' SKU')) AS product_details,
+    struct_pack(
+        gross_revenue := struct_pack(gross_revenue := round(scale * (10 + 90 * r1), 2)),
+        sales_revenue := struct_pack(sales_revenue := round(scale * (10 + 90 * r1) * (0.8 + 0.2 * r2), 2)),
+        invoice_revenue := struct_pack(
+            invoice_revenue := round(scale * (10 + 90 * r1) * (0.8 + 0.2 * r2), 2),
+            components := struct_pack(sales_discounts := struct_pack(
+                cud := CASE WHEN r2 < 0.4 THEN NULL ELSE round(-scale * 10 * r2, 2) END,
+                spend_based_commitment_discount := CASE WHEN r1 < 0.5 THEN NULL ELSE round(-scale * 5 * r1, 2) END)))
+    ) AS usd_revenue_metrics
+FROM grid
+ORDER BY partition_date, account_id, product_id"""
+
+
+def bigquery_type(data_type: pa.DataType) -> str:
+    """Returns the BigQuery Standard SQL type of an Arrow type, as INFORMATION_SCHEMA reports it."""
+    if pa.types.is_struct(data_type):
+        return "STRUCT"
+    if pa.types.is_list(data_type):
+        return f"ARRAY<{bigquery_type(data_type.value_type)}>"
+    if pa.types.is_integer(data_type):
+        return "INT64"
+    if pa.types.is_floating(data_type):
+        return "FLOAT64"
+    if pa.types.is_decimal(data_type):
+        return "NUMERIC"
+    if pa.types.is_boolean(data_type):
+        return "BOOL"
+    if pa.types.is_date(data_type):
+        return "DATE"
+    if pa.types.is_timestamp(data_type):
+        return "TIMESTAMP"
+    if pa.types.is_binary(data_type):
+        return "BYTES"
+    return "STRING"
+
+
+def _field_paths(prefix: str, data_type: pa.DataType) -> List[tuple]:
+    rows = [(prefix, bigquery_type(data_type))]
+    if pa.types.is_struct(data_type):
+        for child in data_type:
+            rows.extend(_field_paths(f"{prefix}.{child.name}", child.type))
+    return rows
+
+
+def refresh_information_schema(con: duckdb.DuckDBPyConnection, tables: List[str]) -> None:
+    """Writes the BigQuery INFORMATION_SCHEMA views the schema catalog reads, for the given tables."""
+    tables_rows, columns_rows, paths_rows, options_rows = [], [], [], []
+    for table in tables:
+        schema = con.execute(f"SELECT * FROM {table} LIMIT 0").arrow().schema
+        tables_rows.append((table, "BASE TABLE"))
+        options_rows.append((table, "description", f'"{_TABLE_DESCRIPTIONS.get(table, "")}"'))
+        for field in schema:
+            clustering = CLUSTERING_COLUMNS.index(field.name) + 1 if field.name in CLUSTERING_COLUMNS else None
+            columns_rows.append((table, field.name, "YES" if field.name == PARTITION_COLUMN else "NO", clustering))
+            for path, data_type in _field_paths(field.name, field.type):
+                paths_rows.append((table, field.name, path, data_type, None))
+
+    con.execute("CREATE OR REPLACE TABLE bq_information_schema_tables (table_name VARCHAR, table_type VARCHAR)")
+    con.execute("CREATE OR REPLACE TABLE bq_information_schema_columns (table_name VARCHAR, column_name VARCHAR, "
+                "is_partitioning_column VARCHAR, clustering_ordinal_position BIGINT)")
+    con.execute("CREATE OR REPLACE TABLE bq_information_schema_column_field_paths (table_name VARCHAR, "
+                "column_name VARCHAR, field_path VARCHAR, data_type VARCHAR, description VARCHAR)")
+    con.execute("CREATE OR REPLACE TABLE bq_information_schema_table_options (table_name VARCHAR, "
+                "option_name VARCHAR, option_value VARCHAR)")
+    for name, rows in [("tables", tables_rows), ("columns", columns_rows),
+                       ("column_field_paths", paths_rows), ("table_options", options_rows)]:
+        if rows:
+            placeholders = ", ".join("?" * len(rows[0]))
+            con.executemany(f"INSERT INTO bq_information_schema_{name} VALUES ({placeholders})", rows)
+
+
+def generate(con: duckdb.DuckDBPyConnection,
+             accounts: int = DEFAULT_ACCOUNTS,
+             weeks: int = DEFAULT_WEEKS,
+             products: int = len(PRODUCTS),
+             end_date: Optional[date] = None,
+             daily: bool = True,
+             seed: int = 42) -> Dict[str, int]:
+    """
+    Fills a DuckDB database with synthetic `revenue_weekly` and `revenue_daily` tables.
+
+    The tables have the nested column layout of concord-prod's revenue tables, for
+    accounts × weeks × products rows per week, ending on the Monday before `end_date`.
+
+    Args:
+        con: The DuckDB connection to create the tables in.
+        accounts: The number of accounts, named by `account_name`.
+        weeks: The number of weeks of history.
+        products: The number of product categories, at most len(PRODUCTS).
+        end_date: The last day of data, defaults to today in UTC.
+        daily: Whether to also generate `revenue_daily`, which has seven times the rows.
+        seed: Changes every generated amount.
+    Returns:
+        The row count of every generated table.
+    """
+    end_date = end_date or datetime.now(timezone.utc).date()
+    products = min(products, len(PRODUCTS))
+    last_monday = end_date - timedelta(days=end_date.weekday())
+    start_date = last_monday - timedelta(weeks=weeks - 1)
+
+    tables = {"revenue_weekly": _revenue_select(7, weeks, accounts, products, start_date, seed)}
+    if daily:
+        days = (end_date - start_date).days + 1
+        tables["revenue_daily"] = _revenue_select(1, days, accounts, products, start_date, seed)
+
+    counts = {}
+    for table, select in tables.items():
+        con.execute(f"CREATE OR REPLACE TABLE {table} AS {select}")
+        counts[table] = con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    refresh_information_schema(con, list(tables))
+    return counts
@@ -0,0 +1,130 @@
+import re
+from datetime import date
+from typing import Callable, List, Optional, Tuple
+
+from ..utils.sql_text import _tokens
+
+# BigQuery types used in CAST and SAFE_CAST, and their DuckDB equivalents
+_TYPES = {
+    "INT64": "BIGINT",
+    "FLOAT64": "DOUBLE",
+    "NUMERIC": "DECIMAL(38, 9)",
+    "BIGNUMERIC": "DOUBLE",
+    "STRING": "VARCHAR",
+    "BOOL": "BOOLEAN",
+    "BYTES": "BLOB",
+}
+
+_TYPE_RE = re.compile(r"\bAS\s+(" + "|".join(_TYPES) + r")\b(?=\s*\))", re.IGNORECASE)
+_PARAMETER_RE = re.compile(r"@(\w+)")
+_CURRENT_DATE_RE = re.compile(r"\bCURRENT_DATE\s*\(\s*\)", re.IGNORECASE)
+_SAFE_CAST_RE = re.compile(r"\bSAFE_CAST\s*\(", re.IGNORECASE)
+_UNNEST_RE = re.compile(r"\bFROM\s+UNNEST\s*\(", re.IGNORECASE)
+_UNNEST_ALIAS_RE = re.compile(r"\s+AS\s+(\w+)", re.IGNORECASE)
+
+
+def split_args(sql: str, start: int) -> Tuple[List[str], int]:
+    """
+    Splits the arguments of the call whose opening parenthesis is at `start`.
+
+    Returns:
+        The argument texts and the index just past the closing parenthesis.
+    """
+    depth, quote, current = 0, None, start + 1
+    args: List[str] = []
+    for i in range(start, len(sql)):
+        ch = sql[i]
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in "'\"`":
+            quote = ch
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+            if depth == 0:
+                args.append(sql[current:i])
+                return args, i + 1
+        elif ch == "," and depth == 1:
+            args.append(sql[current:i])
+            current = i + 1
+    raise ValueError(f"Unbalanced parentheses in: {sql[start:start + 80]}")
+
+
+def rewrite_calls(sql: str, name: str, rewrite: Callable[[List[str]], str]) -> str:
+    """Replaces every call of a function, innermost arguments first, with the text `rewrite` builds."""
+    pattern = re.compile(r"\b" + name + r"\s*\(", re.IGNORECASE)
+    pos = 0
+    while True:
+        match = pattern.search(sql, pos)
+        if not match:
+            return sql
+        args, end = split_args(sql, match.end() - 1)
+        replacement = rewrite([rewrite_calls(arg.strip(), name, rewrite) for arg in args])
+        sql = sql[:match.start()] + replacement + sql[end:]
+        # The replacement is never rewritten again, DuckDB's names are lowercase or differ
+        pos = match.start() + len(replacement)
+
+
+def _table_name(ident: str) -> str:
+    """Maps `project.dataset.table` to the emulator's table, INFORMATION_SCHEMA views included."""
+    parts = ident.strip("`").split(".")
+    if len(parts) >= 2 and parts[-2].upper() == "INFORMATION_SCHEMA":
+        return f"bq_information_schema_{parts[-1].lower()}"
+    return parts[-1]
+
+
+def _rewrite_unnest(sql: str) -> str:
+    # FROM UNNEST(array) AS alias -> FROM (SELECT unnest(array) AS alias)
+    match = _UNNEST_RE.search(sql)
+    while match:
+        args, end = split_args(sql, match.end() - 1)
+        alias = _UNNEST_ALIAS_RE.match(sql, end)
+        name = alias.group(1) if alias else "value"
+        tail = alias.end() if alias else end
+        replacement = f"FROM (SELECT unnest({args[0]}) AS {name})"
+        sql = sql[:match.start()] + replacement + sql[tail:]
+        match = _UNNEST_RE.search(sql, match.start() + len(replacement))
+    return sql
+
+
+def to_duckdb(sql: str, today: Optional[date] = None) -> str:
+    """
+    Translates the BigQuery Standard SQL used by the agents into DuckDB SQL.
+
+    This is not a general transpiler: it covers the functions and constructs of the
+    named queries and typical builder output. Named parameters `@name` become DuckDB's
+    `$name`, and backticked table names resolve to the emulator's tables.
+
+    Args:
+        sql: The BigQuery SQL statement.
+        today: The date CURRENT_DATE() evaluates to, defaults to DuckDB's current date.
+    Returns:
+        The equivalent DuckDB SQL.
+    """
+    parts = []
+    for kind, text in _tokens(sql):
+        if kind == "ident":
+            parts.append(_table_name(text))
+        elif kind == "code":
+            text = _PARAMETER_RE.sub(r"$\1", text)
+            text = _CURRENT_DATE_RE.sub(f"DATE '{today.isoformat()}'" if today else "current_date", text)
+            text = _SAFE_CAST_RE.sub("TRY_CAST(", text)
+            text = _TYPE_RE.sub(lambda m: f"AS {_TYPES[m.group(1).upper()]}", text)
+            parts.append(text)
+        elif kind != "comment":
+            parts.append(text)
+    sql = "".join(parts)
+
+    sql = rewrite_calls(sql, "DATE_TRUNC", lambda a: f"CAST(date_trunc('{a[1].lower()}', {a[0]}) AS DATE)")
+    sql = rewrite_calls(sql, "DATE_DIFF", lambda a: f"date_diff('{a[2].lower()}', {a[1]}, {a[0]})")
+    sql = rewrite_calls(sql, "DATE_ADD", lambda a: f"CAST(({a[0]}) + {a[1]} AS DATE)")
+    sql = rewrite_calls(sql, "DATE_SUB", lambda a: f"CAST(({a[0]}) - {a[1]} AS DATE)")
+    sql = rewrite_calls(sql, "SAFE_DIVIDE", lambda a: f"(CASE WHEN ({a[1]}) = 0 THEN NULL ELSE ({a[0]}) / ({a[1]}) END)")
+    sql = rewrite_calls(sql, "COUNTIF", lambda a: f"count_if({a[0]})")
+    sql = rewrite_calls(sql, "LAST_DAY", lambda a: f"last_day({a[0]})")
+    sql = rewrite_calls(sql, "FORMAT_DATE", lambda a: f"strftime({a[1]}, {a[0]})")
+    sql = rewrite_calls(sql, "GENERATE_DATE_ARRAY", lambda a: (
+        f"CAST(generate_series(CAST({a[0]} AS TIMESTAMP), CAST({a[1]} AS TIMESTAMP), {a[2]}) AS DATE[])"))
+    return _rewrite_unnest(sql)
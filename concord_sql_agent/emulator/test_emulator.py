@@ -0,0 +1,88 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+from google.api_core.exceptions import BadRequest, NotFound
+from google.cloud import bigquery
+
+pytest.importorskip("duckdb")
+
+from concord_sql_agent.emulator.client import EmulatorClient
+from concord_sql_agent.emulator.dialect import to_duckdb
+from concord_sql_agent.tools.named_query_registry import account_parameters, get_named_query, validate_with_dry_run
+from concord_sql_agent.utils.jobs import submit_query
+
+TODAY = date(2026, 10, 18)
+PARAMETERS = account_parameters("Account 00003", "2026-01-01", TODAY.isoformat())
+START, END = PARAMETERS["start_date"], PARAMETERS["end_date"]
+
+
+@pytest.fixture(scope="module")
+def client():
+    client = EmulatorClient(accounts=10, weeks=60, today=TODAY)
+    yield client
+    client.close()
+
+
+def run_named_query(client: EmulatorClient, name: str) -> pd.DataFrame:
+    query = get_named_query(name)
+    job_config = bigquery.QueryJobConfig(query_parameters=query.bind(**PARAMETERS))
+    return client.query(query.sql, job_config=job_config).result(timeout=30).to_dataframe()
+
+
+def test_dialect_rewrites_bigquery_functions():
+    sql = to_duckdb("SELECT SAFE_DIVIDE(a, b), DATE_TRUNC(@d, MONTH) FROM `p.d.revenue_weekly` -- note", TODAY)
+    assert sql.strip() == ("SELECT (CASE WHEN (b) = 0 THEN NULL ELSE (a) / (b) END), "
+                           "CAST(date_trunc('month', $d) AS DATE) FROM revenue_weekly")
+
+
+def test_named_queries_agree_with_each_other(client):
+    monthly = run_named_query(client, "monthly_actual")
+    run_rate = run_named_query(client, "average_daily_run_rate")
+    committed = run_named_query(client, "committed_workloads")
+    forecast = run_named_query(client, "forecast_by_account_name")
+    assert not monthly.empty and not committed.empty
+
+    total = monthly["total_sales_revenue"].astype(float).sum()
+    assert run_rate["total_revenue_ytd"].astype(float).iloc[0] == pytest.approx(total)
+    assert run_rate["days_in_ytd_period"].iloc[0] == (END - START).days + 1
+    # Months before the current one are forecast at their actuals
+    for month, actual in zip(monthly["revenue_month"], monthly["total_sales_revenue"].astype(float)):
+        if pd.Timestamp(month).month < END.month:
+            assert float(forecast[pd.Timestamp(month).strftime("%B")].iloc[0]) == pytest.approx(actual)
+    monthly_gross = committed.groupby("revenue_month")["total_gross_revenue"].transform("sum")
+    assert committed["total_monthly_gross_revenue"].astype(float).tolist() == \
+        pytest.approx(monthly_gross.astype(float).tolist())
+
+
+def test_job_ids_conflict_and_reattach(client):
+    first = submit_query(client, "SELECT 1 AS x", "emulator_test_job")
+    second = submit_query(client, "SELECT 1 AS x", "emulator_test_job")
+    assert second is first
+    assert [tuple(row.values()) for row in second.result()] == [(1,)]
+
+
+def test_invalid_queries_fail_like_bigquery(client):
+    with pytest.raises(BadRequest):
+        client.query("SELECT missing_column FROM `concord-prod.service_cloudbi_reporting.revenue_weekly`").result()
+    with pytest.raises(BadRequest):
+        client.query("SELECT missing_column FROM revenue_weekly", job_config=bigquery.QueryJobConfig(dry_run=True))
+
+
+def test_finished_jobs_are_evicted_least_recently_used_first(client, monkeypatch):
+    monkeypatch.setattr(client, "max_jobs", 2)
+    jobs = [client.query(f"SELECT {i} AS x", job_id=f"emulator_evict_{i}") for i in range(2)]
+    for query_job in jobs:
+        query_job.result(timeout=30)
+    client.get_job("emulator_evict_0")
+
+    client.query("SELECT 2 AS x", job_id="emulator_evict_2").result(timeout=30)
+
+    assert client.get_job("emulator_evict_0") is jobs[0]
+    with pytest.raises(NotFound):
+        client.get_job("emulator_evict_1")
+    assert list(client._jobs) == ["emulator_evict_2", "emulator_evict_0"]
+
+
+def test_named_queries_pass_a_dry_run(client):
+    validate_with_dry_run(client)
@@ -1,20 +1,28 @@
+import asyncio
+
 from google.adk.agents import Agent
+from google.adk.agents.readonly_context import ReadonlyContext
 from google.genai import types
 
-from .state.schema_loader import schema_json_array
+from .state.schema_loader import get_all_schema_metas
+from .tools.query_execution_tool import estimate_query_cost
+from .tools.schema_catalog_tool import describe_table, list_tables
+from .tools.schema_search_tool import search_schema
 from .tools.named_query_tool import (create_query_forecast_by_account_name,
                                      create_query_committed_workloads_for_the_past_twelve_months,
                                      create_query_get_monthly_actual, create_query_average_daily_run_rate)
 
 from .query_crud_agent import root_agent as query_crud_agent
 
-INSTRUCTIONS = f"""
+INSTRUCTIONS = """
 [Primary Directive]
 You are the bigquery_query_builder. You are a BigQuery SQL expert whose goal is to create efficient, safe, and read-only queries. You will work with known JSON schemas or schemas provided by the user to build these queries.
 
 [Core Rules]
 - You MUST ensure all queries use the appropriate primary or partition keys for the tables to ensure timely and cost-effective execution.
 - You SHOULD time-bound all queries by adding a date range to the WHERE clause whenever possible. The current date is Monday, August 11, 2025.
+- You MUST call search_schema with the concepts of the user's question to find the relevant columns before writing SQL, and use only field paths it or describe_table returned.
+- You SHOULD call estimate_query_cost on a finished query and revise it if it exceeds the budget or scans far more data than needed.
 
 [User Interaction Primary Flow]
 1. Inform the user of the known queries you can build and ask what they need.
@@ -36,9 +44,9 @@ You are the bigquery_query_builder. You are a BigQuery SQL expert whose goal is
     - Average Daily Run Rate - create_query_average_daily_run_rate
     
 [Schema Discovery & Exploration Workflow]
-1.  **List Available Data**: First, use your tools to list all available tables and datasets. Present this list to the user and ask which table they are interested in exploring.
+1.  **List Available Data**: First, use list_tables to list all available tables and datasets. Present this list to the user and ask which table they are interested in exploring.
     - *Example: "I can see the following tables: `sales_records`, `customer_data`, and `product_inventory`. Which one would you like to work with?"*
-2.  **Describe Table Structure**: Once the user selects a table, retrieve and display its schema. This includes all column names and their corresponding data types (e.g., STRING, INTEGER, TIMESTAMP).
+2.  **Describe Table Structure**: Once the user selects a table, retrieve its schema with describe_table and display it. This includes all column names and their corresponding data types (e.g., STRING, INTEGER, TIMESTAMP).
     - *Example: "The `sales_records` table has these fields: `order_id` (STRING), `sale_amount` (FLOAT), `sale_date` (TIMESTAMP), and `customer_id` (STRING).*"
 3.  **Clarify Meaning and Usage**: Ask the user for context about the most important fields to ensure you understand how to use them correctly.
     - *Example: "To make sure I build the right query, could you tell me which field I should use for dates? Also, is `sale_amount` the final price including tax?"*
@@ -48,21 +56,41 @@ You are the bigquery_query_builder. You are a BigQuery SQL expert whose goal is
 [Query Persistence]
 1. All persistent use cases will be handled by the firestore_query_crud_agent Agent.
 
-[Known Schemas]
-{schema_json_array}
+[Known Tables]
+{known_tables}
 """.strip()
 
+
+async def instructions(context: ReadonlyContext) -> str:
+    """
+    Renders the instructions with a one line summary per known table. The columns are looked
+    up with search_schema on demand, the full schemas are too large to send on every turn.
+
+    A table that was never cached is fetched from BigQuery, on a worker thread so the
+    event loop keeps serving other sessions.
+    """
+    schemas = await asyncio.to_thread(get_all_schema_metas)
+    known_tables = "\n".join(f"- `{schema.full_name}`: {schema.description or schema.display_name or ''} "
+                              f"({len(schema.schema_json)} top-level columns)"
+                              for schema in schemas)
+    return INSTRUCTIONS.replace("{known_tables}", known_tables or "- None loaded, use list_tables.")
+
+
 root_agent = Agent(
     name = "bigquery_query_builder",
     model="gemini-2.5-pro",
     description="Iterates with the user to create the desired query, when complete it MAY be executed by the executor agent.",
-    instruction=INSTRUCTIONS,
+    instruction=instructions,
     output_key="sql_query",
     sub_agents=[query_crud_agent],
     tools=[create_query_forecast_by_account_name,
            create_query_committed_workloads_for_the_past_twelve_months,
            create_query_get_monthly_actual,
-           create_query_average_daily_run_rate],
+           create_query_average_daily_run_rate,
+           estimate_query_cost,
+           list_tables,
+           describe_table,
+           search_schema],
     generate_content_config=types.GenerateContentConfig(
         temperature=0.1,
     )
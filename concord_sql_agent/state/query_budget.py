@@ -0,0 +1,203 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from google.cloud import bigquery
+from pydantic import BaseModel
+
+from ..utils.client import get_bq_client
+from ..utils.sql_text import sql_hash
+
+GIB = 1024 ** 3
+TIB = 1024 ** 4
+
+# A single query scanning more than this is rejected, above the warning threshold it is flagged
+MAX_BYTES_PER_QUERY = int(os.environ.get("CONCORD_MAX_BYTES_PER_QUERY", str(2 * TIB)))
+WARN_BYTES_PER_QUERY = int(os.environ.get("CONCORD_WARN_BYTES_PER_QUERY", str(200 * GIB)))
+
+# Bytes a single user may scan per UTC day, in each process, spend is not shared between processes
+MAX_BYTES_PER_USER = int(os.environ.get("CONCORD_MAX_BYTES_PER_USER", str(10 * TIB)))
+
+DRY_RUN_CACHE_MAX_ENTRIES = 1024
+DRY_RUN_CACHE_TTL_SECONDS = 3600
+
+
+class QueryBudgetExceededError(ValueError):
+    """Raised when a query would exceed the per-query or per-user scan budget."""
+
+
+class BudgetDecision(BaseModel):
+    estimated_bytes: int
+    # Held against the user's allowance until the query is charged
+    reserved_bytes: int = 0
+    warning: Optional[str] = None
+
+
+def format_bytes(num_bytes: int) -> str:
+    """Formats a byte count using binary units, e.g. 1.50 GiB."""
+    value = float(num_bytes)
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024:
+            return f"{value:,.2f} {unit}"
+        value /= 1024
+    return f"{value:,.2f} TiB"
+
+
+QueryParameters = Optional[List[bigquery.ScalarQueryParameter]]
+
+
+def parameter_values(query_parameters: QueryParameters) -> Optional[Dict[str, object]]:
+    """Maps query parameters to their values, the form used in SQL hash based cache keys."""
+    if not query_parameters:
+        return None
+    return {parameter.name: parameter.value for parameter in query_parameters}
+
+
+def dry_run(query: str, query_parameters: QueryParameters = None) -> int:
+    """Returns the number of bytes BigQuery estimates the query will process."""
+    job_config = bigquery.QueryJobConfig(dry_run=True, use_query_cache=False,
+                                         query_parameters=query_parameters or [])
+    query_job = get_bq_client().query(query, job_config=job_config)
+    return query_job.total_bytes_processed or 0
+
+
+class QueryBudget:
+    """
+    A pre-flight cost gate for queries.
+
+    Every query is dry-run before it is executed, and the estimated bytes processed are
+    checked against a per-query limit and the user's remaining daily allowance. Estimates
+    are cached per SQL hash and parameter values, so repeated checks of the same query
+    cost no API call.
+
+    A passed check reserves the estimate against the allowance in the same step, so
+    concurrent queries of a user cannot together overrun it, and `charge` later replaces
+    the reservation with the bytes actually processed. Spend is tracked in memory, so the
+    daily cap applies per process, a user served by several processes may scan up to the
+    cap in each of them.
+    """
+    def __init__(self,
+                 max_bytes_per_query: int = MAX_BYTES_PER_QUERY,
+                 warn_bytes_per_query: int = WARN_BYTES_PER_QUERY,
+                 max_bytes_per_user: int = MAX_BYTES_PER_USER,
+                 estimator: Callable[[str, QueryParameters], int] = dry_run):
+        self.max_bytes_per_query = max_bytes_per_query
+        self.warn_bytes_per_query = warn_bytes_per_query
+        self.max_bytes_per_user = max_bytes_per_user
+        self.estimator = estimator
+        self.lock = threading.Lock()
+        self._estimates: "OrderedDict[str, tuple[float, int]]" = OrderedDict()
+        self._day = datetime.now(timezone.utc).date()
+        self._spent: Dict[str, int] = {}
+
+    def estimate(self, query: str, query_parameters: QueryParameters = None) -> int:
+        """
+        Estimates the bytes a query will process, using the dry-run cache when possible.
+
+        Args:
+            query: The SQL statement.
+            query_parameters: Optional parameters of a parameterized query.
+        Returns:
+            The estimated number of bytes processed.
+        """
+        key = sql_hash(query, parameter_values(query_parameters))
+        now = time.time()
+        with self.lock:
+            cached = self._estimates.get(key)
+            if cached and now - cached[0] < DRY_RUN_CACHE_TTL_SECONDS:
+                self._estimates.move_to_end(key)
+                return cached[1]
+
+        estimated = self.estimator(query, query_parameters)
+        with self.lock:
+            self._estimates[key] = (now, estimated)
+            while len(self._estimates) > DRY_RUN_CACHE_MAX_ENTRIES:
+                self._estimates.popitem(last=False)
+        return estimated
+
+    def check(self, query: str, user_id: Optional[str] = None,
+              query_parameters: QueryParameters = None) -> BudgetDecision:
+        """
+        Checks a query against the budgets before it is executed, and reserves its estimate
+        against the user's allowance. Every passed check must be followed by a `charge` with
+        the decision's reserved bytes, also when the query then fails.
+
+        Args:
+            query: The SQL statement.
+            user_id: The user running the query, if known.
+            query_parameters: Optional parameters of a parameterized query.
+        Returns:
+            The estimate, with a warning when the query is expensive but allowed.
+        Raises:
+            QueryBudgetExceededError: If the query exceeds a budget.
+        """
+        estimated = self.estimate(query, query_parameters)
+        if estimated > self.max_bytes_per_query:
+            raise QueryBudgetExceededError(
+                f"The query would scan an estimated {format_bytes(estimated)}, which exceeds the "
+                f"per-query limit of {format_bytes(self.max_bytes_per_query)}. Narrow the date range "
+                f"on the partition column or select fewer columns.")
+
+        reserved = 0
+        if user_id:
+            with self.lock:
+                self._roll_day()
+                remaining = self.max_bytes_per_user - self._spent.get(user_id, 0)
+                if estimated <= remaining:
+                    reserved = estimated
+                    self._spent[user_id] = self._spent.get(user_id, 0) + reserved
+            if estimated > remaining:
+                raise QueryBudgetExceededError(
+                    f"The query would scan an estimated {format_bytes(estimated)}, but only "
+                    f"{format_bytes(max(remaining, 0))} of today's budget of "
+                    f"{format_bytes(self.max_bytes_per_user)} remains for user '{user_id}'.")
+
+        warning = None
+        if estimated > self.warn_bytes_per_query:
+            warning = f"Warning: this query scans an estimated {format_bytes(estimated)}."
+        return BudgetDecision(estimated_bytes=estimated, reserved_bytes=reserved, warning=warning)
+
+    def charge(self, user_id: Optional[str], num_bytes: Optional[int], reserved_bytes: int = 0) -> None:
+        """
+        Records the bytes a user's executed query actually processed, settling the reservation of its check.
+
+        Args:
+            user_id: The user running the query, if known.
+            num_bytes: The bytes processed, 0 or None when the query did not run.
+            reserved_bytes: The reserved bytes of the query's `BudgetDecision`.
+        """
+        if not user_id:
+            return
+        with self.lock:
+            self._roll_day()
+            # A reservation made before midnight UTC was cleared with the rest of yesterday's spend
+            self._spent[user_id] = max(self._spent.get(user_id, 0) + (num_bytes or 0) - reserved_bytes, 0)
+
+    def spent(self, user_id: str) -> int:
+        """Returns the bytes the user has processed today, including those reserved for running queries."""
+        with self.lock:
+            self._roll_day()
+            return self._spent.get(user_id, 0)
+
+    def _roll_day(self) -> None:
+        today = datetime.now(timezone.utc).date()
+        if today != self._day:
+            self._day = today
+            self._spent.clear()
+
+
+_query_budget: Optional[QueryBudget] = None
+_query_budget_lock = threading.Lock()
+
+
+def get_query_budget() -> QueryBudget:
+    """Returns the process wide query budget, creating it on first use."""
+    global _query_budget
+    if _query_budget is None:
+        with _query_budget_lock:
+            if _query_budget is None:
+                _query_budget = QueryBudget()
+    return _query_budget
@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+# How long a caller waits for the listener's first snapshot before reading Firestore directly
+QUERY_CATALOG_TIMEOUT_SECONDS = float(os.environ.get("CONCORD_QUERY_CATALOG_TIMEOUT_SECONDS", "10"))
+
+# After the first snapshot failed to arrive in time, callers read Firestore directly for this long without waiting
+QUERY_CATALOG_COOLDOWN_SECONDS = float(os.environ.get("CONCORD_QUERY_CATALOG_COOLDOWN_SECONDS", "60"))
+
+
+class QueryCatalog:
+    """
+    An in-memory copy of the saved queries collection, kept current by a Firestore snapshot listener.
+
+    The listener reads every document once when it starts and afterwards receives only the
+    documents that changed, so listing queries costs no document reads and takes the same
+    time however often it is called. Queries are indexed by creator and by visibility, so
+    a user's listing touches only their own and the public queries.
+    """
+    def __init__(self, collection, cooldown_seconds: float = QUERY_CATALOG_COOLDOWN_SECONDS):
+        self.collection = collection
+        self.cooldown_seconds = cooldown_seconds
+        self.lock = threading.Lock()
+        self._watch_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._watch = None
+        self._queries: Dict[str, dict] = {}
+        self._by_creator: Dict[str, set[str]] = {}
+        self._public: set[str] = set()
+        self._unavailable_until = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def start(self, timeout: float = QUERY_CATALOG_TIMEOUT_SECONDS) -> bool:
+        """
+        Starts the listener, or restarts it if its stream was closed, and waits for the first snapshot.
+
+        Once the snapshot did not arrive in time, later calls return right away until the
+        cool-down has passed, instead of each waiting out the timeout again.
+
+        Returns:
+            Whether the catalog is loaded.
+        """
+        # Not under self.lock, a listener may deliver its first snapshot on the subscribing thread
+        with self._watch_lock:
+            watch = self._watch
+            if watch is None or not getattr(watch, "is_active", True):
+                # A restarted listener resends every document, the catalog is rebuilt from them
+                self._ready.clear()
+                self._watch = self.collection.on_snapshot(self._on_snapshot)
+        if self._ready.is_set():
+            return True
+        if time.monotonic() < self._unavailable_until:
+            return False
+        if self._ready.wait(timeout):
+            return True
+        self._unavailable_until = time.monotonic() + self.cooldown_seconds
+        print(f"The query catalog did not load within {timeout}s, reading Firestore directly "
+              f"for the next {self.cooldown_seconds}s.")
+        return False
+
+    def stop(self) -> None:
+        with self._watch_lock:
+            watch, self._watch = self._watch, None
+        if watch is not None:
+            watch.unsubscribe()
+
+    def _index(self, doc_id: str, data: dict) -> None:
+        self._queries[doc_id] = data
+        self._by_creator.setdefault(data.get("creator"), set()).add(doc_id)
+        if data.get("is_public"):
+            self._public.add(doc_id)
+
+    def _unindex(self, doc_id: str) -> None:
+        data = self._queries.pop(doc_id, None)
+        if data is None:
+            return
+        creator_ids = self._by_creator.get(data.get("creator"))
+        if creator_ids is not None:
+            creator_ids.discard(doc_id)
+            if not creator_ids:
+                del self._by_creator[data.get("creator")]
+        self._public.discard(doc_id)
+
+    def _on_snapshot(self, docs, changes, read_time) -> None:
+        with self.lock:
+            if not self._ready.is_set():
+                self._queries, self._by_creator, self._public = {}, {}, set()
+                for doc in docs:
+                    self._index(doc.id, doc.to_dict())
+            else:
+                for change in changes:
+                    self._unindex(change.document.id)
+                    if change.type.name != "REMOVED":
+                        self._index(change.document.id, change.document.to_dict())
+        self._ready.set()
+
+    def remember(self, doc_id: str, data: dict) -> None:
+        """Applies a write of this process right away, before the listener delivers it."""
+        with self.lock:
+            self._unindex(doc_id)
+            self._index(doc_id, dict(data))
+
+    def forget(self, doc_id: str) -> None:
+        """Applies a delete of this process right away, before the listener delivers it."""
+        with self.lock:
+            self._unindex(doc_id)
+
+    def list_for(self, user_id: Optional[str]) -> Optional[List[dict]]:
+        """
+        Returns the queries created by a user and every public query, ordered by name.
+
+        Args:
+            user_id: The current user.
+        Returns:
+            Copies of the query records, or None if the catalog could not be loaded in time.
+        """
+        if not self.start():
+            return None
+        with self.lock:
+            doc_ids = self._by_creator.get(user_id, set()) | self._public
+            queries = [dict(self._queries[doc_id]) for doc_id in doc_ids]
+        return sorted(queries, key=lambda query: (str(query.get("name", "")), str(query.get("id", ""))))
+
+    def find_public(self, name: str) -> Optional[List[dict]]:
+        """
+        Returns the public queries with a name, of any creator.
+
+        Returns:
+            Copies of the query records, or None if the catalog could not be loaded in time.
+        """
+        if not self.start():
+            return None
+        with self.lock:
+            return [dict(self._queries[doc_id]) for doc_id in self._public if self._queries[doc_id].get("name") == name]
+
+
+_query_catalogs: Dict[str, QueryCatalog] = {}
+_query_catalogs_lock = threading.Lock()
+
+
+def get_query_catalog(collection) -> QueryCatalog:
+    """Returns the process wide catalog of a collection, creating it on first use."""
+    catalog = _query_catalogs.get(collection.id)
+    if catalog is None:
+        with _query_catalogs_lock:
+            catalog = _query_catalogs.get(collection.id)
+            if catalog is None:
+                catalog = _query_catalogs[collection.id] = QueryCatalog(collection)
+    return catalog
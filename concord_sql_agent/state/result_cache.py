@@ -0,0 +1,274 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+from ..utils.sql_text import is_cacheable, is_deterministic, referenced_tables, sql_hash
+from .schema_loader import get_table_modified
+
+# In-memory tier
+MEMORY_MAX_ENTRIES = int(os.environ.get("CONCORD_RESULT_CACHE_MAX_ENTRIES", "128"))
+MEMORY_TTL_SECONDS = int(os.environ.get("CONCORD_RESULT_CACHE_MEMORY_TTL", "900"))
+
+# On-disk tier, shared by every process on the host
+DISK_TTL_SECONDS = int(os.environ.get("CONCORD_RESULT_CACHE_DISK_TTL", "21600"))
+CACHE_DIR = os.environ.get("CONCORD_RESULT_CACHE_DIR",
+                           os.path.join(os.path.expanduser("~"), ".cache", "vexel", "results"))
+
+# How long a table's `modified` timestamp is trusted before it is read again
+MODIFIED_CHECK_SECONDS = 60
+
+# Minimum interval between sweeps of expired on-disk entries
+PRUNE_INTERVAL_SECONDS = 600
+
+
+@dataclass
+class CacheEntry:
+    frame: pd.DataFrame
+    expires: float
+    table_modified: Dict[str, str] = field(default_factory=dict)
+
+
+def _expiry(query: str, ttl_seconds: int) -> float:
+    """
+    Computes the expiry of a result. Queries using CURRENT_DATE() and friends change
+    meaning at midnight UTC, so they never outlive the current day.
+    """
+    expires = time.time() + ttl_seconds
+    if not is_deterministic(query):
+        now = datetime.now(timezone.utc)
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+        expires = min(expires, midnight.timestamp())
+    return expires
+
+
+class ResultCache:
+    """
+    A two tier cache of query results keyed on normalized SQL text.
+
+    The first tier is an in-process LRU of DataFrames, the second is a directory of
+    parquet files that every process on the host can share. Entries expire after their
+    tier's TTL and are discarded as soon as the `modified` timestamp of any table
+    they were read from changes.
+    """
+    def __init__(self,
+                 max_entries: int = MEMORY_MAX_ENTRIES,
+                 memory_ttl_seconds: int = MEMORY_TTL_SECONDS,
+                 disk_ttl_seconds: int = DISK_TTL_SECONDS,
+                 cache_dir: Optional[str] = CACHE_DIR,
+                 modified_lookup: Callable[[str], datetime] = get_table_modified):
+        self.max_entries = max_entries
+        self.memory_ttl_seconds = memory_ttl_seconds
+        self.disk_ttl_seconds = disk_ttl_seconds
+        self.cache_dir = cache_dir
+        self.modified_lookup = modified_lookup
+        self.lock = threading.Lock()
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._modified: Dict[str, tuple[float, str]] = {}
+        self._last_prune = 0.0
+
+    def get(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> Optional[pd.DataFrame]:
+        """
+        Looks up the result of a query, first in memory and then on disk.
+
+        Args:
+            query: The SQL statement.
+            parameters: Optional query parameters that are part of the cache key.
+        Returns:
+            The cached DataFrame, or None on a miss.
+        """
+        if not is_cacheable(query):
+            return None
+        key = sql_hash(query, parameters)
+
+        with self.lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires <= time.time():
+                    # Only the memory copy expired, the disk tier keeps its own, longer TTL
+                    del self._entries[key]
+                    entry = None
+                else:
+                    self._entries.move_to_end(key)
+
+        if entry is None:
+            entry = self._read_disk(key)
+            if entry is None:
+                return None
+            # Promote to memory, without outliving the memory TTL
+            entry.expires = min(entry.expires, time.time() + self.memory_ttl_seconds)
+            self._remember(key, entry)
+
+        if not self._is_current(entry):
+            self.invalidate(query, parameters)
+            return None
+        return entry.frame
+
+    def table_versions(self, query: str) -> Dict[str, str]:
+        """
+        Returns the `modified` timestamps of the tables a query reads.
+
+        Take them before the query is submitted and pass them to `put`, so a table
+        written while the query runs makes the result stale instead of current.
+        """
+        table_modified = {}
+        for table_ref in referenced_tables(query):
+            modified = self._table_modified(table_ref)
+            if modified is not None:
+                table_modified[table_ref] = modified
+        return table_modified
+
+    def put(self, query: str, frame: pd.DataFrame, parameters: Optional[Dict[str, Any]] = None,
+            table_modified: Optional[Dict[str, str]] = None) -> None:
+        """
+        Stores the result of a query in both tiers.
+
+        Args:
+            query: The SQL statement.
+            frame: The query result.
+            parameters: Optional query parameters that are part of the cache key.
+            table_modified: The `table_versions` of the query taken before it was submitted,
+                read now when not given.
+        """
+        if not is_cacheable(query):
+            return
+        key = sql_hash(query, parameters)
+        if table_modified is None:
+            table_modified = self.table_versions(query)
+
+        self._remember(key, CacheEntry(frame=frame,
+                                       expires=_expiry(query, self.memory_ttl_seconds),
+                                       table_modified=table_modified))
+        self._write_disk(key, frame, _expiry(query, self.disk_ttl_seconds), table_modified)
+
+    def invalidate(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> None:
+        """Removes a query result from both tiers."""
+        key = sql_hash(query, parameters)
+        with self.lock:
+            self._entries.pop(key, None)
+        if self.cache_dir:
+            for suffix in (".json", ".parquet"):
+                try:
+                    os.remove(os.path.join(self.cache_dir, key + suffix))
+                except FileNotFoundError:
+                    pass
+
+    def clear(self) -> None:
+        """Empties the in-memory tier and forgets all table timestamps."""
+        with self.lock:
+            self._entries.clear()
+            self._modified.clear()
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        with self.lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _table_modified(self, table_ref: str) -> Optional[str]:
+        """Returns the table's modified timestamp, re-reading it at most every MODIFIED_CHECK_SECONDS."""
+        now = time.time()
+        with self.lock:
+            checked = self._modified.get(table_ref)
+        if checked and now - checked[0] < MODIFIED_CHECK_SECONDS:
+            return checked[1]
+        try:
+            modified = self.modified_lookup(table_ref)
+        except Exception as e:
+            print(f"Unable to read the modified time of {table_ref}: {e}")
+            return None
+        value = modified.isoformat() if modified else ""
+        with self.lock:
+            self._modified[table_ref] = (now, value)
+        return value
+
+    def _is_current(self, entry: CacheEntry) -> bool:
+        for table_ref, modified in entry.table_modified.items():
+            current = self._table_modified(table_ref)
+            # When the lookup fails the entry is trusted until it expires
+            if current is not None and current != modified:
+                return False
+        return True
+
+    def _read_disk(self, key: str) -> Optional[CacheEntry]:
+        if not self.cache_dir:
+            return None
+        meta_path = os.path.join(self.cache_dir, key + ".json")
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["expires"] <= time.time():
+                return None
+            frame = pd.read_parquet(os.path.join(self.cache_dir, key + ".parquet"))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Discarding unreadable cache entry {key}: {e}")
+            return None
+        return CacheEntry(frame=frame, expires=meta["expires"], table_modified=meta.get("table_modified", {}))
+
+    def _write_disk(self, key: str, frame: pd.DataFrame, expires: float, table_modified: Dict[str, str]) -> None:
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to temporary files first so readers in other processes never see partial entries
+            tmp_suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+            data_path = os.path.join(self.cache_dir, key + ".parquet")
+            frame.to_parquet(data_path + tmp_suffix, index=False)
+            os.replace(data_path + tmp_suffix, data_path)
+
+            meta_path = os.path.join(self.cache_dir, key + ".json")
+            with open(meta_path + tmp_suffix, "w", encoding="utf-8") as f:
+                json.dump({"expires": expires, "table_modified": table_modified}, f)
+            os.replace(meta_path + tmp_suffix, meta_path)
+        except Exception as e:
+            print(f"Unable to write cache entry {key}: {e}")
+        self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        """Removes expired entries from the on-disk tier."""
+        now = time.time()
+        if now - self._last_prune < PRUNE_INTERVAL_SECONDS:
+            return
+        self._last_prune = now
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            meta_path = os.path.join(self.cache_dir, name)
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    expired = json.load(f)["expires"] <= now
+            except Exception:
+                expired = True
+            if expired:
+                for path in (meta_path, meta_path[:-len(".json")] + ".parquet"):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+
+
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Returns the process wide result cache, creating it on first use."""
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache()
+    return _result_cache
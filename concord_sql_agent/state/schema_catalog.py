@@ -0,0 +1,231 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Iterable, List, Optional
+
+from pydantic import BaseModel
+
+from ..utils.client import get_bq_client
+
+# Datasets the catalog covers, as project.dataset
+CATALOG_DATASETS = os.environ.get("CONCORD_CATALOG_DATASETS", "concord-prod.service_cloudbi_reporting").split(",")
+
+# How long a dataset's catalog is served before it is reloaded in the background
+CATALOG_REFRESH_SECONDS = int(os.environ.get("CONCORD_CATALOG_REFRESH_SECONDS", "3600"))
+
+# Every table, column and nested field of a dataset in a single query, tables without columns in one row
+_CATALOG_QUERY = """
+SELECT
+    tables.table_name,
+    tables.table_type,
+    options.option_value AS table_description,
+    paths.column_name,
+    paths.field_path,
+    paths.data_type,
+    paths.description,
+    IFNULL(columns.is_partitioning_column = 'YES', FALSE) AS is_partitioning_column,
+    columns.clustering_ordinal_position
+FROM `{dataset}.INFORMATION_SCHEMA.TABLES` AS tables
+LEFT JOIN `{dataset}.INFORMATION_SCHEMA.COLUMN_FIELD_PATHS` AS paths
+    ON paths.table_name = tables.table_name
+LEFT JOIN `{dataset}.INFORMATION_SCHEMA.COLUMNS` AS columns
+    ON columns.table_name = paths.table_name AND columns.column_name = paths.field_path
+LEFT JOIN `{dataset}.INFORMATION_SCHEMA.TABLE_OPTIONS` AS options
+    ON options.table_name = tables.table_name AND options.option_name = 'description'
+ORDER BY tables.table_name, paths.field_path"""
+
+
+class ColumnInfo(BaseModel):
+    field_path: str
+    data_type: str
+    description: Optional[str] = None
+    is_partitioning_column: bool = False
+    clustering_ordinal_position: Optional[int] = None
+
+
+class TableInfo(BaseModel):
+    full_name: str
+    table_type: str
+    description: Optional[str] = None
+    columns: List[ColumnInfo] = []
+
+    @property
+    def name(self) -> str:
+        return self.full_name.rsplit(".", 1)[-1]
+
+
+def _option_text(value: Optional[str]) -> Optional[str]:
+    # TABLE_OPTIONS reports string options as quoted literals
+    try:
+        return json.loads(value) if value else value
+    except ValueError:
+        return value
+
+
+def build_tables(dataset: str, rows: Iterable) -> Dict[str, TableInfo]:
+    """
+    Groups the rows of the catalog query into tables.
+
+    Args:
+        dataset: The dataset the rows were read from, as project.dataset.
+        rows: Rows with the columns selected by the catalog query, in table order.
+    Returns:
+        The tables of the dataset keyed on their fully qualified name.
+    """
+    tables: Dict[str, TableInfo] = {}
+    for row in rows:
+        full_name = f"{dataset}.{row['table_name']}"
+        table = tables.get(full_name)
+        if table is None:
+            table = tables[full_name] = TableInfo(full_name=full_name,
+                                                  table_type=row["table_type"],
+                                                  description=_option_text(row["table_description"]))
+        if row["field_path"] is None:
+            continue
+        table.columns.append(ColumnInfo(field_path=row["field_path"],
+                                        data_type=row["data_type"],
+                                        description=row["description"],
+                                        is_partitioning_column=bool(row["is_partitioning_column"]),
+                                        clustering_ordinal_position=row["clustering_ordinal_position"]))
+    return tables
+
+
+def load_dataset(dataset: str) -> Dict[str, TableInfo]:
+    """Reads the catalog of a dataset with one INFORMATION_SCHEMA query, however many tables it has."""
+    rows = get_bq_client().query(_CATALOG_QUERY.format(dataset=dataset)).result()
+    return build_tables(dataset, rows)
+
+
+class SchemaCatalog:
+    """
+    An in-memory catalog of the tables, columns and nested field paths of whole datasets.
+
+    Each dataset is loaded with a single query on first use and reloaded in the background
+    once it is older than the refresh interval. Tables are indexed on their full and short
+    names, and columns on their field paths, so lookups never scan the catalog.
+    """
+    def __init__(self, datasets: Optional[List[str]] = None,
+                 refresh_seconds: int = CATALOG_REFRESH_SECONDS,
+                 loader=load_dataset):
+        self.datasets = datasets or CATALOG_DATASETS
+        self.refresh_seconds = refresh_seconds
+        self.loader = loader
+        self.lock = threading.Lock()
+        self._loaded: Dict[str, float] = {}
+        self._refreshing: set[str] = set()
+        self._loading: Dict[str, Future] = {}
+        self._tables: Dict[str, TableInfo] = {}
+        self._by_name: Dict[str, List[str]] = {}
+        self._by_field: Dict[str, List[str]] = {}
+        # Incremented on every reload, so derived indexes know when to rebuild
+        self.version = 0
+
+    def refresh(self, dataset: str) -> None:
+        """Reloads a dataset and swaps it into the catalog."""
+        tables = self.loader(dataset)
+        with self.lock:
+            merged = {name: table for name, table in self._tables.items() if not name.startswith(f"{dataset}.")}
+            merged.update(tables)
+            by_name: Dict[str, List[str]] = {}
+            by_field: Dict[str, List[str]] = {}
+            for full_name, table in merged.items():
+                by_name.setdefault(table.name.lower(), []).append(full_name)
+                for column in table.columns:
+                    by_field.setdefault(column.field_path.lower(), []).append(full_name)
+            self._tables, self._by_name, self._by_field = merged, by_name, by_field
+            self._loaded[dataset] = time.time()
+            self.version += 1
+
+    def _ensure_loaded(self) -> None:
+        for dataset in self.datasets:
+            loaded = self._loaded.get(dataset)
+            if loaded is None:
+                self._load(dataset)
+            elif time.time() - loaded > self.refresh_seconds:
+                self._refresh_in_background(dataset)
+
+    def _load(self, dataset: str) -> None:
+        """Loads a dataset on first use, concurrent callers share a single load in flight."""
+        with self.lock:
+            if dataset in self._loaded:
+                return
+            flight = self._loading.get(dataset)
+            leader = flight is None
+            if leader:
+                flight = self._loading[dataset] = Future()
+        if leader:
+            try:
+                self.refresh(dataset)
+                flight.set_result(None)
+            except Exception as e:
+                flight.set_exception(e)
+            finally:
+                with self.lock:
+                    self._loading.pop(dataset, None)
+        flight.result()
+
+    def _refresh_in_background(self, dataset: str) -> None:
+        with self.lock:
+            if dataset in self._refreshing:
+                return
+            self._refreshing.add(dataset)
+
+        def refresh():
+            try:
+                self.refresh(dataset)
+            except Exception as e:
+                # The current catalog stays in use, the next caller retries
+                print(f"Background catalog refresh of {dataset} failed: {e}")
+            finally:
+                with self.lock:
+                    self._refreshing.discard(dataset)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def tables(self, dataset: Optional[str] = None) -> List[TableInfo]:
+        """Returns every table in the catalog, or in one dataset, ordered by name."""
+        self._ensure_loaded()
+        tables = self._tables
+        return [tables[name] for name in sorted(tables) if dataset is None or name.startswith(f"{dataset}.")]
+
+    def versioned_tables(self) -> tuple[int, List[TableInfo]]:
+        """Returns every table in the catalog ordered by name, with the catalog version they belong to."""
+        self._ensure_loaded()
+        with self.lock:
+            return self.version, [self._tables[name] for name in sorted(self._tables)]
+
+    def get_table(self, name: str) -> Optional[TableInfo]:
+        """
+        Looks up a table by its full name or, when that is unambiguous, its short name.
+
+        Args:
+            name: e.g. project.dataset.table, with or without backticks, or just table.
+        """
+        self._ensure_loaded()
+        name = name.strip().strip("`")
+        table = self._tables.get(name)
+        if table is None:
+            matches = self._by_name.get(name.rsplit(".", 1)[-1].lower(), [])
+            table = self._tables.get(matches[0]) if len(matches) == 1 else None
+        return table
+
+    def tables_with_field(self, field_path: str) -> List[TableInfo]:
+        """Returns the tables that have a column or nested field with the given path."""
+        self._ensure_loaded()
+        return [self._tables[name] for name in self._by_field.get(field_path.lower(), [])]
+
+
+_schema_catalog: Optional[SchemaCatalog] = None
+_schema_catalog_lock = threading.Lock()
+
+
+def get_schema_catalog() -> SchemaCatalog:
+    """Returns the process wide schema catalog, creating it on first use."""
+    global _schema_catalog
+    if _schema_catalog is None:
+        with _schema_catalog_lock:
+            if _schema_catalog is None:
+                _schema_catalog = SchemaCatalog()
+    return _schema_catalog
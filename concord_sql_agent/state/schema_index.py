@@ -0,0 +1,126 @@
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .schema_catalog import TableInfo, get_schema_catalog
+
+# BM25 term frequency saturation and document length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Terms of the field path count this many times more than terms of the description
+PATH_WEIGHT = 2
+
+_WORD_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+_STOP_WORDS = frozenset("a an and are as at be by for from how i in is it me of on or show the this to was what "
+                        "which with".split())
+
+
+class FieldDoc(NamedTuple):
+    table: str
+    field_path: str
+    data_type: str
+    mode: str
+    description: str
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits text into lowercase terms on punctuation, underscores and camelCase, dropping
+    stop words and a plural `s`, so `gtm_product_level_3` and "GTM products" share terms.
+    """
+    terms = []
+    for word in _WORD_RE.findall(text or ""):
+        word = word.lower()
+        if word in _STOP_WORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def table_fields(table: TableInfo) -> List[FieldDoc]:
+    """Returns one document per column and nested field path of a catalog table."""
+    return [FieldDoc(table=table.full_name,
+                     field_path=column.field_path,
+                     data_type=column.data_type,
+                     # COLUMN_FIELD_PATHS reports no mode, repeated fields show as ARRAY types
+                     mode="REPEATED" if column.data_type.startswith("ARRAY<") else "",
+                     description=column.description or "")
+            for column in table.columns]
+
+
+class SchemaIndex:
+    """
+    A BM25 ranked index over the field paths and descriptions of table schemas.
+
+    Built once from the schema catalog, it answers "which columns matter for this
+    question" locally, so only the relevant fields have to be put in front of the model.
+    """
+    def __init__(self, docs: List[FieldDoc], k1: float = BM25_K1, b: float = BM25_B):
+        self.docs = docs
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._lengths: List[int] = []
+        for doc_id, doc in enumerate(docs):
+            terms = tokenize(doc.field_path) * PATH_WEIGHT + tokenize(doc.description)
+            self._lengths.append(len(terms))
+            for term, frequency in Counter(terms).items():
+                self._postings.setdefault(term, []).append((doc_id, frequency))
+        self._average_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+
+    @classmethod
+    def from_tables(cls, tables: Iterable[TableInfo]) -> "SchemaIndex":
+        return cls([doc for table in tables for doc in table_fields(table)])
+
+    def _idf(self, term: str) -> float:
+        matches = len(self._postings.get(term, []))
+        return math.log(1 + (len(self.docs) - matches + 0.5) / (matches + 0.5))
+
+    def search(self, question: str, limit: int = 25, table: Optional[str] = None) -> List[Tuple[float, FieldDoc]]:
+        """
+        Ranks the fields against a question.
+
+        Args:
+            question: Free text, e.g. the user's question or the concepts it mentions.
+            limit: The maximum number of fields to return.
+            table: Optional full or short table name to restrict the search to.
+        Returns:
+            (score, field) pairs, best match first.
+        """
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(question)):
+            idf = self._idf(term)
+            for doc_id, frequency in self._postings.get(term, []):
+                length_norm = 1 - self.b + self.b * self._lengths[doc_id] / self._average_length
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (
+                    frequency + self.k1 * length_norm)
+
+        if table:
+            table = table.strip("`")
+            scores = {doc_id: score for doc_id, score in scores.items()
+                      if self.docs[doc_id].table == table or self.docs[doc_id].table.endswith(f".{table}")}
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(score, self.docs[doc_id]) for doc_id, score in best]
+
+
+_schema_index: Optional[SchemaIndex] = None
+_schema_index_version: Optional[int] = None
+_schema_index_lock = threading.Lock()
+
+
+def get_schema_index() -> SchemaIndex:
+    """Returns the index over every table in the schema catalog, rebuilding it when the catalog was reloaded."""
+    global _schema_index, _schema_index_version
+    version, tables = get_schema_catalog().versioned_tables()
+    with _schema_index_lock:
+        if _schema_index is None or version != _schema_index_version:
+            _schema_index = SchemaIndex.from_tables(tables)
+            _schema_index_version = version
+        return _schema_index
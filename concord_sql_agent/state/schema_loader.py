@@ -1,40 +1,211 @@
 import json
+import os
+import re
+import tempfile
+import threading
+import time
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel
 
 from ..utils.client import get_bq_client
 
+SCHEMA_CACHE_DIR = os.environ.get("CONCORD_SCHEMA_CACHE_DIR",
+                                  os.path.join(os.path.expanduser("~"), ".cache", "vexel", "schemas"))
+
+# How long a cached schema is served before it is checked against the table's `modified` time
+SCHEMA_REFRESH_SECONDS = int(os.environ.get("CONCORD_SCHEMA_REFRESH_SECONDS", "3600"))
+# How long after a failed fetch a table's schema is not fetched again
+SCHEMA_RETRY_SECONDS = int(os.environ.get("CONCORD_SCHEMA_RETRY_SECONDS", "60"))
+
 
 class SchemaMeta(BaseModel):
     display_name: Optional[str]
     full_name: str
     created: datetime
     updated: datetime
-    description: str
+    description: Optional[str]
     schema_json: list = []
 
-def get_bigquery_table_schema(table_ref: str) -> str:
-    """Retrieves the schema of a BigQuery table as a dictionary."""
+
+class CachedSchema(BaseModel):
+    fetched: float
+    schema_meta: SchemaMeta
+
+
+def _fetch_schema(table_ref: str) -> SchemaMeta:
     table = get_bq_client().get_table(table_ref)
     schema_map = [field.to_api_repr() for field in table.schema]
-    print(schema_map)
     return SchemaMeta(display_name=table.friendly_name,
                       full_name=table_ref,
                       created=table.created,
                       updated=table.modified,
                       description=table.description,
-                      schema_json=schema_map).model_dump_json()
+                      schema_json=schema_map)
+
+
+def get_bigquery_table_schema(table_ref: str) -> str:
+    """Retrieves the schema of a BigQuery table as a dictionary."""
+    return _fetch_schema(table_ref).model_dump_json()
+
+
+def get_table_modified(table_ref: str) -> datetime:
+    """Retrieves the last modified time of a BigQuery table."""
+    return get_bq_client().get_table(table_ref).modified
+
+
+class SchemaCache:
+    """
+    Table schemas loaded on first use and kept in memory and on disk.
+
+    A schema found on disk is served immediately, even when it is older than the refresh
+    interval; in that case a background thread re-reads the table and replaces the
+    cached copy only if the table's `modified` time changed. Only a table that was never
+    cached is fetched on the caller's thread, so a warm start makes no blocking metadata
+    call and works offline. A table whose fetch failed is not fetched again for
+    `retry_seconds`, so an unreachable table does not cost every caller a timeout.
+    """
+    def __init__(self, cache_dir: Optional[str] = SCHEMA_CACHE_DIR,
+                 refresh_seconds: int = SCHEMA_REFRESH_SECONDS, retry_seconds: int = SCHEMA_RETRY_SECONDS):
+        self.cache_dir = cache_dir
+        self.refresh_seconds = refresh_seconds
+        self.retry_seconds = retry_seconds
+        self.lock = threading.Lock()
+        self._schemas: Dict[str, CachedSchema] = {}
+        self._refreshing: set[str] = set()
+        self._failed: Dict[str, float] = {}
+
+    def get(self, table_ref: str) -> Optional[SchemaMeta]:
+        """
+        Returns the schema of a table, or None if it is not cached and cannot be fetched.
+
+        Args:
+            table_ref: The fully qualified table name, e.g. project.dataset.table.
+        """
+        cached = self._schemas.get(table_ref) or self._read(table_ref)
+        if cached is None:
+            if self._backing_off(table_ref):
+                return None
+            try:
+                return self._store(table_ref, _fetch_schema(table_ref)).schema_meta
+            except Exception as e:
+                print(f"Unable to load the schema of {table_ref}: {e}")
+                self._fetch_failed(table_ref)
+                return None
+
+        if time.time() - cached.fetched > self.refresh_seconds and not self._backing_off(table_ref):
+            self._refresh_in_background(table_ref, cached)
+        return cached.schema_meta
+
+    def _backing_off(self, table_ref: str) -> bool:
+        failed = self._failed.get(table_ref)
+        return failed is not None and time.time() - failed < self.retry_seconds
+
+    def _fetch_failed(self, table_ref: str) -> None:
+        with self.lock:
+            self._failed[table_ref] = time.time()
+
+    def _path(self, table_ref: str) -> str:
+        return os.path.join(self.cache_dir, re.sub(r"[^\w.\-]", "_", table_ref) + ".json")
+
+    def _read(self, table_ref: str) -> Optional[CachedSchema]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(table_ref), "r", encoding="utf-8") as f:
+                cached = CachedSchema.model_validate_json(f.read())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Ignoring unreadable schema cache for {table_ref}: {e}")
+            return None
+        with self.lock:
+            self._schemas[table_ref] = cached
+        return cached
+
+    def _store(self, table_ref: str, schema_meta: SchemaMeta) -> CachedSchema:
+        cached = CachedSchema(fetched=time.time(), schema_meta=schema_meta)
+        with self.lock:
+            self._schemas[table_ref] = cached
+            self._failed.pop(table_ref, None)
+        if self.cache_dir:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(cached.model_dump_json())
+                os.replace(tmp_path, self._path(table_ref))
+            except OSError as e:
+                print(f"Unable to write the schema cache for {table_ref}: {e}")
+        return cached
+
+    def _refresh_in_background(self, table_ref: str, cached: CachedSchema) -> None:
+        with self.lock:
+            if table_ref in self._refreshing:
+                return
+            self._refreshing.add(table_ref)
+
+        def refresh():
+            try:
+                latest = _fetch_schema(table_ref)
+                if latest.updated != cached.schema_meta.updated:
+                    print(f"Schema of {table_ref} was modified, reloading.")
+                    self._store(table_ref, latest)
+                else:
+                    # Unchanged, the copy on disk is kept and the refresh interval restarts in memory
+                    with self.lock:
+                        self._schemas[table_ref] = cached.model_copy(update={"fetched": time.time()})
+                        self._failed.pop(table_ref, None)
+            except Exception as e:
+                # The cached copy stays in use, a caller retries after the retry interval
+                print(f"Background schema refresh of {table_ref} failed: {e}")
+                self._fetch_failed(table_ref)
+            finally:
+                with self.lock:
+                    self._refreshing.discard(table_ref)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
 
 schema_names = [
     "concord-prod.service_cloudbi_reporting.revenue_daily",
     "concord-prod.service_cloudbi_reporting.revenue_project_sku_daily"
 ]
 
-all_schemas: list[str] = []
+_schema_cache: Optional[SchemaCache] = None
+_schema_cache_lock = threading.Lock()
+
+
+def get_schema_cache() -> SchemaCache:
+    """Returns the process wide schema cache, creating it on first use."""
+    global _schema_cache
+    if _schema_cache is None:
+        with _schema_cache_lock:
+            if _schema_cache is None:
+                _schema_cache = SchemaCache()
+    return _schema_cache
+
+
+def get_all_schema_metas() -> List[SchemaMeta]:
+    """Returns the schema of every known table that could be loaded."""
+    cache = get_schema_cache()
+    schemas = [cache.get(schema_name) for schema_name in schema_names]
+    return [schema for schema in schemas if schema is not None]
+
+
+def get_all_schemas() -> List[str]:
+    """Returns the JSON schema of every known table that could be loaded."""
+    return [schema.model_dump_json() for schema in get_all_schema_metas()]
+
+
+def get_schema_json_array() -> str:
+    """Returns the schemas of the known tables as a JSON array, loading them on first use."""
+    return json.dumps(get_all_schemas())
 
-for schema_name in schema_names:
-    all_schemas.append(get_bigquery_table_schema(schema_name))
 
-schema_json_array = json.dumps(all_schemas)
\ No newline at end of file
+def __getattr__(name: str):
+    # `schema_json_array` used to be computed at import time, it is now loaded on first access
+    if name == "schema_json_array":
+        return get_schema_json_array()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
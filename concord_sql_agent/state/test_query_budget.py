@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+from concord_sql_agent.state.query_budget import GIB, QueryBudget, QueryBudgetExceededError
+
+
+def budget(estimate: int = GIB, max_bytes_per_user: int = 5 * GIB) -> QueryBudget:
+    return QueryBudget(max_bytes_per_query=4 * GIB, warn_bytes_per_query=2 * GIB,
+                       max_bytes_per_user=max_bytes_per_user, estimator=lambda query, query_parameters: estimate)
+
+
+def test_check_reserves_and_charge_settles_the_actual_bytes():
+    query_budget = budget(estimate=3 * GIB)
+    decision = query_budget.check("SELECT 1", "alice")
+    assert decision.reserved_bytes == 3 * GIB
+    assert decision.warning
+    assert query_budget.spent("alice") == 3 * GIB
+
+    query_budget.charge("alice", GIB, decision.reserved_bytes)
+    assert query_budget.spent("alice") == GIB
+
+
+def test_failed_queries_release_their_reservation():
+    query_budget = budget()
+    decision = query_budget.check("SELECT 1", "alice")
+    query_budget.charge("alice", 0, decision.reserved_bytes)
+    assert query_budget.spent("alice") == 0
+
+
+def test_concurrent_checks_cannot_overrun_the_daily_budget():
+    query_budget = budget()
+    passed, rejected = [], []
+    barrier = threading.Barrier(12)
+
+    def worker():
+        barrier.wait()
+        try:
+            passed.append(query_budget.check("SELECT 1", "alice"))
+        except QueryBudgetExceededError:
+            rejected.append(True)
+
+    threads = [threading.Thread(target=worker) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert (len(passed), len(rejected)) == (5, 7)
+    assert query_budget.spent("alice") == 5 * GIB
+    assert query_budget.check("SELECT 1", "bob").reserved_bytes == GIB
+
+
+def test_per_query_limit_and_anonymous_users_reserve_nothing():
+    with pytest.raises(QueryBudgetExceededError, match="per-query limit"):
+        budget(estimate=5 * GIB).check("SELECT 1", "alice")
+
+    query_budget = budget()
+    decision = query_budget.check("SELECT 1")
+    assert decision.reserved_bytes == 0
+    query_budget.charge(None, GIB, decision.reserved_bytes)
+    assert query_budget.spent("alice") == 0
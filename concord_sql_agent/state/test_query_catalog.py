@@ -0,0 +1,42 @@
+import time
+from types import SimpleNamespace
+
+from concord_sql_agent.state.query_catalog import QueryCatalog
+
+
+class SilentCollection:
+    """A collection whose listener delivers its first snapshot only when told to."""
+    id = "queries"
+
+    def __init__(self):
+        self.callback = None
+
+    def on_snapshot(self, callback):
+        self.callback = callback
+        return SimpleNamespace(is_active=True, unsubscribe=lambda: None)
+
+    def deliver(self, *records):
+        docs = [SimpleNamespace(id=record["id"], to_dict=lambda record=record: dict(record)) for record in records]
+        self.callback(docs, [], None)
+
+
+def test_missing_snapshot_is_not_waited_for_again_during_the_cooldown():
+    collection = SilentCollection()
+    catalog = QueryCatalog(collection, cooldown_seconds=0.5)
+
+    started = time.monotonic()
+    assert catalog.start(timeout=0.2) is False
+    assert time.monotonic() - started >= 0.2
+
+    started = time.monotonic()
+    assert catalog.list_for("alice") is None
+    assert catalog.find_public("weekly") is None
+    assert time.monotonic() - started < 0.1
+
+    time.sleep(0.5)
+    started = time.monotonic()
+    assert catalog.start(timeout=0.2) is False
+    assert time.monotonic() - started >= 0.2
+
+    collection.deliver({"id": "1", "name": "weekly", "creator": "alice", "is_public": False})
+    assert [query["name"] for query in catalog.list_for("alice")] == ["weekly"]
@@ -0,0 +1,57 @@
+import os
+import time
+
+import pandas as pd
+
+from concord_sql_agent.state import result_cache
+from concord_sql_agent.state.result_cache import ResultCache
+
+QUERY = "SELECT * FROM `concord-prod.service_cloudbi_reporting.revenue_weekly`"
+TABLE = "concord-prod.service_cloudbi_reporting.revenue_weekly"
+FRAME = pd.DataFrame({"revenue": [1.0, 2.0]})
+
+
+class Tables:
+    def __init__(self):
+        self.modified = {TABLE: "2025-01-06T00:00:00+00:00"}
+
+    def lookup(self, table_ref):
+        return pd.Timestamp(self.modified[table_ref]).to_pydatetime()
+
+
+def cache(tmp_path, tables, **kwargs) -> ResultCache:
+    return ResultCache(cache_dir=str(tmp_path), modified_lookup=tables.lookup, **kwargs)
+
+
+def test_memory_expiry_falls_back_to_the_disk_tier(tmp_path):
+    tables = Tables()
+    results = cache(tmp_path, tables, memory_ttl_seconds=0)
+    results.put(QUERY, FRAME)
+    time.sleep(0.01)
+
+    assert results.get(QUERY).equals(FRAME)
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_disk_tier_is_shared_and_expires(tmp_path):
+    tables = Tables()
+    cache(tmp_path, tables).put(QUERY, FRAME, {"account_name": "a"})
+
+    assert cache(tmp_path, tables).get(QUERY, {"account_name": "a"}).equals(FRAME)
+    assert cache(tmp_path, tables).get(QUERY, {"account_name": "b"}) is None
+    expired = cache(tmp_path, tables, disk_ttl_seconds=0)
+    expired.put(QUERY, FRAME)
+    assert cache(tmp_path, tables).get(QUERY) is None
+
+
+def test_table_modified_after_the_snapshot_invalidates_both_tiers(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "MODIFIED_CHECK_SECONDS", 0)
+    tables = Tables()
+    results = cache(tmp_path, tables)
+    versions = results.table_versions(QUERY)
+    # The table is written while the query runs
+    tables.modified[TABLE] = "2025-01-07T00:00:00+00:00"
+    results.put(QUERY, FRAME, table_modified=versions)
+
+    assert results.get(QUERY) is None
+    assert os.listdir(tmp_path) == []
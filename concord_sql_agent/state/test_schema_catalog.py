@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from concord_sql_agent.state.schema_catalog import SchemaCatalog, build_tables
+
+DATASET = "concord-prod.reporting"
+
+
+def row(table: str, field_path, data_type: str = "STRING", description: str = None, **overrides) -> dict:
+    values = {"table_name": table, "table_type": "BASE TABLE", "table_description": None,
+              "column_name": field_path.split(".")[0] if field_path else None, "field_path": field_path,
+              "data_type": data_type if field_path else None, "description": description,
+              "is_partitioning_column": False, "clustering_ordinal_position": None}
+    values.update(overrides)
+    return values
+
+
+def test_build_tables_groups_columns_and_nested_field_paths():
+    tables = build_tables(DATASET, [
+        row("sales", "order_date", "DATE", is_partitioning_column=True, table_description='"Daily sales"'),
+        row("sales", "lines", "ARRAY<STRUCT<sku STRING, quantity INT64>>", clustering_ordinal_position=1),
+        row("sales", "lines.sku"),
+        row("sales", "lines.quantity", "INT64", "Units sold"),
+        row("accounts", "account_name"),
+    ])
+
+    sales = tables[f"{DATASET}.sales"]
+    assert (sales.name, sales.description) == ("sales", "Daily sales")
+    assert [column.field_path for column in sales.columns] == ["order_date", "lines", "lines.sku", "lines.quantity"]
+    assert sales.columns[0].is_partitioning_column
+    assert sales.columns[1].clustering_ordinal_position == 1
+    assert sales.columns[3].description == "Units sold"
+    assert [column.field_path for column in tables[f"{DATASET}.accounts"].columns] == ["account_name"]
+
+
+def test_build_tables_keeps_tables_without_columns():
+    tables = build_tables(DATASET, [row("empty_view", None, table_type="VIEW")])
+    assert tables[f"{DATASET}.empty_view"].table_type == "VIEW"
+    assert tables[f"{DATASET}.empty_view"].columns == []
+
+
+def test_concurrent_first_lookups_share_one_load():
+    loads = []
+
+    def loader(dataset):
+        loads.append(dataset)
+        time.sleep(0.1)
+        return build_tables(dataset, [row("sales", "revenue", "NUMERIC")])
+
+    catalog = SchemaCatalog([DATASET], loader=loader)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(catalog.get_table("sales"))) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loads == [DATASET]
+    assert len(results) == 10 and all(table.full_name == f"{DATASET}.sales" for table in results)
+
+
+def test_failed_load_is_raised_and_retried():
+    attempts = []
+
+    def loader(dataset):
+        attempts.append(dataset)
+        if len(attempts) == 1:
+            raise RuntimeError("dataset not found")
+        return build_tables(dataset, [row("sales", "revenue")])
+
+    catalog = SchemaCatalog([DATASET], loader=loader)
+    with pytest.raises(RuntimeError):
+        catalog.tables()
+    assert [table.name for table in catalog.tables()] == ["sales"]
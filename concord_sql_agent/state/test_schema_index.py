@@ -0,0 +1,60 @@
+from concord_sql_agent.state import schema_index
+from concord_sql_agent.state.schema_catalog import SchemaCatalog, build_tables
+from concord_sql_agent.state.schema_index import SchemaIndex, get_schema_index, tokenize
+
+DATASET = "concord-prod.reporting"
+
+
+def row(table: str, field_path: str, data_type: str = "STRING", description: str = None) -> dict:
+    return {"table_name": table, "table_type": "BASE TABLE", "table_description": None,
+            "column_name": field_path.split(".")[0], "field_path": field_path, "data_type": data_type,
+            "description": description, "is_partitioning_column": False, "clustering_ordinal_position": None}
+
+
+ROWS = [
+    row("sales", "account_name", description="Name of the customer account"),
+    row("sales", "gtm_product_level_3", description="Go to market product"),
+    row("sales", "revenue", "NUMERIC", "Recognized revenue in USD"),
+    row("sales", "lines", "ARRAY<STRUCT<sku STRING, quantity INT64>>"),
+    row("sales", "lines.quantity", "INT64", "Units sold"),
+    row("accounts", "account_name", description="Name of the account"),
+    row("accounts", "industry", description="Industry vertical"),
+]
+
+
+def test_tokenize_splits_identifiers_and_drops_stop_words_and_plurals():
+    assert tokenize("gtm_product_level_3") == ["gtm", "product", "level", "3"]
+    assert tokenize("What are the GTM products?") == ["gtm", "product"]
+    assert tokenize("accountName, HTTPCode and class") == ["account", "name", "http", "code", "class"]
+
+
+def test_search_ranks_matching_fields_first():
+    index = SchemaIndex.from_tables(build_tables(DATASET, ROWS).values())
+
+    best = index.search("revenue by gtm product", limit=2)
+    assert [field.field_path for _, field in best] == ["gtm_product_level_3", "revenue"]
+    assert best[0][0] >= best[1][0]
+
+    units = index.search("units sold per line")
+    assert units[0][1].field_path == "lines.quantity"
+    assert [field.mode for _, field in index.search("lines") if field.field_path == "lines"] == ["REPEATED"]
+
+    in_accounts = index.search("account name", table="accounts")
+    assert [field.table for _, field in in_accounts] == [f"{DATASET}.accounts"]
+
+
+def test_index_is_rebuilt_when_the_catalog_reloads(monkeypatch):
+    rows = list(ROWS)
+    catalog = SchemaCatalog([DATASET], loader=lambda dataset: build_tables(dataset, rows))
+    monkeypatch.setattr(schema_index, "get_schema_catalog", lambda: catalog)
+    monkeypatch.setattr(schema_index, "_schema_index", None)
+
+    index = get_schema_index()
+    assert get_schema_index() is index
+    assert not index.search("churn risk")
+
+    rows.append(row("accounts", "churn_risk", "FLOAT64", "Predicted churn risk"))
+    catalog.refresh(DATASET)
+    rebuilt = get_schema_index()
+    assert rebuilt is not index
+    assert rebuilt.search("churn risk")[0][1].field_path == "churn_risk"
@@ -0,0 +1,97 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from concord_sql_agent.state import schema_loader
+from concord_sql_agent.state.schema_loader import CachedSchema, SchemaCache, SchemaMeta
+
+TABLE = "concord-prod.reporting.sales"
+MODIFIED = datetime(2025, 8, 1, tzinfo=timezone.utc)
+
+
+def schema_meta(updated: datetime = MODIFIED) -> SchemaMeta:
+    return SchemaMeta(display_name="Sales", full_name=TABLE, created=MODIFIED, updated=updated,
+                      description=None, schema_json=[{"name": "revenue", "type": "NUMERIC"}])
+
+
+class FakeFetch:
+    """Stands in for the BigQuery metadata call, failing while `error` is set."""
+    def __init__(self, updated: datetime = MODIFIED):
+        self.updated = updated
+        self.error = None
+        self.calls = []
+        self.done = threading.Event()
+
+    def __call__(self, table_ref: str) -> SchemaMeta:
+        self.calls.append(table_ref)
+        try:
+            if self.error:
+                raise self.error
+            return schema_meta(self.updated)
+        finally:
+            self.done.set()
+
+
+@pytest.fixture
+def fetch(monkeypatch):
+    fetch = FakeFetch()
+    monkeypatch.setattr(schema_loader, "_fetch_schema", fetch)
+    return fetch
+
+
+def write_cache(cache_dir, fetched: float, updated: datetime = MODIFIED) -> None:
+    cache = SchemaCache(cache_dir=str(cache_dir))
+    with open(cache._path(TABLE), "w", encoding="utf-8") as f:
+        f.write(CachedSchema(fetched=fetched, schema_meta=schema_meta(updated)).model_dump_json())
+
+
+def wait_for_refresh(cache: SchemaCache) -> None:
+    deadline = time.monotonic() + 5
+    while cache._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_warm_start_serves_the_disk_cache_without_fetching(tmp_path, fetch):
+    write_cache(tmp_path, fetched=time.time())
+    assert SchemaCache(cache_dir=str(tmp_path)).get(TABLE).full_name == TABLE
+    assert fetch.calls == []
+
+
+def test_stale_schema_is_served_and_refreshed_in_the_background(tmp_path, fetch):
+    write_cache(tmp_path, fetched=0)
+    fetch.updated = datetime(2025, 8, 2, tzinfo=timezone.utc)
+    cache = SchemaCache(cache_dir=str(tmp_path))
+
+    assert cache.get(TABLE).updated == MODIFIED
+    assert fetch.done.wait(5)
+    wait_for_refresh(cache)
+    assert cache.get(TABLE).updated == fetch.updated
+    assert SchemaCache(cache_dir=str(tmp_path)).get(TABLE).updated == fetch.updated
+    assert fetch.calls == [TABLE]
+
+
+def test_unchanged_schema_restarts_the_refresh_interval_without_rewriting(tmp_path, fetch):
+    write_cache(tmp_path, fetched=0)
+    cache = SchemaCache(cache_dir=str(tmp_path))
+    cache.get(TABLE)
+    assert fetch.done.wait(5)
+    wait_for_refresh(cache)
+
+    cache.get(TABLE)
+    assert fetch.calls == [TABLE]
+    assert SchemaCache(cache_dir=str(tmp_path))._read(TABLE).fetched == 0
+
+
+def test_cold_failure_is_not_retried_until_the_retry_interval(tmp_path, fetch):
+    fetch.error = RuntimeError("permission denied")
+    cache = SchemaCache(cache_dir=str(tmp_path), retry_seconds=60)
+    assert cache.get(TABLE) is None
+    assert cache.get(TABLE) is None
+    assert fetch.calls == [TABLE]
+
+    fetch.error = None
+    cache._failed[TABLE] -= 61
+    assert cache.get(TABLE).full_name == TABLE
+    assert fetch.calls == [TABLE, TABLE]
@@ -1,3 +1,8 @@
 from . import named_queries
 from . import query_execution_tool
+from . import query_stream_tool
 from . import query_crud_tool
+from . import account_bundle_tool
+from . import named_query_tool
+from . import schema_catalog_tool
+from . import schema_search_tool
@@ -0,0 +1,69 @@
+import asyncio
+from typing import Any, Dict, List, Literal, Optional
+
+from google.adk.tools import ToolContext
+from pydantic import BaseModel
+
+from .named_query_registry import account_parameters, get_named_query
+from .query_execution_tool import (fetch_results_async, format_results, query_error_message, session_id_from_context,
+                                   user_id_from_context)
+
+# The named query behind each section of the briefing
+BUNDLE_QUERIES = {"Forecast": "forecast_by_account_name",
+                  "Monthly Actual": "monthly_actual",
+                  "Average Daily Run Rate": "average_daily_run_rate",
+                  "Committed Workloads": "committed_workloads"}
+
+
+class NamedQueryResult(BaseModel):
+    name: str
+    status: Literal["success", "error"]
+    result: str
+    row_count: int = 0
+
+
+class AccountBundleResult(BaseModel):
+    account_name: str
+    results: List[NamedQueryResult]
+
+
+def _error(name: str, e: Exception) -> NamedQueryResult:
+    return NamedQueryResult(name=name, status="error", result=query_error_message(e))
+
+
+async def _run_named_query(name: str, query_name: str, parameters: Dict[str, Any], user_id: Optional[str],
+                           session_id: Optional[str]) -> NamedQueryResult:
+    try:
+        query = get_named_query(query_name)
+        df, warning = await fetch_results_async(query.normalized_sql, user_id, query.bind(**parameters), session_id)
+    except Exception as e:
+        return _error(name, e)
+    return NamedQueryResult(name=name, status="success", result=format_results(df, warning), row_count=len(df))
+
+
+async def execute_account_bundle(account_name: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                                 tool_context: ToolContext = None) -> AccountBundleResult:
+    """Runs every named query for a sales account at once and returns all of their results.
+
+    Use this for a full account briefing instead of running the forecast, monthly actual,
+    average daily run rate and committed workloads queries one by one.
+
+    Args:
+        account_name: The name of the account to build the briefing for.
+        start_date: Optional first day of the reporting period as YYYY-MM-DD, defaults to January 1st.
+        end_date: Optional last day of the reporting period as YYYY-MM-DD, defaults to today.
+        tool_context: The context provided by the ADK, used for user info.
+
+    Returns:
+        The markdown formatted result, or the error, of each named query.
+    """
+    try:
+        parameters = account_parameters(account_name, start_date, end_date)
+    except ValueError as e:
+        return AccountBundleResult(account_name=account_name, results=[_error(name, e) for name in BUNDLE_QUERIES])
+
+    # The queries run concurrently, each served from the result cache when it ran recently
+    user_id, session_id = user_id_from_context(tool_context), session_id_from_context(tool_context)
+    results = await asyncio.gather(*(_run_named_query(name, query_name, parameters, user_id, session_id)
+                                     for name, query_name in BUNDLE_QUERIES.items()))
+    return AccountBundleResult(account_name=account_name, results=list(results))
@@ -1,41 +1,56 @@
 """
 Thq queries in this file were all created by the Query Tool
+
+Every named query reads `revenue_weekly` exactly once, through the account × month × product
+rollup below, and derives its result from the rollup's rows.
+
+The queries are parameterized with @account_name (STRING) and the reporting period @start_date and
+@end_date (DATE), see named_query_registry.py for their declarations.
 """
 
-qry_average_daily_run_rate = """
-WITH YTD_Totals AS (
-    SELECT customer_details.account_name, SUM(usd_revenue_metrics.sales_revenue.sales_revenue) AS total_revenue_ytd
-    FROM `concord-prod.service_cloudbi_reporting.revenue_weekly`
-    WHERE partition_date BETWEEN DATE_TRUNC(CURRENT_DATE(), YEAR) AND CURRENT_DATE() AND customer_details.account_name = '{account_name}'
-    GROUP BY customer_details.account_name)
-SELECT account_name, total_revenue_ytd, DATE_DIFF(CURRENT_DATE(), DATE_TRUNC(CURRENT_DATE(), YEAR), DAY) + 1 AS days_in_ytd_period, SAFE_DIVIDE(total_revenue_ytd, DATE_DIFF(CURRENT_DATE(), DATE_TRUNC(CURRENT_DATE(), YEAR), DAY) + 1) AS daily_run_rate_ytd
+qry_account_month_product_rollup = """
+SELECT
+    invoice_month_start AS revenue_month,
+    product_details.gtm_product_hierarchy.gtm_product_level_3 AS gtm_product_category,
+    SUM(usd_revenue_metrics.gross_revenue.gross_revenue) AS gross_revenue,
+    SUM(usd_revenue_metrics.sales_revenue.sales_revenue) AS sales_revenue,
+    SUM(IFNULL(usd_revenue_metrics.invoice_revenue.components.sales_discounts.cud, 0)) AS cud,
+    SUM(IFNULL(usd_revenue_metrics.invoice_revenue.components.sales_discounts.spend_based_commitment_discount, 0)) AS spend_based_commitment_discount,
+    COUNTIF(usd_revenue_metrics.invoice_revenue.components.sales_discounts.cud IS NOT NULL OR usd_revenue_metrics.invoice_revenue.components.sales_discounts.spend_based_commitment_discount IS NOT NULL) AS commitment_rows
+FROM `concord-prod.service_cloudbi_reporting.revenue_weekly`
+WHERE partition_date BETWEEN @start_date AND @end_date AND customer_details.account_name = @account_name
+GROUP BY 1, 2"""
+
+_rollup_cte = f"""
+    AccountMonthProduct AS ({qry_account_month_product_rollup})"""
+
+qry_average_daily_run_rate = f"""
+WITH{_rollup_cte}
+SELECT @account_name AS account_name, SUM(sales_revenue) AS total_revenue_ytd, DATE_DIFF(@end_date, @start_date, DAY) + 1 AS days_in_ytd_period, SAFE_DIVIDE(SUM(sales_revenue), DATE_DIFF(@end_date, @start_date, DAY) + 1) AS daily_run_rate_ytd
 FROM
-    YTD_Totals;"""
+    AccountMonthProduct
+HAVING COUNT(*) > 0;"""
 
-qry_monthly_actual = """
+qry_monthly_actual = f"""
+WITH{_rollup_cte}
 SELECT
-   invoice_month_start AS revenue_month, SUM(usd_revenue_metrics.sales_revenue.sales_revenue) AS total_sales_revenue
-FROM `concord-prod.service_cloudbi_reporting.revenue_weekly`
-WHERE partition_date BETWEEN DATE_TRUNC(CURRENT_DATE(), YEAR) AND CURRENT_DATE()
+   revenue_month, SUM(sales_revenue) AS total_sales_revenue
+FROM AccountMonthProduct
 GROUP BY revenue_month
 ORDER BY revenue_month ASC;"""
 
-qry_committed_workloads = """
-WITH
+qry_committed_workloads = f"""
+WITH{_rollup_cte},
+
     MonthlyUsageByProduct AS (
-        SELECT
-            invoice_month_start AS revenue_month, product_details.gtm_product_hierarchy.gtm_product_level_3 AS gtm_product_category, SUM(usd_revenue_metrics.gross_revenue.gross_revenue) AS total_gross_revenue
-        FROM `concord-prod.service_cloudbi_reporting.revenue_weekly`
-        WHERE partition_date BETWEEN DATE_TRUNC(CURRENT_DATE(), YEAR) AND CURRENT_DATE() AND customer_details.account_name = '{account_name}'
-        GROUP BY 1, 2),
+        SELECT revenue_month, gtm_product_category, gross_revenue AS total_gross_revenue
+        FROM AccountMonthProduct),
 
     MonthlyCommitmentRevenue AS (
-        SELECT invoice_month_start AS revenue_month,
-               SUM(IFNULL(usd_revenue_metrics.invoice_revenue.components.sales_discounts.cud, 0) + IFNULL(usd_revenue_metrics.invoice_revenue.components.sales_discounts.spend_based_commitment_discount, 0)) AS total_committed_revenue
-        FROM `concord-prod.service_cloudbi_reporting.revenue_weekly`
-        WHERE partition_date BETWEEN DATE_TRUNC(CURRENT_DATE(), YEAR) AND CURRENT_DATE() AND customer_details.account_name = '{account_name}'
-          AND (usd_revenue_metrics.invoice_revenue.components.sales_discounts.cud IS NOT NULL OR usd_revenue_metrics.invoice_revenue.components.sales_discounts.spend_based_commitment_discount IS NOT NULL)
+        SELECT revenue_month, SUM(cud + spend_based_commitment_discount) AS total_committed_revenue
+        FROM AccountMonthProduct
         GROUP BY 1
+        HAVING SUM(commitment_rows) > 0
     )
 
 SELECT usage.revenue_month, usage.gtm_product_category, usage.total_gross_revenue,
@@ -51,22 +66,17 @@ ORDER BY
     usage.revenue_month ASC,
     allocated_committed_revenue DESC;"""
 
-qry_forecast = """
-WITH
+qry_forecast = f"""
+WITH{_rollup_cte},
+
     DailyRunRate AS (
         SELECT
-            SAFE_DIVIDE(SUM(usd_revenue_metrics.sales_revenue.sales_revenue), DATE_DIFF(CURRENT_DATE(), DATE_TRUNC(CURRENT_DATE(), YEAR), DAY) + 1) AS drr
-        FROM `concord-prod.service_cloudbi_reporting.revenue_weekly`
-        WHERE
-            partition_date BETWEEN DATE_TRUNC(CURRENT_DATE(), YEAR) AND CURRENT_DATE() AND customer_details.account_name = '{account_name}'
-          AND customer_details.account_name = '{account_name}'),
+            SAFE_DIVIDE(SUM(sales_revenue), DATE_DIFF(@end_date, @start_date, DAY) + 1) AS drr
+        FROM AccountMonthProduct),
 
     MonthlyActuals AS (
-        SELECT invoice_month_start AS revenue_month, SUM(usd_revenue_metrics.sales_revenue.sales_revenue) AS total_actuals
-        FROM `concord-prod.service_cloudbi_reporting.revenue_weekly`
-        WHERE
-            partition_date BETWEEN DATE_TRUNC(CURRENT_DATE(), YEAR) AND CURRENT_DATE() AND customer_details.account_name = '{account_name}'
-          AND customer_details.account_name = '{account_name}'
+        SELECT revenue_month, SUM(sales_revenue) AS total_actuals
+        FROM AccountMonthProduct
         GROUP BY 1),
 
     MonthlyCommittedWorkloads AS (
@@ -74,23 +84,17 @@ WITH
             revenue_month,
             SUM(allocated_committed_revenue) AS total_committed
         FROM (
-                 WITH MonthlyUsageByProduct AS (
-                     SELECT invoice_month_start AS revenue_month, product_details.gtm_product_hierarchy.gtm_product_level_3 AS gtm_product_category, SUM(usd_revenue_metrics.gross_revenue.gross_revenue) AS total_gross_revenue
-                     FROM `concord-prod.service_cloudbi_reporting.revenue_weekly`
-                     WHERE partition_date BETWEEN DATE_TRUNC(CURRENT_DATE(), YEAR) AND CURRENT_DATE() AND customer_details.account_name = '{account_name}' GROUP BY 1, 2),
-
-                      MonthlyCommitmentRevenue AS (
-                          SELECT invoice_month_start AS revenue_month, SUM(IFNULL(usd_revenue_metrics.invoice_revenue.components.sales_discounts.cud, 0) + IFNULL(usd_revenue_metrics.invoice_revenue.components.sales_discounts.spend_based_commitment_discount, 0)) AS total_committed_revenue
-                          FROM `concord-prod.service_cloudbi_reporting.revenue_weekly`
-                          WHERE partition_date BETWEEN DATE_TRUNC(CURRENT_DATE(), YEAR) AND CURRENT_DATE() AND customer_details.account_name = '{account_name}'
+                 WITH MonthlyCommitmentRevenue AS (
+                          SELECT revenue_month, SUM(cud + spend_based_commitment_discount) AS total_committed_revenue
+                          FROM AccountMonthProduct
                           GROUP BY 1)
 
-                 SELECT  usage.revenue_month, SAFE_DIVIDE(usage.total_gross_revenue, SUM(usage.total_gross_revenue) OVER (PARTITION BY usage.revenue_month)) * commitments.total_committed_revenue AS allocated_committed_revenue
-                 FROM MonthlyUsageByProduct AS usage JOIN MonthlyCommitmentRevenue AS commitments ON usage.revenue_month = commitments.revenue_month
+                 SELECT  usage.revenue_month, SAFE_DIVIDE(usage.gross_revenue, SUM(usage.gross_revenue) OVER (PARTITION BY usage.revenue_month)) * commitments.total_committed_revenue AS allocated_committed_revenue
+                 FROM AccountMonthProduct AS usage JOIN MonthlyCommitmentRevenue AS commitments ON usage.revenue_month = commitments.revenue_month
                  WHERE usage.gtm_product_category IS NOT NULL)
         GROUP BY 1),
 
-    AllMonthsInYear AS (SELECT month_start FROM UNNEST(GENERATE_DATE_ARRAY(DATE_TRUNC(CURRENT_DATE(), YEAR), DATE_ADD(DATE_TRUNC(CURRENT_DATE(), YEAR), INTERVAL 11 MONTH), INTERVAL 1 MONTH)) AS month_start),
+    AllMonthsInYear AS (SELECT month_start FROM UNNEST(GENERATE_DATE_ARRAY(DATE_TRUNC(@start_date, YEAR), DATE_ADD(DATE_TRUNC(@start_date, YEAR), INTERVAL 11 MONTH), INTERVAL 1 MONTH)) AS month_start),
 
     CombinedData AS (
         SELECT
@@ -107,8 +111,8 @@ WITH
     ForecastLogic AS (
         SELECT month_start,
                CASE
-                   WHEN month_start < DATE_TRUNC(CURRENT_DATE(), MONTH) THEN monthly_actuals
-                   WHEN month_start = DATE_TRUNC(CURRENT_DATE(), MONTH) THEN monthly_actuals + (drr * GREATEST(0, DATE_DIFF(LAST_DAY(month_start), CURRENT_DATE(), DAY))) + monthly_committed
+                   WHEN month_start < DATE_TRUNC(@end_date, MONTH) THEN monthly_actuals
+                   WHEN month_start = DATE_TRUNC(@end_date, MONTH) THEN monthly_actuals + (drr * GREATEST(0, DATE_DIFF(LAST_DAY(month_start), @end_date, DAY))) + monthly_committed
                    ELSE (drr * (DATE_DIFF(LAST_DAY(month_start), month_start, DAY) + 1)) + monthly_committed END AS forecast_value
         FROM CombinedData),
     PivotedForecast AS (
@@ -119,6 +123,3 @@ WITH
                  PIVOT (SUM(forecast_value) FOR month_name IN ('January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December')))
 SELECT *, (January + February + March + April + May + June + July + August + September + October + November + December) AS Flat_Total, 10000 AS BCFM_Magic
 FROM PivotedForecast;"""
-
-
-
@@ -0,0 +1,148 @@
+import re
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from google.api_core.exceptions import GoogleAPIError
+from google.cloud import bigquery
+from pydantic import BaseModel
+
+from ..utils.sql_text import masked_sql, normalize_sql, sql_hash
+from .named_queries import qry_average_daily_run_rate, qry_committed_workloads, qry_forecast, qry_monthly_actual
+
+_PARAMETER_RE = re.compile(r"@(\w+)")
+
+# Every named query takes the account and the reporting period
+ACCOUNT_PARAMETERS = {"account_name": "STRING", "start_date": "DATE", "end_date": "DATE"}
+
+
+class NamedQuery(BaseModel):
+    name: str
+    title: str
+    description: str
+    sql: str
+    parameters: Dict[str, str]
+    normalized_sql: str = ""
+    sql_hash: str = ""
+
+    def bind(self, **values: Any) -> List[bigquery.ScalarQueryParameter]:
+        """
+        Builds the typed BigQuery query parameters for this query.
+
+        Raises:
+            ValueError: If a declared parameter is missing or an unknown one is given.
+        """
+        missing = [name for name in self.parameters if values.get(name) is None]
+        unknown = [name for name in values if name not in self.parameters]
+        if missing or unknown:
+            raise ValueError(f"Named query '{self.name}' expects parameters {list(self.parameters)}, "
+                             f"missing {missing}, unknown {unknown}.")
+        return [bigquery.ScalarQueryParameter(name, type_, values[name]) for name, type_ in self.parameters.items()]
+
+    def describe(self, values: Dict[str, Any]) -> str:
+        """Renders the query with its parameter values, for the user and the executor agent."""
+        bound = ", ".join(f"@{name} = {values[name]!r}" if isinstance(values[name], str) else f"@{name} = {values[name]}"
+                          for name in self.parameters)
+        return f"Named query: {self.name}\nParameters: {bound}\n{self.sql.strip()}"
+
+
+def default_period(as_of: Optional[date] = None) -> tuple[date, date]:
+    """Returns the year to date reporting period, BigQuery's CURRENT_DATE() is evaluated in UTC."""
+    as_of = as_of or datetime.now(timezone.utc).date()
+    return date(as_of.year, 1, 1), as_of
+
+
+def account_parameters(account_name: str, start_date: Optional[str] = None,
+                       end_date: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Builds the parameter values of an account query, defaulting to year to date.
+
+    Args:
+        account_name: The name of the account.
+        start_date: Optional first day of the period, as YYYY-MM-DD.
+        end_date: Optional last day of the period, as YYYY-MM-DD.
+    Raises:
+        ValueError: If a date is malformed or the period is empty.
+    """
+    default_start, default_end = default_period()
+    end = date.fromisoformat(end_date) if end_date else default_end
+    start = date.fromisoformat(start_date) if start_date else date(end.year, 1, 1) if end_date else default_start
+    if start > end:
+        raise ValueError(f"The start date {start} is after the end date {end}.")
+    return {"account_name": account_name, "start_date": start, "end_date": end}
+
+
+def validate_named_query(query: NamedQuery) -> NamedQuery:
+    """
+    Checks that a named query references exactly the parameters it declares, and records
+    its normalized text and hash so it is never re-parsed at request time.
+
+    Raises:
+        ValueError: If the SQL and the parameter declarations disagree.
+    """
+    referenced = set(_PARAMETER_RE.findall(masked_sql(query.sql)))
+    declared = set(query.parameters)
+    if referenced != declared:
+        raise ValueError(f"Named query '{query.name}' references parameters {sorted(referenced)} "
+                         f"but declares {sorted(declared)}.")
+    if re.search(r"\{\w*\}", masked_sql(query.sql)):
+        raise ValueError(f"Named query '{query.name}' still contains a format placeholder.")
+    query.normalized_sql = normalize_sql(query.sql)
+    query.sql_hash = sql_hash(query.sql)
+    return query
+
+
+def validate_with_dry_run(client: bigquery.Client) -> None:
+    """
+    Dry-runs every named query against BigQuery, to catch schema drift at deploy time.
+
+    Run by `python -m concord_sql_agent.tools.query_transfer validate`.
+
+    Raises:
+        google.api_core.exceptions.GoogleAPIError: If BigQuery rejects a query.
+    """
+    start_date, end_date = default_period()
+    for query in NAMED_QUERIES.values():
+        parameters = query.bind(account_name="", start_date=start_date, end_date=end_date)
+        job_config = bigquery.QueryJobConfig(dry_run=True, use_query_cache=False, query_parameters=parameters)
+        try:
+            client.query(query.normalized_sql, job_config=job_config)
+        except GoogleAPIError as e:
+            print(f"Named query '{query.name}' failed its dry run: {e}")
+            raise
+
+
+NAMED_QUERIES: Dict[str, NamedQuery] = {query.name: validate_named_query(query) for query in [
+    NamedQuery(name="forecast_by_account_name",
+               title="Forecast By Account Name",
+               description="The monthly forecast for the calendar year of an account.",
+               sql=qry_forecast,
+               parameters=ACCOUNT_PARAMETERS),
+    NamedQuery(name="committed_workloads",
+               title="Committed Workloads",
+               description="Commitment discounts per month, allocated to product categories by gross revenue.",
+               sql=qry_committed_workloads,
+               parameters=ACCOUNT_PARAMETERS),
+    NamedQuery(name="monthly_actual",
+               title="Monthly Actual",
+               description="The actual sales revenue per month of an account.",
+               sql=qry_monthly_actual,
+               parameters=ACCOUNT_PARAMETERS),
+    NamedQuery(name="average_daily_run_rate",
+               title="Average Daily Run Rate",
+               description="The average daily sales revenue of an account over the period.",
+               sql=qry_average_daily_run_rate,
+               parameters=ACCOUNT_PARAMETERS),
+]}
+
+
+def get_named_query(name: str) -> NamedQuery:
+    """
+    Looks up a named query by name.
+
+    Raises:
+        ValueError: If no named query has the given name.
+    """
+    query = NAMED_QUERIES.get(name)
+    if query is None:
+        raise ValueError(f"Unknown named query '{name}', known queries are {list(NAMED_QUERIES)}.")
+    return query
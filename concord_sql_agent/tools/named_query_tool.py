@@ -1,42 +1,97 @@
-from .named_queries import (qry_forecast, qry_average_daily_run_rate, qry_monthly_actual, qry_committed_workloads)
+from typing import Optional
 
-def create_query_average_daily_run_rate(account_name: str) -> str:
+from google.adk.tools import ToolContext
+
+from .named_query_registry import account_parameters, get_named_query
+from .query_execution_tool import (fetch_results_async, format_results, query_error_message, session_id_from_context,
+                                   user_id_from_context)
+
+
+def _describe_named_query(name: str, account_name: str, start_date: Optional[str], end_date: Optional[str]) -> str:
+    try:
+        return get_named_query(name).describe(account_parameters(account_name, start_date, end_date))
+    except ValueError as e:
+        return f"The following Error occurred:\n{e}\nFix the error and retry."
+
+
+def create_query_average_daily_run_rate(account_name: str, start_date: Optional[str] = None,
+                                        end_date: Optional[str] = None) -> str:
     """
     Gets the BigQuery SQL for calculting the average daily run rate from concord for a sales account.
     Args:
         account_name: str - The name of the account to get the daily run rate for.
+        start_date: str - Optional first day of the period as YYYY-MM-DD, defaults to January 1st.
+        end_date: str - Optional last day of the period as YYYY-MM-DD, defaults to today.
     Returns:
-        The BigQuery SQL Query to execute.
+        The named query with its parameter values and BigQuery SQL.
     """
-    return qry_average_daily_run_rate.format(account_name=account_name)
+    return _describe_named_query("average_daily_run_rate", account_name, start_date, end_date)
 
 
-def create_query_get_monthly_actual(account_name: str) -> str:
+def create_query_get_monthly_actual(account_name: str, start_date: Optional[str] = None,
+                                    end_date: Optional[str] = None) -> str:
     """
     Gets the BigQuery SQL query for calculating actual spends by month for the current year.
-
+    Args:
+        account_name: str - The name of the account to get the monthly actuals for.
+        start_date: str - Optional first day of the period as YYYY-MM-DD, defaults to January 1st.
+        end_date: str - Optional last day of the period as YYYY-MM-DD, defaults to today.
     Returns:
-        The BigQuery SQL Query to execute.
+        The named query with its parameter values and BigQuery SQL.
     """
-    return qry_monthly_actual.format(account_name=account_name)
+    return _describe_named_query("monthly_actual", account_name, start_date, end_date)
 
 
-def create_query_committed_workloads_for_the_past_twelve_months() -> str:
+def create_query_committed_workloads_for_the_past_twelve_months(account_name: str, start_date: Optional[str] = None,
+                                                                end_date: Optional[str] = None) -> str:
     """
     Gets the BigQuery SQL query for calculating the committed workloads for the past twelve months
     for the current year.
-
+    Args:
+        account_name: str - The name of the account to get the committed workloads for.
+        start_date: str - Optional first day of the period as YYYY-MM-DD, defaults to January 1st.
+        end_date: str - Optional last day of the period as YYYY-MM-DD, defaults to today.
     Returns:
-        The BigQuery SQL Query to execute.
+        The named query with its parameter values and BigQuery SQL.
     """
-    return qry_committed_workloads.format(account_name='concord-prod')
+    return _describe_named_query("committed_workloads", account_name, start_date, end_date)
 
-def create_query_forecast_by_account_name(account_name: str) -> str:
+
+def create_query_forecast_by_account_name(account_name: str, start_date: Optional[str] = None,
+                                          end_date: Optional[str] = None) -> str:
     """
     Gets the BigQuery SQL query for calculating the forecast for a given account name.
     Args:
         account_name: str - The name of the account to get the forecast for.
+        start_date: str - Optional first day of the period as YYYY-MM-DD, defaults to January 1st.
+        end_date: str - Optional last day of the period as YYYY-MM-DD, defaults to today.
+    Returns:
+        The named query with its parameter values and BigQuery SQL.
+    """
+    return _describe_named_query("forecast_by_account_name", account_name, start_date, end_date)
+
+
+async def execute_named_query(query_name: str, account_name: str, start_date: Optional[str] = None,
+                              end_date: Optional[str] = None, output_format: str = "auto",
+                              tool_context: ToolContext = None) -> str:
+    """Executes a named query in BigQuery with typed parameters and returns the results.
+
+    Args:
+        query_name: The name of the named query, e.g. forecast_by_account_name.
+        account_name: The name of the account to run the query for.
+        start_date: Optional first day of the reporting period as YYYY-MM-DD, defaults to January 1st.
+        end_date: Optional last day of the reporting period as YYYY-MM-DD, defaults to today.
+        output_format: How to encode the results, one of auto, markdown, csv, json, arrow or summary.
+        tool_context: The context provided by the ADK, used for user info.
+
     Returns:
-        The BigQuery SQL Query to execute.
+        The data requested in the chosen output format.
     """
-    return qry_forecast.format(account_name=account_name)
\ No newline at end of file
+    try:
+        query = get_named_query(query_name)
+        query_parameters = query.bind(**account_parameters(account_name, start_date, end_date))
+        df, warning = await fetch_results_async(query.normalized_sql, user_id_from_context(tool_context),
+                                                query_parameters, session_id_from_context(tool_context))
+        return format_results(df, warning, output_format)
+    except Exception as e:
+        return query_error_message(e)
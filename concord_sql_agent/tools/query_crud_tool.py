@@ -1,49 +1,204 @@
 # query_crud_tools.py
 
 import datetime
+import hashlib
 import json
 import os
-from typing import Any, Dict, List
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 
 from google.adk.tools import ToolContext
+from google.api_core.exceptions import FailedPrecondition
 from google.cloud import firestore
 
+from ..state.query_catalog import get_query_catalog
+from .query_execution_tool import user_id_from_context
+
 # --- Firestore Configuration ---
-# In a real ADK deployment, the project ID would typically be inferred from the
-# environment where the agent is running.
-try:
-    db = firestore.Client()
-except Exception:
-    # Fallback for local development if GOOGLE_CLOUD_PROJECT is not set
-    project_id = os.environ.get("GOOGLE_CLOUD_PROJECT")
-    db_name = os.environ.get("GOOGLE_CLOUD_FIRESTORE_DB_NAME")
-    query_collection = os.environ.get("GOOGLE_CLOUD_QUERY_COLLECTION")
-    if not project_id:
-        raise ValueError(
-            "GCP Project ID is not set. Please set the GOOGLE_CLOUD_PROJECT "
-            "environment variable."
-        )
+query_collection = os.environ.get("GOOGLE_CLOUD_QUERY_COLLECTION", "queries")
 
-    if not db_name:
-        raise ValueError(
-            "FireStore DB Name is not set. Please set the GOOGLE_CLOUD_PROJECT",
-            "environment variable"
-        )
+_db: Optional[firestore.Client] = None
+_db_lock = threading.Lock()
 
-    if not query_collection:
-        raise ValueError(
-            "Query collection name is not set, Please set the GOOGLE_CLOUD_QUERY_COLLECTION",
-            "environment variable"
-        )
 
-    db = firestore.Client(project=project_id, database=db_name)
+def _create_db() -> firestore.Client:
+    # In a real ADK deployment, the project ID would typically be inferred from the
+    # environment where the agent is running.
+    try:
+        return firestore.Client()
+    except Exception:
+        # Fallback for local development if GOOGLE_CLOUD_PROJECT is not set
+        project_id = os.environ.get("GOOGLE_CLOUD_PROJECT")
+        db_name = os.environ.get("GOOGLE_CLOUD_FIRESTORE_DB_NAME")
+        if not project_id:
+            raise ValueError(
+                "GCP Project ID is not set. Please set the GOOGLE_CLOUD_PROJECT "
+                "environment variable."
+            )
+
+        if not db_name:
+            raise ValueError(
+                "FireStore DB Name is not set. Please set the GOOGLE_CLOUD_FIRESTORE_DB_NAME "
+                "environment variable"
+            )
+
+        return firestore.Client(project=project_id, database=db_name)
+
 
+def get_db() -> firestore.Client:
+    """Returns the Firestore client, created on first use so importing the tools needs no credentials."""
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                _db = _create_db()
+    return _db
+
+
+def _queries_ref():
+    return get_db().collection(query_collection)
+
+
+def _names_ref():
+    # One index document per (creator, name), mapping to the id of the query
+    return get_db().collection(f"{query_collection}_names")
+
+
+def name_key(creator: Optional[str], name: str) -> str:
+    """Returns the id of the index document of a query name, names are unique per creator."""
+    return hashlib.sha256(json.dumps([creator, name]).encode("utf-8")).hexdigest()
+
+
+def _name_entry(creator: Optional[str], name: str, query_id: str) -> Dict[str, Any]:
+    return {"creator": creator, "name": name, "query_id": query_id}
+
+
+def _find_unindexed(creator: Optional[str], name: str, transaction=None) -> Optional[str]:
+    # Queries saved before the name index existed have no entry, they are found by their fields.
+    # Where a creator has several, the most recently updated one has the name, as in rebuild_name_index
+    query = _queries_ref().where(filter=firestore.FieldFilter("creator", "==", creator)).where(
+        filter=firestore.FieldFilter("name", "==", name))
+    docs = list(query.stream(transaction=transaction))
+    if not docs:
+        return None
+    return max(docs, key=lambda doc: str(doc.to_dict().get("updated", ""))).id
+
+
+def _find_in_transaction(transaction, name_ref, creator: Optional[str], name: str) -> Tuple[Optional[str], bool]:
+    # The id of the creator's query of that name, and whether it has a name index entry
+    name_doc = name_ref.get(transaction=transaction)
+    if name_doc.exists:
+        return name_doc.get("query_id"), True
+    return _find_unindexed(creator, name, transaction), False
+
+
+@firestore.transactional
+def _index_in_transaction(transaction, name_ref, creator: Optional[str], name: str) -> Optional[str]:
+    query_id, indexed = _find_in_transaction(transaction, name_ref, creator, name)
+    if query_id and not indexed:
+        transaction.create(name_ref, _name_entry(creator, name, query_id))
+    return query_id
+
+
+@firestore.transactional
+def _create_in_transaction(transaction, doc_ref, query_data: Dict[str, Any]) -> None:
+    name_ref = _names_ref().document(name_key(query_data["creator"], query_data.get("name")))
+    if _find_in_transaction(transaction, name_ref, query_data["creator"], query_data.get("name"))[0]:
+        raise ValueError(f"You already have a query named '{query_data.get('name')}'.")
+    transaction.create(name_ref, _name_entry(query_data["creator"], query_data.get("name"), doc_ref.id))
+    transaction.set(doc_ref, query_data)
+
+
+class QueryConflictError(ValueError):
+    """Raised when a query was changed by someone else since the caller read it."""
+
+
+def _as_datetime(value: Any) -> Optional[datetime.datetime]:
+    if value is None:
+        return None
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.fromisoformat(str(value))
+    # Timestamps are stored in UTC, a naive one never compares equal to an aware one
+    return value if value.tzinfo is not None else value.replace(tzinfo=datetime.timezone.utc)
+
+
+@firestore.transactional
+def _update_in_transaction(transaction, doc_ref, updated_data: Dict[str, Any],
+                           read_version: Optional[datetime.datetime]) -> Dict[str, Any]:
+    snapshot = doc_ref.get(transaction=transaction)
+    if not snapshot.exists:
+        raise ValueError(f"Query with id '{doc_ref.id}' not found.")
+    current = snapshot.to_dict()
+    if read_version is not None and _as_datetime(current.get("updated")) != read_version:
+        raise QueryConflictError(f"Query '{current.get('name')}' was changed at {current.get('updated')}, "
+                                 f"after it was read. Read it again and reapply the changes.")
+
+    # The creator is fixed, and a rename moves the query's name index entry
+    creator = current.get("creator")
+    updated_data["creator"] = creator
+    new_name = updated_data.get("name", current.get("name"))
+    if new_name != current.get("name"):
+        new_name_ref = _names_ref().document(name_key(creator, new_name))
+        if new_name_ref.get(transaction=transaction).exists:
+            raise ValueError(f"You already have a query named '{new_name}'.")
+        transaction.delete(_names_ref().document(name_key(creator, current.get("name"))))
+        transaction.create(new_name_ref, _name_entry(creator, new_name, doc_ref.id))
+
+    # The write fails if the document changed after the read, even outside a transaction's protection
+    transaction.update(doc_ref, updated_data, option=get_db().write_option(last_update_time=snapshot.update_time))
+    return {**current, **updated_data}
+
+
+@firestore.transactional
+def _delete_in_transaction(transaction, name_ref, creator: Optional[str], name: str) -> Optional[str]:
+    query_id, _ = _find_in_transaction(transaction, name_ref, creator, name)
+    if not query_id:
+        return None
+    transaction.delete(_queries_ref().document(query_id))
+    transaction.delete(name_ref)
+    return query_id
+
+
+def rebuild_name_index() -> int:
+    """
+    Writes the name index entry of every saved query, for queries saved before the index existed.
+
+    Where a creator has several queries with the same name, the most recently updated one
+    keeps the name. Run it once per collection, it reads every saved query:
+
+        python -m concord_sql_agent.tools.query_transfer reindex
+
+    Until then, a query without an entry is found by its creator and name, and its entry is
+    written when it is read.
+
+    Returns:
+        The number of index entries written.
+    """
+    entries: Dict[str, tuple] = {}
+    for doc in _queries_ref().stream():
+        data = doc.to_dict()
+        key = name_key(data.get("creator"), data.get("name"))
+        updated = str(data.get("updated", ""))
+        if key not in entries or updated > entries[key][0]:
+            entries[key] = (updated, _name_entry(data.get("creator"), data.get("name"), doc.id))
+
+    batch = get_db().batch()
+    for i, (key, (_, entry)) in enumerate(entries.items(), 1):
+        batch.set(_names_ref().document(key), entry)
+        # A batch holds at most 500 writes
+        if i % 500 == 0:
+            batch.commit()
+            batch = get_db().batch()
+    batch.commit()
+    return len(entries)
 
 
 def create_query(query: str, tool_context: ToolContext) -> Dict[str, Any]:
     """
     Creates a new BigQuery SQL query record in the Firestore database.
 
+    Query names are unique per creator.
+
     Args:
         query: A JSON string representing the query object to be created.
                The object must conform to the required data structure, including
@@ -53,18 +208,22 @@ def create_query(query: str, tool_context: ToolContext) -> Dict[str, Any]:
     Returns:
         A dictionary representing the newly created query record, including its
         auto-generated Firestore ID.
+
+    Raises:
+        ValueError: If the user already has a query with the same name.
     """
     query_data = json.loads(query)
 
     # Add server-side timestamps and creator from the context
-    query_data["creator"] = tool_context.user_context.user_id
+    query_data["creator"] = user_id_from_context(tool_context)
     query_data["created"] = datetime.datetime.now(datetime.timezone.utc)
     query_data["updated"] = datetime.datetime.now(datetime.timezone.utc)
 
-    # Add the document to Firestore, which auto-generates an ID
-    doc_ref = db.collection.document()
+    # Add the document to Firestore, which auto-generates an ID, together with its name index entry
+    doc_ref = _queries_ref().document()
     query_data["id"] = doc_ref.id  # Add the generated ID to the document data
-    doc_ref.set(query_data)
+    _create_in_transaction(get_db().transaction(), doc_ref, query_data)
+    get_query_catalog(_queries_ref()).remember(doc_ref.id, query_data)
 
     return query_data
 
@@ -73,14 +232,21 @@ def list_queries(tool_context: ToolContext) -> List[Dict[str, Any]]:
     """
     Lists all queries created by the current user and all public queries.
 
+    The listing is served from an in-memory catalog that a Firestore snapshot listener
+    keeps current, so it reads no documents. Firestore is only queried directly if the
+    catalog could not be loaded.
+
     Args:
         tool_context: The context provided by the ADK, used for user info.
 
     Returns:
         A list of dictionaries, where each dictionary is a query record.
     """
-    user_id = tool_context.user_context.user_id
-    queries_ref = db.collection(query_collection)
+    user_id = user_id_from_context(tool_context)
+    queries_ref = _queries_ref()
+    queries = get_query_catalog(queries_ref).list_for(user_id)
+    if queries is not None:
+        return queries
 
     # Create a compound query to fetch documents where the creator is the
     # current user OR the query is public.
@@ -97,32 +263,57 @@ def list_queries(tool_context: ToolContext) -> List[Dict[str, Any]]:
     return [doc.to_dict() for doc in docs]
 
 
-def read_query(query_name: str, tool_context: ToolContext) -> Dict[str, Any]:
+def read_query(query_name: str, tool_context: ToolContext, creator: Optional[str] = None) -> Dict[str, Any]:
     """
     Reads a single query record from Firestore by its name.
 
-    Note: This assumes query names are unique for a given user's accessible
-    queries. If multiple queries have the same name, it will return the first
-    one found.
+    Query names are unique per creator. The current user's own query of that name is
+    returned first, otherwise the public query of that name. When several users have a
+    public query with the name, pass the creator to choose one.
 
     Args:
         query_name: The name of the query to retrieve.
         tool_context: The context provided by the ADK.
+        creator: Optional user id of the query's creator, defaults to the current user.
 
     Returns:
         A dictionary representing the found query record.
 
     Raises:
-        ValueError: If no query with the given name is found.
+        ValueError: If no query with the given name is found, or the name is ambiguous.
     """
-    queries_ref = db.collection(query_collection)
-    query = queries_ref.where("name", "==", query_name).limit(1)
-    docs = list(query.stream())
-
-    if not docs:
+    user_id = user_id_from_context(tool_context)
+    queries_ref = _queries_ref()
+    name_ref = _names_ref().document(name_key(creator or user_id, query_name))
+    name_doc = name_ref.get()
+    if name_doc.exists:
+        query_id = name_doc.get("query_id")
+    elif _find_unindexed(creator or user_id, query_name):
+        # Saved before the name index existed, its entry is written now
+        query_id = _index_in_transaction(get_db().transaction(), name_ref, creator or user_id, query_name)
+    else:
+        query_id = None
+    if query_id:
+        doc = queries_ref.document(query_id).get()
+        if doc.exists and (doc.get("creator") == user_id or doc.get("is_public")):
+            return doc.to_dict()
+    if creator:
+        raise ValueError(f"Query with name '{query_name}' by '{creator}' not found.")
+
+    # Not one of the user's own queries, look for a public query of that name
+    public = get_query_catalog(queries_ref).find_public(query_name)
+    if public is None:
+        query = queries_ref.where(filter=firestore.FieldFilter("name", "==", query_name)).where(
+            filter=firestore.FieldFilter("is_public", "==", True))
+        public = [doc.to_dict() for doc in query.stream()]
+
+    if len(public) > 1:
+        creators = ", ".join(sorted(str(q.get("creator")) for q in public))
+        raise ValueError(f"There are {len(public)} public queries named '{query_name}', by {creators}. "
+                         f"Specify the creator.")
+    if not public:
         raise ValueError(f"Query with name '{query_name}' not found.")
-
-    return docs[0].to_dict()
+    return public[0]
 
 
 def update_query(query: str, tool_context: ToolContext) -> Dict[str, Any]:
@@ -130,7 +321,12 @@ def update_query(query: str, tool_context: ToolContext) -> Dict[str, Any]:
     Updates an existing query record in Firestore.
 
     The agent's system instructions are responsible for enforcing that a user
-    can only update their own queries before calling this tool.
+    can only update their own queries before calling this tool. The creator of a
+    query cannot be changed, and renaming it keeps names unique per creator.
+
+    The `updated` field of the query object is the version of the query the caller
+    read, the update is rejected if the query was changed since. Without it, the
+    update applies to the current version.
 
     Args:
         query: A JSON string of the query object with updated fields. This
@@ -141,7 +337,10 @@ def update_query(query: str, tool_context: ToolContext) -> Dict[str, Any]:
         A dictionary representing the fully updated query record.
 
     Raises:
-        ValueError: If the 'id' field is missing from the input query object.
+        QueryConflictError: If the query was changed since the caller read it, read it
+            again and reapply the changes.
+        ValueError: If the 'id' field is missing from the input query object, the query
+            does not exist, or it is renamed to a name its creator already uses.
     """
     updated_data = json.loads(query)
     doc_id = updated_data.get("id")
@@ -151,27 +350,34 @@ def update_query(query: str, tool_context: ToolContext) -> Dict[str, Any]:
             "The 'id' field is required in the query object for updates."
         )
 
-    query_ref = db.collection(query_collection)
-
-    doc_ref = query_ref.document(doc_id)
+    doc_ref = _queries_ref().document(doc_id)
+    try:
+        read_version = _as_datetime(updated_data.get("updated"))
+    except ValueError:
+        raise ValueError(f"The 'updated' field must be the timestamp the query was read with, "
+                         f"not {updated_data.get('updated')!r}.")
 
     # Ensure the updated timestamp is set to now
     updated_data["updated"] = datetime.datetime.now(datetime.timezone.utc)
 
-    # Use set with merge=True to update fields or create them if they don't exist
-    doc_ref.set(updated_data, merge=True)
+    # Merge the updated fields and move the name index entry in one transaction, the merged
+    # document is returned from the transaction's read so it is not read back
+    try:
+        updated_doc = _update_in_transaction(get_db().transaction(), doc_ref, updated_data, read_version)
+    except FailedPrecondition as e:
+        raise QueryConflictError(f"Query '{doc_id}' was changed by someone else, read it again and "
+                                 f"reapply the changes: {e}")
 
-    # Return the full, updated document
-    updated_doc = doc_ref.get()
-    return updated_doc.to_dict()
+    get_query_catalog(_queries_ref()).remember(doc_id, updated_doc)
+    return updated_doc
 
 
 def delete_query(query_name: str, tool_context: ToolContext) -> bool:
     """
-    Deletes a query record from Firestore by its name.
+    Deletes a query record of the current user from Firestore by its name.
 
-    The agent's system instructions are responsible for enforcing that a user
-    can only delete their own queries before calling this tool.
+    Only the current user's own queries can be deleted, the query and its name
+    index entry are deleted in one transaction.
 
     Args:
         query_name: The name of the query to delete.
@@ -183,14 +389,13 @@ def delete_query(query_name: str, tool_context: ToolContext) -> bool:
     Raises:
         ValueError: If no query with the given name is found to delete.
     """
-    queries_ref = db.collection(query_collection)
-    query = queries_ref.where("name", "==", query_name).limit(1)
-    docs = list(query.stream())
+    user_id = user_id_from_context(tool_context)
+    name_ref = _names_ref().document(name_key(user_id, query_name))
+    doc_id_to_delete = _delete_in_transaction(get_db().transaction(), name_ref, user_id, query_name)
 
-    if not docs:
+    if not doc_id_to_delete:
         raise ValueError(f"Query with name '{query_name}' not found to delete.")
 
-    doc_id_to_delete = docs[0].id
-    queries_ref.document(doc_id_to_delete).delete()
+    get_query_catalog(_queries_ref()).forget(doc_id_to_delete)
 
-    return True
\ No newline at end of file
+    return True
@@ -1,30 +1,324 @@
+import asyncio
+import threading
+from typing import Dict, Optional
+
 import pandas as pd
+from google.adk.tools import ToolContext
 from google.api_core.exceptions import GoogleAPIError
+from google.cloud import bigquery
+from google.cloud.bigquery.table import RowIterator
 
+from ..state.query_budget import (QueryBudgetExceededError, QueryParameters, format_bytes, get_query_budget,
+                                  parameter_values)
+from ..state.result_cache import get_result_cache
 from ..utils.client import get_bq_client
+from ..utils.jobs import job_id_for, submit_query
+from ..utils.result_encoding import encode_results
+from ..utils.sql_guard import SqlGuardError, check_read_only, lint_sql
 
 # Set the global float format for MD output
 pd.options.display.float_format = '{:,.2f}'.format
 
 timeout_seconds = 120
 
-def execute_query(query: str) -> str:
-    """Executes a Concord Query in BigQuery and returns the results in markdown format.
+# Job polling for the async tool, backing off from the first to the max interval
+poll_interval_seconds = 0.25
+max_poll_interval_seconds = 5.0
+
+# Callers waiting on each job in this process, a job is only cancelled once its last waiter gives up
+_job_waiters: Dict[str, int] = {}
+_job_waiters_lock = threading.Lock()
+
+
+def format_results(df: pd.DataFrame, warning: Optional[str] = None, output_format: str = "auto") -> str:
+    result = encode_results(df, output_format)
+    if warning:
+        return f"{warning}\n\n{result}"
+    return result
+
+
+def query_error_message(e: Exception) -> str:
+    """Returns the answer of a query tool whose query raised `e`, telling the agent what to do next."""
+    if isinstance(e, (SqlGuardError, QueryBudgetExceededError)):
+        return f"Query rejected: {e}"
+    print(e)
+    if isinstance(e, TimeoutError):
+        return f"Query timed out after {timeout_seconds} seconds and was cancelled.\nOptimize this query and try again."
+    if isinstance(e, GoogleAPIError):
+        return f"The query failed with the following error: {e}\nFix the error and retry."
+    return f"The following Error occurred:\n{e}\nFix the error and retry."
+
+
+def user_id_from_context(tool_context: Optional[ToolContext]) -> Optional[str]:
+    return getattr(tool_context, "user_id", None) if tool_context else None
+
+
+def session_id_from_context(tool_context: Optional[ToolContext]) -> Optional[str]:
+    session = getattr(tool_context, "session", None) if tool_context else None
+    return getattr(session, "id", None)
+
+
+def _attach(query_job: bigquery.QueryJob) -> None:
+    with _job_waiters_lock:
+        _job_waiters[query_job.job_id] = _job_waiters.get(query_job.job_id, 0) + 1
+
+
+def _detach(query_job: bigquery.QueryJob) -> bool:
+    """Releases a waiter of a job, returning whether it was the last one."""
+    with _job_waiters_lock:
+        remaining = _job_waiters.get(query_job.job_id, 1) - 1
+        if remaining > 0:
+            _job_waiters[query_job.job_id] = remaining
+            return False
+        _job_waiters.pop(query_job.job_id, None)
+        return True
+
+
+def estimate_query_cost(query: str) -> str:
+    """Estimates how many bytes a BigQuery SQL statement will scan, without running it.
 
     Args:
-        query: Ths BigQuery SQL statement to execute.
+        query: The BigQuery SQL statement to estimate.
 
     Returns:
-        A markdown formatted table of the data requested.
+        The estimated bytes processed, whether the query fits the per-query budget, and
+        advice on wasteful patterns such as SELECT *.
     """
     try:
-        client = get_bq_client()
-        query_job = client.query(query, timeout=timeout_seconds)
-        rows = query_job.result()
-        df = rows.to_dataframe()
-        return df.to_markdown(index=False, floatfmt=",.2f")
-    except GoogleAPIError as e:  # Catch the timeout exception
-        print(f"Query timed out after {timeout_seconds} seconds with the following error: {e}\nOptimize this query and try again.")
+        check_read_only(query)
+        budget = get_query_budget()
+        decision = budget.check(query)
+        estimate = decision.warning or f"The query will scan an estimated {format_bytes(decision.estimated_bytes)}."
+        return "\n".join([estimate, *lint_sql(query)])
+    except SqlGuardError as e:
+        return f"Query rejected: {e}"
+    except QueryBudgetExceededError as e:
+        return f"The query exceeds the budget: {e}"
     except Exception as e:
         print(e)
         return f"The following Error occurred:\n{e}\nFix the error and retry."
+
+
+def execute_query(query: str, output_format: str = "auto", tool_context: ToolContext = None) -> str:
+    """Executes a Concord Query in BigQuery and returns the results.
+
+    Only a single read-only SELECT or WITH statement is executed, anything else is rejected.
+    Results are served from the result cache when the same query was run recently and
+    the tables it reads from have not been modified since. Otherwise the query is dry-run
+    first and rejected if it would exceed the scan budget. A retry of the same query in the
+    same session reattaches to the job already running instead of starting another one.
+
+    Args:
+        query: Ths BigQuery SQL statement to execute.
+        output_format: How to encode the results, one of auto, markdown, csv, json, arrow
+            or summary. Auto returns small results as a markdown table, medium ones as CSV
+            and large ones as a truncated table with summary statistics.
+        tool_context: The context provided by the ADK, used for user info.
+
+    Returns:
+        The data requested in the chosen output format.
+    """
+    try:
+        check_read_only(query)
+        cache = get_result_cache()
+        df = cache.get(query)
+        warning = None
+        if df is None:
+            user_id = user_id_from_context(tool_context)
+            budget = get_query_budget()
+            decision = budget.check(query, user_id)
+            warning = decision.warning
+            try:
+                client = get_bq_client()
+                # Read before the job runs, so a table written meanwhile does not leave a stale result current
+                table_versions = cache.table_versions(query)
+                job_id = job_id_for(query, session_id_from_context(tool_context), user_id=user_id)
+                query_job = submit_query(client, query, job_id, timeout=timeout_seconds)
+                df = result_or_cancel(query_job).to_dataframe()
+            except BaseException:
+                budget.charge(user_id, 0, decision.reserved_bytes)
+                raise
+            budget.charge(user_id, query_job.total_bytes_processed, decision.reserved_bytes)
+            cache.put(query, df, table_modified=table_versions)
+        return format_results(df, warning, output_format)
+    except Exception as e:
+        return query_error_message(e)
+
+
+def result_or_cancel(query_job: bigquery.QueryJob, timeout: float = timeout_seconds) -> RowIterator:
+    """
+    Waits for a query job and returns its rows, cancelling the job if it does not finish in time
+    and no other caller in this process is waiting on it.
+
+    Raises:
+        TimeoutError: If the job did not finish in time.
+    """
+    _attach(query_job)
+    try:
+        rows = query_job.result(timeout=timeout)
+    except TimeoutError:
+        if _detach(query_job):
+            try:
+                query_job.cancel()
+            except GoogleAPIError as e:
+                print(f"Unable to cancel job {query_job.job_id}: {e}")
+        raise
+    _detach(query_job)
+    return rows
+
+
+def _cancel_job(query_job: bigquery.QueryJob) -> None:
+    """Cancels an abandoned job without making the caller wait for the API call."""
+    def cancel():
+        try:
+            query_job.cancel()
+        except GoogleAPIError as e:
+            print(f"Unable to cancel job {query_job.job_id}: {e}")
+    asyncio.get_running_loop().run_in_executor(None, cancel)
+
+
+def _cancel_unless_awaited(submit: asyncio.Future) -> None:
+    # Done callback of a submission whose caller was cancelled, the job it started has no waiter
+    if submit.cancelled() or submit.exception() is not None:
+        return
+    query_job = submit.result()
+    _attach(query_job)
+    if _detach(query_job):
+        _cancel_job(query_job)
+
+
+async def wait_for_job(query_job: bigquery.QueryJob, timeout: float = timeout_seconds) -> None:
+    """
+    Waits for a query job to finish without blocking the event loop.
+
+    The job state is polled with an exponential back off, so a waiting query holds no
+    thread between polls. The job is cancelled if the wait times out or the awaiting
+    task is cancelled, e.g. because the session was abandoned, unless another caller in
+    this process is still waiting on the same job.
+
+    Args:
+        query_job: The submitted query job.
+        timeout: The maximum number of seconds to wait.
+    Raises:
+        TimeoutError: If the job did not finish in time.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    interval = poll_interval_seconds
+    _attach(query_job)
+    abandoned = False
+    try:
+        while True:
+            await asyncio.to_thread(query_job.reload)
+            if query_job.state == "DONE":
+                return
+            if loop.time() >= deadline:
+                raise TimeoutError(f"Query did not finish within {timeout} seconds.")
+            await asyncio.sleep(min(interval, max(0.0, deadline - loop.time())))
+            interval = min(interval * 2, max_poll_interval_seconds)
+    except (asyncio.CancelledError, TimeoutError):
+        abandoned = True
+        raise
+    finally:
+        if _detach(query_job) and abandoned:
+            _cancel_job(query_job)
+
+
+async def run_query_async(query: str, timeout: float = timeout_seconds, query_parameters: QueryParameters = None,
+                          session_id: Optional[str] = None,
+                          user_id: Optional[str] = None) -> tuple[bigquery.QueryJob, pd.DataFrame]:
+    """
+    Submits a query, waits for it cooperatively and downloads the result.
+
+    The job id is derived from the query, the user and the session, so a retry reattaches
+    to the job of the first attempt if it is still running or has finished. A caller
+    cancelled while the job is being submitted cancels the job once it is submitted,
+    unless another caller in this process is waiting on it.
+
+    Args:
+        query: The BigQuery SQL statement to execute.
+        timeout: The maximum number of seconds to wait for the job.
+        query_parameters: Optional parameters of a parameterized query.
+        session_id: The agent session the query runs in, if known.
+        user_id: The user running the query, if known.
+    Returns:
+        The finished job and its result.
+    """
+    client = get_bq_client()
+    job_config = bigquery.QueryJobConfig(query_parameters=query_parameters or [])
+    job_id = job_id_for(query, session_id, parameter_values(query_parameters), user_id=user_id)
+    # The submission runs on to completion on its thread, even when the caller is cancelled
+    submit = asyncio.ensure_future(asyncio.to_thread(submit_query, client, query, job_id, job_config, timeout))
+    try:
+        query_job = await asyncio.shield(submit)
+    except asyncio.CancelledError:
+        submit.add_done_callback(_cancel_unless_awaited)
+        raise
+    await wait_for_job(query_job, timeout)
+    df = await asyncio.to_thread(lambda: query_job.result().to_dataframe())
+    return query_job, df
+
+
+async def fetch_results_async(query: str, user_id: Optional[str] = None, query_parameters: QueryParameters = None,
+                              session_id: Optional[str] = None) -> tuple[pd.DataFrame, Optional[str]]:
+    """
+    Returns the result of a query from the result cache, or runs it once it passed the budget check.
+
+    Args:
+        query: The BigQuery SQL statement to execute.
+        user_id: The user running the query, charged against their daily budget.
+        query_parameters: Optional parameters of a parameterized query.
+        session_id: The agent session the query runs in, if known.
+    Returns:
+        The query result and an optional budget warning.
+    Raises:
+        SqlGuardError: If the query is not a single read-only statement.
+        QueryBudgetExceededError: If the query exceeds a budget.
+        TimeoutError: If the job did not finish in time.
+    """
+    check_read_only(query)
+    cache = get_result_cache()
+    values = parameter_values(query_parameters)
+    df = await asyncio.to_thread(cache.get, query, values)
+    if df is not None:
+        return df, None
+
+    budget = get_query_budget()
+    decision = await asyncio.to_thread(budget.check, query, user_id, query_parameters)
+    try:
+        table_versions = await asyncio.to_thread(cache.table_versions, query)
+        query_job, df = await run_query_async(query, query_parameters=query_parameters, session_id=session_id,
+                                              user_id=user_id)
+    except BaseException:
+        # Includes cancellation, the reservation must not outlive the query
+        budget.charge(user_id, 0, decision.reserved_bytes)
+        raise
+    budget.charge(user_id, query_job.total_bytes_processed, decision.reserved_bytes)
+    await asyncio.to_thread(cache.put, query, df, values, table_versions)
+    return df, decision.warning
+
+
+async def execute_query_async(query: str, output_format: str = "auto", tool_context: ToolContext = None) -> str:
+    """Executes a Concord Query in BigQuery and returns the results.
+
+    Only a single read-only SELECT or WITH statement is executed, anything else is rejected.
+    Results are served from the result cache when the same query was run recently and
+    the tables it reads from have not been modified since. Otherwise the query is dry-run
+    first and rejected if it would exceed the scan budget.
+
+    Args:
+        query: The BigQuery SQL statement to execute.
+        output_format: How to encode the results, one of auto, markdown, csv, json, arrow
+            or summary. Auto returns small results as a markdown table, medium ones as CSV
+            and large ones as a truncated table with summary statistics.
+        tool_context: The context provided by the ADK, used for user info.
+
+    Returns:
+        The data requested in the chosen output format.
+    """
+    try:
+        df, warning = await fetch_results_async(query, user_id_from_context(tool_context),
+                                                session_id=session_id_from_context(tool_context))
+        return format_results(df, warning, output_format)
+    except Exception as e:
+        return query_error_message(e)
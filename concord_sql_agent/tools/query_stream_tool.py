@@ -0,0 +1,206 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterator, List, Optional
+
+import pyarrow as pa
+from google.adk.tools import ToolContext
+from google.api_core.exceptions import GoogleAPIError
+
+from ..state.query_budget import get_query_budget
+from ..utils.client import get_bq_client, get_bqstorage_client
+from ..utils.jobs import job_id_for, submit_query
+from ..utils.sql_guard import check_read_only
+from .query_execution_tool import (query_error_message, result_or_cancel, session_id_from_context, timeout_seconds,
+                                   user_id_from_context)
+
+page_size_rows = 500
+
+# Open cursors hold a live Storage Read API session; keep their number and lifetime bounded
+max_open_cursors = 32
+cursor_idle_seconds = 600
+
+# Number of record batches the Storage Read API may prefetch per cursor
+max_prefetch_batches = 2
+
+
+class QueryCursor:
+    """
+    A position in the Arrow record batch stream of a finished query job.
+
+    Only the batch currently being paged through is held in memory, so a cursor
+    stays small no matter how many rows the query produced.
+    """
+    def __init__(self, job_id: str, location: str, total_rows: Optional[int], batches: Iterator[pa.RecordBatch]):
+        self.job_id = job_id
+        self.location = location
+        self.total_rows = total_rows
+        self.offset = 0
+        self.exhausted = False
+        self.last_used = time.time()
+        self.lock = threading.Lock()
+        self._batches = batches
+        self._pending: Optional[pa.RecordBatch] = None
+
+    @property
+    def done(self) -> bool:
+        return self.exhausted or (self.total_rows is not None and self.offset >= self.total_rows)
+
+    @property
+    def token(self) -> str:
+        return f"{self.job_id}:{self.location}:{self.offset}"
+
+    def next_page(self, page_size: int) -> pa.Table:
+        """Reads up to page_size rows from the stream and advances the cursor."""
+        chunks: List[pa.RecordBatch] = []
+        remaining = page_size
+        while remaining > 0:
+            if self._pending is None or self._pending.num_rows == 0:
+                self._pending = next(self._batches, None)
+                if self._pending is None:
+                    self.exhausted = True
+                    break
+            chunk = self._pending.slice(0, remaining)
+            self._pending = self._pending.slice(chunk.num_rows)
+            chunks.append(chunk)
+            remaining -= chunk.num_rows
+
+        self.offset += page_size - remaining
+        self.last_used = time.time()
+        if not chunks:
+            return pa.table({})
+        return pa.Table.from_batches(chunks)
+
+    def close(self) -> None:
+        close = getattr(self._batches, "close", None)
+        if close:
+            close()
+
+
+_cursors: "OrderedDict[str, QueryCursor]" = OrderedDict()
+_cursors_lock = threading.Lock()
+
+
+def _register(cursor: QueryCursor) -> None:
+    now = time.time()
+    with _cursors_lock:
+        _cursors[cursor.job_id] = cursor
+        stale = [job_id for job_id, c in _cursors.items() if now - c.last_used > cursor_idle_seconds]
+        for job_id in stale:
+            _cursors.pop(job_id).close()
+        while len(_cursors) > max_open_cursors:
+            _cursors.popitem(last=False)[1].close()
+
+
+def _release(cursor: QueryCursor) -> None:
+    with _cursors_lock:
+        if _cursors.get(cursor.job_id) is cursor:
+            _cursors.pop(cursor.job_id)
+    cursor.close()
+
+
+def _parse_token(token: str) -> tuple[str, str, int]:
+    try:
+        job_id, location, offset = token.strip().strip("`").rsplit(":", 2)
+        return job_id, location, int(offset)
+    except ValueError:
+        raise ValueError(f"Invalid cursor '{token}'.")
+
+
+def _render_page(page: pa.Table, first_row: int, cursor: QueryCursor) -> str:
+    if page.num_rows == 0:
+        return "No more rows."
+    last_row = first_row + page.num_rows
+    of_total = f" of {cursor.total_rows:,}" if cursor.total_rows is not None else ""
+    result = f"Rows {first_row + 1:,}-{last_row:,}{of_total}\n\n"
+    result += page.to_pandas().to_markdown(index=False, floatfmt=",.2f")
+    if cursor.done:
+        return result + "\n\nNo more rows."
+    return result + f"\n\nNext page cursor: `{cursor.token}`"
+
+
+def execute_query_stream(query: str, page_size: int = page_size_rows, tool_context: ToolContext = None) -> str:
+    """Executes a Concord Query in BigQuery and returns only the first page of results in markdown format.
+
+    Use this instead of execute_query for queries that may return many rows. Later pages are
+    fetched with fetch_query_page using the cursor returned at the end of each page.
+
+    Args:
+        query: The BigQuery SQL statement to execute.
+        page_size: The number of rows per page.
+        tool_context: The context provided by the ADK, used for user info.
+
+    Returns:
+        A markdown formatted table of the first page, followed by the cursor for the next page.
+    """
+    try:
+        check_read_only(query)
+        user_id = user_id_from_context(tool_context)
+        budget = get_query_budget()
+        decision = budget.check(query, user_id)
+        warning = decision.warning
+        try:
+            client = get_bq_client()
+            job_id = job_id_for(query, session_id_from_context(tool_context), user_id=user_id)
+            query_job = submit_query(client, query, job_id, timeout=timeout_seconds)
+            rows = result_or_cancel(query_job, timeout_seconds)
+        except BaseException:
+            budget.charge(user_id, 0, decision.reserved_bytes)
+            raise
+        budget.charge(user_id, query_job.total_bytes_processed, decision.reserved_bytes)
+        batches = rows.to_arrow_iterable(bqstorage_client=get_bqstorage_client(),
+                                         max_queue_size=max_prefetch_batches)
+        cursor = QueryCursor(query_job.job_id, query_job.location, rows.total_rows, iter(batches))
+        page = cursor.next_page(page_size)
+        if cursor.done:
+            cursor.close()
+        else:
+            _register(cursor)
+        result = _render_page(page, 0, cursor)
+        return f"{warning}\n\n{result}" if warning else result
+    except Exception as e:
+        return query_error_message(e)
+
+
+def fetch_query_page(cursor: str, page_size: int = page_size_rows) -> str:
+    """Fetches the next page of results for a query started with execute_query_stream.
+
+    Args:
+        cursor: The cursor returned with the previous page.
+        page_size: The number of rows per page.
+
+    Returns:
+        A markdown formatted table of the page, followed by the cursor for the next page.
+    """
+    try:
+        job_id, location, offset = _parse_token(cursor)
+        with _cursors_lock:
+            live = _cursors.get(job_id)
+            if live is not None:
+                # Paging keeps a cursor recently used, it is the idle ones that get evicted
+                _cursors.move_to_end(job_id)
+
+        if live is not None:
+            with live.lock:
+                if live.offset == offset:
+                    page = live.next_page(page_size)
+                    if live.done:
+                        _release(live)
+                    return _render_page(page, offset, live)
+
+        # The stream was closed or the cursor points elsewhere, read the page from the job's
+        # destination table instead.
+        client = get_bq_client()
+        query_job = client.get_job(job_id, location=location)
+        rows = client.list_rows(query_job.destination, start_index=offset, max_results=page_size)
+        detached = QueryCursor(job_id, location, rows.total_rows, iter(()))
+        page = rows.to_arrow()
+        detached.offset = offset + page.num_rows
+        detached.exhausted = page.num_rows < page_size
+        return _render_page(page, offset, detached)
+    except GoogleAPIError as e:
+        print(e)
+        return f"Unable to fetch the page, the query results may have expired: {e}\nRun the query again."
+    except Exception as e:
+        print(e)
+        return f"The following Error occurred:\n{e}\nFix the error and retry."
@@ -0,0 +1,267 @@
+"""
+Bulk import and export of saved queries, for migrating a team's library and seeding the named queries.
+
+Files are NDJSON (one query per line, `.ndjson` or `.jsonl`) or Parquet (`.parquet`), with the
+fields of the saved query records. Queries are written in batches of up to 250 queries, each
+query together with its name index entry, and the batches are committed in parallel.
+
+    python -m concord_sql_agent.tools.query_transfer export queries.ndjson
+    python -m concord_sql_agent.tools.query_transfer import queries.parquet --replace
+    python -m concord_sql_agent.tools.query_transfer seed --creator vexel
+
+Queries saved before the name index existed are indexed with `reindex`, run it once per
+collection before importing into it, so their names are not saved twice:
+
+    python -m concord_sql_agent.tools.query_transfer reindex
+
+At deploy time, `validate` dry-runs every named query against BigQuery and exits with an
+error if one no longer matches the tables' schemas:
+
+    python -m concord_sql_agent.tools.query_transfer validate
+"""
+import argparse
+import datetime
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from google.api_core.exceptions import GoogleAPICallError, GoogleAPIError
+from google.cloud import firestore
+from pydantic import BaseModel
+
+from ..state.query_catalog import get_query_catalog
+from ..utils.client import get_bq_client
+from . import query_crud_tool
+from .named_query_registry import NAMED_QUERIES, validate_with_dry_run
+
+# Each query takes two writes, the query and its name index entry, and a batch holds at most 500 writes
+QUERY_TRANSFER_BATCH_SIZE = min(int(os.environ.get("CONCORD_QUERY_TRANSFER_BATCH_SIZE", "250")), 250)
+QUERY_TRANSFER_WORKERS = int(os.environ.get("CONCORD_QUERY_TRANSFER_WORKERS", "8"))
+
+QUERY_FIELDS = ["id", "name", "description", "creator", "created", "updated", "is_public", "query"]
+
+# Called with the number of queries processed so far and the total, 0 while the total is not known yet
+Progress = Callable[[int, int], None]
+
+
+class ImportReport(BaseModel):
+    created: int = 0
+    replaced: int = 0
+    skipped: int = 0
+    failed: int = 0
+    errors: List[str] = []
+
+
+def _file_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".ndjson", ".jsonl"):
+        return "ndjson"
+    if extension == ".parquet":
+        return "parquet"
+    raise ValueError(f"Unsupported file '{path}', use a .ndjson, .jsonl or .parquet file.")
+
+
+def _timestamp(value: Any) -> Optional[datetime.datetime]:
+    if value is None or isinstance(value, datetime.datetime):
+        return value
+    return datetime.datetime.fromisoformat(str(value))
+
+
+def read_queries(path: str) -> List[Dict[str, Any]]:
+    """Reads query records from an NDJSON or Parquet file."""
+    if _file_format(path) == "parquet":
+        return pq.read_table(path).to_pylist()
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_queries(path: str, records: List[Dict[str, Any]]) -> None:
+    """Writes query records to an NDJSON or Parquet file, replacing it atomically."""
+    file_format = _file_format(path)
+    records = [{field: record.get(field) for field in QUERY_FIELDS} for record in records]
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if file_format == "parquet":
+                pq.write_table(pa.Table.from_pylist(records), f)
+            else:
+                for record in records:
+                    f.write(json.dumps(record, default=lambda value: value.isoformat()).encode("utf-8") + b"\n")
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def export_queries(path: str, creator: Optional[str] = None, progress: Optional[Progress] = None) -> int:
+    """
+    Exports the saved queries, or those of one creator, to an NDJSON or Parquet file.
+
+    Returns:
+        The number of queries exported.
+    """
+    queries_ref = query_crud_tool._queries_ref()
+    if creator is not None:
+        queries_ref = queries_ref.where(filter=firestore.FieldFilter("creator", "==", creator))
+    records = []
+    for doc in queries_ref.stream():
+        records.append(doc.to_dict())
+        if progress and len(records) % 1000 == 0:
+            progress(len(records), 0)
+    write_queries(path, records)
+    if progress:
+        progress(len(records), len(records))
+    return len(records)
+
+
+def _prepare(records: Iterable[Dict[str, Any]], creator: Optional[str], report: ImportReport) -> List[Dict[str, Any]]:
+    # Validates the records and keeps the last one of every (creator, name) in the input
+    prepared: Dict[str, Dict[str, Any]] = {}
+    now = datetime.datetime.now(datetime.timezone.utc)
+    for i, record in enumerate(records):
+        data = {field: record.get(field) for field in QUERY_FIELDS if field != "id"}
+        data["creator"] = creator or data.get("creator")
+        if not data.get("name") or not data.get("query") or not data.get("creator"):
+            report.failed += 1
+            report.errors.append(f"Record {i} needs a name, a query and a creator.")
+            continue
+        data["is_public"] = bool(data.get("is_public"))
+        data["created"] = _timestamp(data.get("created")) or now
+        data["updated"] = _timestamp(data.get("updated")) or now
+        key = query_crud_tool.name_key(data["creator"], data["name"])
+        if key in prepared:
+            report.skipped += 1
+        prepared[key] = data
+    return list(prepared.values())
+
+
+def import_queries(records: Iterable[Dict[str, Any]], creator: Optional[str] = None, replace: bool = False,
+                   progress: Optional[Progress] = None) -> ImportReport:
+    """
+    Saves many queries at once, with their name index entries.
+
+    Imported queries get new ids. A query whose creator already has a query of that name is
+    skipped, or with `replace` overwrites the existing query and keeps its id.
+
+    Args:
+        records: Query records, with at least a name, a query and a creator.
+        creator: Optional creator to save every query under, instead of the records' creators.
+        replace: Whether to overwrite existing queries of the same creator and name.
+        progress: Optional callback, called with the queries processed so far and the total.
+
+    Returns:
+        The number of queries created, replaced, skipped and failed, and the errors.
+    """
+    report = ImportReport()
+    queries = _prepare(records, creator, report)
+
+    db = query_crud_tool.get_db()
+    queries_ref, names_ref = query_crud_tool._queries_ref(), query_crud_tool._names_ref()
+
+    # Batched gets of just the imported names tell which queries exist, without reading the whole index
+    keys = [query_crud_tool.name_key(data["creator"], data["name"]) for data in queries]
+    existing = {}
+    for i in range(0, len(keys), QUERY_TRANSFER_BATCH_SIZE):
+        for doc in db.get_all([names_ref.document(key) for key in keys[i:i + QUERY_TRANSFER_BATCH_SIZE]]):
+            if doc.exists:
+                existing[doc.id] = doc.get("query_id")
+    writes = []
+    for data in queries:
+        key = query_crud_tool.name_key(data["creator"], data["name"])
+        if key in existing and not replace:
+            report.skipped += 1
+            continue
+        doc_ref = queries_ref.document(existing.get(key))
+        data["id"] = doc_ref.id
+        writes.append((key in existing, doc_ref, names_ref.document(key), data))
+
+    def commit(chunk: List[tuple]) -> List[tuple]:
+        batch = db.batch()
+        for replacing, doc_ref, name_ref, data in chunk:
+            batch.set(doc_ref, data)
+            entry = query_crud_tool._name_entry(data["creator"], data["name"], doc_ref.id)
+            # Creating the entry fails the batch if the name was taken since the index was read
+            if replacing:
+                batch.set(name_ref, entry)
+            else:
+                batch.create(name_ref, entry)
+        batch.commit()
+        return chunk
+
+    total, done = report.skipped + len(writes), report.skipped
+    catalog = get_query_catalog(queries_ref)
+    chunks = [writes[i:i + QUERY_TRANSFER_BATCH_SIZE] for i in range(0, len(writes), QUERY_TRANSFER_BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=max(QUERY_TRANSFER_WORKERS, 1)) as executor:
+        futures = {executor.submit(commit, chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            chunk = futures[future]
+            try:
+                future.result()
+            except GoogleAPICallError as e:
+                report.failed += len(chunk)
+                report.errors.append(f"A batch of {len(chunk)} queries failed: {e}")
+            else:
+                for replacing, doc_ref, _, data in chunk:
+                    catalog.remember(doc_ref.id, data)
+                report.replaced += sum(1 for replacing, *_ in chunk if replacing)
+                report.created += sum(1 for replacing, *_ in chunk if not replacing)
+            done += len(chunk)
+            if progress:
+                progress(done, total)
+    return report
+
+
+def named_query_records(creator: str, is_public: bool = True) -> List[Dict[str, Any]]:
+    """Returns the named queries of the registry as saved query records, for seeding the library."""
+    return [{"name": query.name, "description": f"{query.title}: {query.description}", "creator": creator,
+             "is_public": is_public, "query": query.sql.strip()} for query in NAMED_QUERIES.values()]
+
+
+def _print_progress(done: int, total: int) -> None:
+    print(f"\r{done}/{total or '?'} queries", end="\n" if done >= total > 0 else "", flush=True)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Bulk import and export of saved queries.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Export saved queries to a file.")
+    export_parser.add_argument("path", help="An .ndjson, .jsonl or .parquet file.")
+    export_parser.add_argument("--creator", help="Export only this user's queries.")
+    import_parser = commands.add_parser("import", help="Import saved queries from a file.")
+    import_parser.add_argument("path", help="An .ndjson, .jsonl or .parquet file.")
+    import_parser.add_argument("--creator", help="Save every query under this user.")
+    import_parser.add_argument("--replace", action="store_true", help="Overwrite queries with the same name.")
+    seed_parser = commands.add_parser("seed", help="Save the named queries as public queries.")
+    seed_parser.add_argument("--creator", required=True, help="The user to save the queries under.")
+    seed_parser.add_argument("--replace", action="store_true", help="Overwrite queries with the same name.")
+    commands.add_parser("reindex", help="Write the name index entries of queries saved before the index.")
+    commands.add_parser("validate", help="Dry-run every named query against BigQuery.")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        print(f"Exported {export_queries(args.path, args.creator, _print_progress)} queries to {args.path}")
+        return
+    if args.command == "reindex":
+        print(f"Indexed {query_crud_tool.rebuild_name_index()} query names")
+        return
+    if args.command == "validate":
+        try:
+            validate_with_dry_run(get_bq_client())
+        except GoogleAPIError:
+            raise SystemExit(1)
+        print(f"All {len(NAMED_QUERIES)} named queries passed a dry run")
+        return
+    records = read_queries(args.path) if args.command == "import" else named_query_records(args.creator)
+    report = import_queries(records, args.creator, args.replace, _print_progress)
+    for error in report.errors:
+        print(error)
+    print(f"Created {report.created}, replaced {report.replaced}, skipped {report.skipped}, failed {report.failed}")
+
+
+if __name__ == "__main__":
+    main()
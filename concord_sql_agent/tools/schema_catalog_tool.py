@@ -0,0 +1,55 @@
+from typing import Optional
+
+import pandas as pd
+
+from ..state.schema_catalog import get_schema_catalog
+
+
+def list_tables(dataset: Optional[str] = None) -> str:
+    """Lists the tables available for querying, with their type, column count and description.
+
+    Args:
+        dataset: Optional dataset to list, as project.dataset. Lists every known dataset when omitted.
+
+    Returns:
+        A markdown formatted table of the available tables.
+    """
+    try:
+        tables = get_schema_catalog().tables(dataset)
+        if not tables:
+            return "No tables found."
+        df = pd.DataFrame([{"table": f"`{table.full_name}`",
+                            "type": table.table_type,
+                            "columns": len(table.columns),
+                            "description": table.description or ""} for table in tables])
+        return df.to_markdown(index=False)
+    except Exception as e:
+        print(e)
+        return f"The following Error occurred:\n{e}\nFix the error and retry."
+
+
+def describe_table(table_name: str) -> str:
+    """Describes the columns and nested fields of a table, including its partitioning and clustering columns.
+
+    Args:
+        table_name: The table, either fully qualified as project.dataset.table or by its table name alone.
+
+    Returns:
+        A markdown formatted table of the table's field paths, types and descriptions.
+    """
+    try:
+        table = get_schema_catalog().get_table(table_name)
+        if table is None:
+            return f"Table '{table_name}' was not found, use list_tables to see the available tables."
+        df = pd.DataFrame([{"field_path": column.field_path,
+                            "data_type": column.data_type,
+                            "partitioning": "yes" if column.is_partitioning_column else "",
+                            "clustering": column.clustering_ordinal_position or "",
+                            "description": column.description or ""} for column in table.columns])
+        header = f"`{table.full_name}` ({table.table_type})"
+        if table.description:
+            header += f": {table.description}"
+        return f"{header}\n\n{df.to_markdown(index=False)}"
+    except Exception as e:
+        print(e)
+        return f"The following Error occurred:\n{e}\nFix the error and retry."
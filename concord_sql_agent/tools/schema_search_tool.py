@@ -0,0 +1,34 @@
+from typing import Optional
+
+import pandas as pd
+
+from ..state.schema_index import get_schema_index
+
+
+def search_schema(question: str, table_name: Optional[str] = None, limit: int = 25) -> str:
+    """Finds the columns and nested fields of the known tables that are relevant to a question.
+
+    Call this before writing SQL, with the user's question or the concepts it mentions
+    (e.g. "sales revenue by product category per month"), instead of guessing field paths.
+
+    Args:
+        question: The question or the concepts to find columns for.
+        table_name: Optional table to restrict the search to, fully qualified or by its table name alone.
+        limit: The maximum number of fields to return.
+
+    Returns:
+        A markdown formatted table of the best matching fields, best match first.
+    """
+    try:
+        matches = get_schema_index().search(question, limit=limit, table=table_name)
+        if not matches:
+            return "No matching fields found, try other terms or use describe_table."
+        df = pd.DataFrame([{"table": f"`{field.table}`",
+                            "field_path": field.field_path,
+                            "data_type": field.data_type,
+                            "mode": field.mode,
+                            "description": field.description} for _, field in matches])
+        return df.to_markdown(index=False)
+    except Exception as e:
+        print(e)
+        return f"The following Error occurred:\n{e}\nFix the error and retry."
@@ -0,0 +1,44 @@
+import asyncio
+from types import SimpleNamespace
+
+import pandas as pd
+
+from concord_sql_agent.state.query_budget import QueryBudgetExceededError
+from concord_sql_agent.tools import account_bundle_tool
+from concord_sql_agent.tools.account_bundle_tool import BUNDLE_QUERIES, execute_account_bundle
+from concord_sql_agent.tools.named_query_registry import get_named_query
+
+CONTEXT = SimpleNamespace(user_id="alice", session=SimpleNamespace(id="session-1"))
+
+
+def test_named_queries_run_concurrently(monkeypatch):
+    sql_names = {get_named_query(name).normalized_sql: name for name in BUNDLE_QUERIES.values()}
+    running, calls = [], []
+
+    async def fetch_results_async(query, user_id=None, query_parameters=None, session_id=None):
+        name = sql_names[query]
+        calls.append((name, user_id, session_id, {p.name: p.value for p in query_parameters}["account_name"]))
+        running.append(name)
+        # Every query has started before any of them finishes
+        while len(running) < len(BUNDLE_QUERIES):
+            await asyncio.sleep(0)
+        if name == "committed_workloads":
+            raise QueryBudgetExceededError("over the daily budget")
+        return pd.DataFrame({"n": [1, 2]}), "expensive" if name == "monthly_actual" else None
+
+    monkeypatch.setattr(account_bundle_tool, "fetch_results_async", fetch_results_async)
+    bundle = asyncio.run(execute_account_bundle("Acme", "2025-01-01", "2025-06-30", tool_context=CONTEXT))
+
+    assert sorted(calls) == sorted((name, "alice", "session-1", "Acme") for name in BUNDLE_QUERIES.values())
+    results = {result.name: result for result in bundle.results}
+    assert list(results) == list(BUNDLE_QUERIES)
+    assert results["Forecast"].status == "success" and results["Forecast"].row_count == 2
+    assert results["Monthly Actual"].result.startswith("expensive")
+    assert results["Committed Workloads"].status == "error"
+    assert results["Committed Workloads"].result == "Query rejected: over the daily budget"
+
+
+def test_invalid_period_fails_every_query():
+    bundle = asyncio.run(execute_account_bundle("Acme", "2025-06-30", "2025-01-01"))
+    assert [result.status for result in bundle.results] == ["error"] * len(BUNDLE_QUERIES)
+    assert "after the end date" in bundle.results[0].result
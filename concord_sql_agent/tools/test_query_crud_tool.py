@@ -0,0 +1,190 @@
+import datetime
+import json
+import os
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from concord_sql_agent.state import query_catalog
+from concord_sql_agent.tools import query_crud_tool
+from concord_sql_agent.utils.fake_firestore import FakeFirestoreClient
+
+ALICE = SimpleNamespace(user_id="alice")
+BOB = SimpleNamespace(user_id="bob")
+
+
+@pytest.fixture
+def db(monkeypatch):
+    # Runs against the Firestore emulator when one is configured, and the in-memory fake otherwise
+    if os.environ.get("FIRESTORE_EMULATOR_HOST"):
+        from google.cloud import firestore
+        client = firestore.Client(project="vexel-test")
+    else:
+        client = FakeFirestoreClient()
+    monkeypatch.setattr(query_crud_tool, "_db", client)
+    monkeypatch.setattr(query_crud_tool, "query_collection", f"queries_{uuid.uuid4().hex[:8]}")
+    monkeypatch.setattr(query_catalog, "_query_catalogs", {})
+    yield client
+    for catalog in query_catalog._query_catalogs.values():
+        catalog.stop()
+
+
+def save(name: str, tool_context, is_public: bool = False) -> dict:
+    record = {"name": name, "description": f"{name} description", "is_public": is_public, "query": "SELECT 1"}
+    return query_crud_tool.create_query(json.dumps(record), tool_context)
+
+
+def test_list_queries_returns_own_and_public_queries(db):
+    save("alice private", ALICE)
+    save("alice public", ALICE, is_public=True)
+    save("bob private", BOB)
+
+    assert [q["name"] for q in query_crud_tool.list_queries(ALICE)] == ["alice private", "alice public"]
+    assert [q["name"] for q in query_crud_tool.list_queries(BOB)] == ["alice public", "bob private"]
+
+
+def test_list_queries_is_served_from_the_catalog(db):
+    for i in range(20):
+        save(f"query {i}", ALICE)
+    query_crud_tool.list_queries(ALICE)
+    if not isinstance(db, FakeFirestoreClient):
+        return
+
+    reads = db.reads
+    for _ in range(10):
+        assert len(query_crud_tool.list_queries(ALICE)) == 20
+    assert db.reads == reads
+
+
+def test_catalog_follows_updates_and_deletes(db):
+    query_crud_tool.list_queries(ALICE)
+    created = save("renamed", ALICE)
+    query_crud_tool.update_query(json.dumps({"id": created["id"], "name": "shared", "is_public": True}), ALICE)
+    assert [q["name"] for q in query_crud_tool.list_queries(BOB)] == ["shared"]
+
+    query_crud_tool.delete_query("shared", ALICE)
+    assert query_crud_tool.list_queries(ALICE) == []
+
+
+def test_query_names_are_unique_per_creator(db):
+    save("weekly revenue", ALICE, is_public=True)
+    save("weekly revenue", BOB)
+    with pytest.raises(ValueError, match="already have a query named"):
+        save("weekly revenue", ALICE)
+
+    assert query_crud_tool.read_query("weekly revenue", BOB)["creator"] == "bob"
+    assert query_crud_tool.read_query("weekly revenue", BOB, creator="alice")["creator"] == "alice"
+
+
+def test_read_and_delete_get_the_query_by_its_name_index(db):
+    for i in range(20):
+        save(f"query {i}", ALICE)
+    if not isinstance(db, FakeFirestoreClient):
+        return
+
+    reads = db.reads
+    assert query_crud_tool.read_query("query 7", ALICE)["name"] == "query 7"
+    assert db.reads - reads == 2
+
+    # Bob cannot delete Alice's query
+    with pytest.raises(ValueError, match="not found to delete"):
+        query_crud_tool.delete_query("query 7", BOB)
+    assert query_crud_tool.delete_query("query 7", ALICE)
+    with pytest.raises(ValueError, match="not found"):
+        query_crud_tool.read_query("query 7", ALICE)
+
+
+def test_rename_moves_the_name_index_entry(db):
+    first = save("first", ALICE)
+    save("second", ALICE)
+    with pytest.raises(ValueError, match="already have a query named"):
+        query_crud_tool.update_query(json.dumps({"id": first["id"], "name": "second"}), ALICE)
+
+    query_crud_tool.update_query(json.dumps({"id": first["id"], "name": "third"}), ALICE)
+    assert query_crud_tool.read_query("third", ALICE)["id"] == first["id"]
+    save("first", ALICE)
+
+
+def test_public_name_shared_by_several_creators_is_ambiguous(db):
+    save("churn", ALICE, is_public=True)
+    save("churn", BOB, is_public=True)
+    with pytest.raises(ValueError, match="Specify the creator"):
+        query_crud_tool.read_query("churn", SimpleNamespace(user_id="carol"))
+
+
+def test_update_returns_the_merged_query_without_reading_it_back(db):
+    created = save("revenue", ALICE)
+    if not isinstance(db, FakeFirestoreClient):
+        return
+
+    reads = db.reads
+    updated = query_crud_tool.update_query(json.dumps({"id": created["id"], "query": "SELECT 2"}), ALICE)
+    assert db.reads - reads == 1
+    assert (updated["name"], updated["query"], updated["creator"]) == ("revenue", "SELECT 2", "alice")
+    assert updated["updated"] > created["updated"]
+
+
+def test_update_of_a_stale_version_is_a_conflict(db):
+    created = save("revenue", ALICE)
+    read = json.loads(json.dumps(query_crud_tool.read_query("revenue", ALICE), default=str))
+
+    query_crud_tool.update_query(json.dumps({**read, "description": "first session"}), ALICE)
+    with pytest.raises(query_crud_tool.QueryConflictError):
+        query_crud_tool.update_query(json.dumps({**read, "description": "second session"}), ALICE)
+
+    reread = json.loads(json.dumps(query_crud_tool.read_query("revenue", ALICE), default=str))
+    updated = query_crud_tool.update_query(json.dumps({**reread, "description": "second session"}), ALICE)
+    assert (updated["id"], updated["description"]) == (created["id"], "second session")
+
+
+def test_update_with_a_naive_timestamp_reads_it_as_utc(db):
+    created = save("revenue", ALICE)
+    read = query_crud_tool.read_query("revenue", ALICE)
+    naive = read["updated"].astimezone(datetime.timezone.utc).replace(tzinfo=None).isoformat()
+
+    updated = query_crud_tool.update_query(json.dumps({"id": created["id"], "updated": naive,
+                                                       "description": "naive"}), ALICE)
+    assert updated["description"] == "naive"
+
+
+def save_unindexed(name: str, creator: str, is_public: bool = False) -> dict:
+    # As queries were saved before the name index existed
+    doc_ref = query_crud_tool._queries_ref().document()
+    record = {"id": doc_ref.id, "name": name, "creator": creator, "is_public": is_public, "query": "SELECT 1",
+              "updated": datetime.datetime.now(datetime.timezone.utc)}
+    doc_ref.set(record)
+    return record
+
+
+def test_unindexed_queries_are_found_and_indexed_on_read(db):
+    legacy = save_unindexed("legacy", "alice", is_public=True)
+    assert query_crud_tool.read_query("legacy", BOB, creator="alice")["id"] == legacy["id"]
+
+    name_doc = query_crud_tool._names_ref().document(query_crud_tool.name_key("alice", "legacy")).get()
+    assert name_doc.exists and name_doc.get("query_id") == legacy["id"]
+    assert query_crud_tool.read_query("legacy", ALICE)["id"] == legacy["id"]
+
+
+def test_unindexed_queries_block_duplicates_and_can_be_deleted(db):
+    save_unindexed("legacy", "alice")
+    with pytest.raises(ValueError, match="already have a query named"):
+        save("legacy", ALICE)
+
+    assert query_crud_tool.delete_query("legacy", ALICE)
+    with pytest.raises(ValueError, match="not found"):
+        query_crud_tool.read_query("legacy", ALICE)
+    save("legacy", ALICE)
+
+
+def test_rebuild_name_index_indexes_the_latest_of_duplicate_names(db):
+    save_unindexed("legacy", "alice")
+    latest = save_unindexed("legacy", "alice")
+    save_unindexed("other", "bob")
+
+    assert query_crud_tool.rebuild_name_index() == 2
+    if not isinstance(db, FakeFirestoreClient):
+        return
+    reads = db.reads
+    assert query_crud_tool.read_query("legacy", ALICE)["id"] == latest["id"]
+    assert db.reads - reads == 2
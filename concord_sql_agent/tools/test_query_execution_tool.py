@@ -0,0 +1,101 @@
+import asyncio
+import threading
+
+import pytest
+from google.api_core.exceptions import BadRequest
+
+from concord_sql_agent.state.query_budget import QueryBudgetExceededError
+from concord_sql_agent.tools import query_execution_tool
+from concord_sql_agent.tools.query_execution_tool import query_error_message, run_query_async
+
+
+class FakeJob:
+    """A query job that keeps running until it is cancelled."""
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.state = "RUNNING"
+        self.cancels = 0
+
+    def reload(self):
+        pass
+
+    def cancel(self):
+        self.cancels += 1
+        self.state = "DONE"
+
+
+class SlowSubmit:
+    """Stands in for submit_query, holding each submission until `release` is set."""
+    def __init__(self, job: FakeJob):
+        self.job = job
+        self.submitting = threading.Semaphore(0)
+        self.release = threading.Event()
+
+    def __call__(self, client, query, job_id, job_config=None, timeout=None):
+        self.submitting.release()
+        self.release.wait(5)
+        return self.job
+
+
+@pytest.fixture
+def submit(monkeypatch):
+    submit = SlowSubmit(FakeJob("job"))
+    monkeypatch.setattr(query_execution_tool, "get_bq_client", lambda: None)
+    monkeypatch.setattr(query_execution_tool, "submit_query", submit)
+    monkeypatch.setattr(query_execution_tool, "_job_waiters", {})
+    monkeypatch.setattr(query_execution_tool, "poll_interval_seconds", 0.01)
+    return submit
+
+
+async def in_submit(submit: SlowSubmit, *args, **kwargs) -> asyncio.Task:
+    task = asyncio.create_task(run_query_async(*args, **kwargs))
+    await asyncio.to_thread(submit.submitting.acquire, timeout=5)
+    return task
+
+
+async def cancel(task: asyncio.Task, submit: SlowSubmit = None) -> None:
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    if submit:
+        # The submission was still running, it completes after its caller was cancelled
+        submit.release.set()
+    # Lets the submission's done callback and the cancel call on the default executor run
+    await asyncio.sleep(0.2)
+
+
+def test_cancelling_during_submit_cancels_the_job(submit):
+    async def scenario():
+        task = await in_submit(submit, "SELECT 1", session_id="s", user_id="alice")
+        await cancel(task, submit)
+
+    asyncio.run(scenario())
+    assert submit.job.cancels == 1
+    assert query_execution_tool._job_waiters == {}
+
+
+def test_job_awaited_by_another_caller_is_not_cancelled(submit):
+    async def scenario():
+        submit.release.set()
+        waiting = await in_submit(submit, "SELECT 1", session_id="s", user_id="alice")
+        while query_execution_tool._job_waiters.get("job") != 1:
+            await asyncio.sleep(0.01)
+
+        submit.release.clear()
+        submitting = await in_submit(submit, "SELECT 1", session_id="s", user_id="alice")
+        await cancel(submitting, submit)
+        assert submit.job.cancels == 0
+
+        await cancel(waiting)
+
+    asyncio.run(scenario())
+    assert submit.job.cancels == 1
+    assert query_execution_tool._job_waiters == {}
+
+
+def test_query_errors_tell_the_agent_what_to_do_next():
+    assert query_error_message(QueryBudgetExceededError("too big")) == "Query rejected: too big"
+    assert query_error_message(TimeoutError()).startswith("Query timed out after 120 seconds")
+    assert query_error_message(BadRequest("no such column")).startswith(
+        "The query failed with the following error: 400 no such column")
+    assert query_error_message(KeyError("x")).endswith("Fix the error and retry.")
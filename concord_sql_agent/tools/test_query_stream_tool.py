@@ -0,0 +1,103 @@
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pyarrow as pa
+import pytest
+
+from concord_sql_agent.tools import query_stream_tool
+from concord_sql_agent.tools.query_stream_tool import _parse_token, execute_query_stream, fetch_query_page
+
+TABLE = pa.table({"n": list(range(25))})
+
+
+class FakeRows:
+    def __init__(self, table: pa.Table, total_rows: int = TABLE.num_rows):
+        self.table = table
+        self.total_rows = total_rows
+
+    def to_arrow_iterable(self, bqstorage_client=None, max_queue_size=None):
+        return iter(self.table.to_batches(max_chunksize=7))
+
+    def to_arrow(self):
+        return self.table
+
+
+class FakeClient:
+    location = "US"
+
+    def __init__(self):
+        self.list_rows_calls = []
+
+    def query(self, query, job_config=None, job_id=None, job_id_prefix=None, timeout=None):
+        return SimpleNamespace(job_id=job_id, location=self.location, destination=f"results.{job_id}",
+                               total_bytes_processed=0, result=lambda timeout=None: FakeRows(TABLE))
+
+    def get_job(self, job_id, location=None, timeout=None):
+        return SimpleNamespace(job_id=job_id, destination=f"results.{job_id}")
+
+    def list_rows(self, table, start_index=0, max_results=None):
+        self.list_rows_calls.append((table, start_index, max_results))
+        return FakeRows(TABLE.slice(start_index, max_results))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = FakeClient()
+    budget = SimpleNamespace(check=lambda query, user_id: SimpleNamespace(warning=None, reserved_bytes=0),
+                             charge=lambda user_id, total_bytes, reserved_bytes: None)
+    monkeypatch.setattr(query_stream_tool, "get_bq_client", lambda: client)
+    monkeypatch.setattr(query_stream_tool, "get_bqstorage_client", lambda: None)
+    monkeypatch.setattr(query_stream_tool, "get_query_budget", lambda: budget)
+    monkeypatch.setattr(query_stream_tool, "_cursors", OrderedDict())
+    return client
+
+
+def next_token(page: str) -> str:
+    return page.rsplit("Next page cursor: `", 1)[1].rstrip("`")
+
+
+def test_parse_token():
+    assert _parse_token("`job_1:US:500`") == ("job_1", "US", 500)
+    assert _parse_token(" project:job_1:EU:0 ") == ("project:job_1", "EU", 0)
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        _parse_token("job_1:US")
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        _parse_token("job_1:US:next")
+
+
+def test_pages_are_read_from_the_open_stream(client):
+    page = execute_query_stream("SELECT n FROM numbers", page_size=10)
+    assert page.startswith("Rows 1-10 of 25")
+
+    page = fetch_query_page(next_token(page), page_size=10)
+    assert page.startswith("Rows 11-20 of 25")
+
+    page = fetch_query_page(next_token(page), page_size=10)
+    assert page.startswith("Rows 21-25 of 25") and page.endswith("No more rows.")
+    assert client.list_rows_calls == []
+    assert not query_stream_tool._cursors
+
+
+def test_fetching_a_page_keeps_its_cursor_recently_used(client, monkeypatch):
+    monkeypatch.setattr(query_stream_tool, "max_open_cursors", 2)
+    first = execute_query_stream("SELECT 1", page_size=10)
+    execute_query_stream("SELECT 2", page_size=10)
+
+    fetch_query_page(next_token(first), page_size=5)
+    execute_query_stream("SELECT 3", page_size=10)
+
+    assert next_token(first).split(":")[0] in query_stream_tool._cursors
+    assert len(query_stream_tool._cursors) == 2
+
+
+def test_pages_off_the_stream_fall_back_to_list_rows(client):
+    page = execute_query_stream("SELECT n FROM numbers", page_size=10)
+    job_id, location, _ = _parse_token(next_token(page))
+
+    page = fetch_query_page(f"{job_id}:{location}:5", page_size=10)
+    assert page.startswith("Rows 6-15 of 25")
+    assert client.list_rows_calls == [(f"results.{job_id}", 5, 10)]
+
+    query_stream_tool._cursors.clear()
+    page = fetch_query_page(f"{job_id}:{location}:20", page_size=10)
+    assert page.startswith("Rows 21-25 of 25") and page.endswith("No more rows.")
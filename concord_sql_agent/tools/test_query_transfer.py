@@ -0,0 +1,93 @@
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from google.api_core.exceptions import BadRequest
+
+from concord_sql_agent.state import query_catalog
+from concord_sql_agent.tools import query_crud_tool, query_transfer
+from concord_sql_agent.tools.named_query_registry import NAMED_QUERIES
+from concord_sql_agent.utils.fake_firestore import FakeFirestoreClient
+
+ALICE = SimpleNamespace(user_id="alice")
+
+
+@pytest.fixture
+def db(monkeypatch):
+    client = FakeFirestoreClient()
+    monkeypatch.setattr(query_crud_tool, "_db", client)
+    monkeypatch.setattr(query_crud_tool, "query_collection", f"queries_{uuid.uuid4().hex[:8]}")
+    monkeypatch.setattr(query_catalog, "_query_catalogs", {})
+    yield client
+    for catalog in query_catalog._query_catalogs.values():
+        catalog.stop()
+
+
+def records(count: int, creator: str = "alice") -> list:
+    return [{"name": f"query {i}", "description": "", "creator": creator, "query": f"SELECT {i}"}
+            for i in range(count)]
+
+
+@pytest.mark.parametrize("file_name", ["queries.ndjson", "queries.parquet"])
+def test_export_and_import_round_trip(db, tmp_path, file_name):
+    report = query_transfer.import_queries(records(1200))
+    assert (report.created, report.failed) == (1200, 0)
+
+    path = str(tmp_path / file_name)
+    assert query_transfer.export_queries(path, creator="alice") == 1200
+    exported = query_transfer.read_queries(path)
+    assert sorted(r["query"] for r in exported) == sorted(r["query"] for r in records(1200))
+
+    report = query_transfer.import_queries(exported, creator="bob")
+    assert report.created == 1200
+    assert len(query_crud_tool.list_queries(SimpleNamespace(user_id="bob"))) == 1200
+
+
+def test_import_skips_or_replaces_existing_names(db):
+    query_crud_tool.create_query(json.dumps({"name": "query 0", "query": "SELECT 'mine'"}), ALICE)
+
+    progress = []
+    report = query_transfer.import_queries(records(3), progress=lambda done, total: progress.append((done, total)))
+    assert (report.created, report.skipped) == (2, 1)
+    assert progress[-1] == (3, 3)
+    assert query_crud_tool.read_query("query 0", ALICE)["query"] == "SELECT 'mine'"
+
+    report = query_transfer.import_queries(records(3), replace=True)
+    assert report.replaced == 3
+    assert query_crud_tool.read_query("query 0", ALICE)["query"] == "SELECT 0"
+    assert len(query_crud_tool.list_queries(ALICE)) == 3
+
+
+def test_seed_named_queries(db):
+    report = query_transfer.import_queries(query_transfer.named_query_records("vexel"))
+    assert report.created == len(NAMED_QUERIES)
+    assert {q["name"] for q in query_crud_tool.list_queries(ALICE)} == set(NAMED_QUERIES)
+
+
+def test_import_reads_only_the_imported_names(db):
+    query_transfer.import_queries(records(500, creator="bob"))
+    reads = db.reads
+
+    report = query_transfer.import_queries(records(3))
+    assert report.created == 3
+    assert db.reads - reads == 3
+
+
+def test_reindex_command_indexes_saved_queries(db, capsys):
+    query_crud_tool._queries_ref().document("legacy").set({"id": "legacy", "name": "legacy", "creator": "alice"})
+    query_transfer.main(["reindex"])
+    assert "Indexed 1 query names" in capsys.readouterr().out
+    assert query_crud_tool._names_ref().document(query_crud_tool.name_key("alice", "legacy")).get().exists
+
+
+def test_validate_command_fails_on_a_rejected_named_query(monkeypatch, capsys):
+    class Client:
+        def query(self, query, job_config=None):
+            if "DailyRunRate" in query:
+                raise BadRequest("Unrecognized name: sales_revenue")
+
+    monkeypatch.setattr(query_transfer, "get_bq_client", Client)
+    with pytest.raises(SystemExit):
+        query_transfer.main(["validate"])
+    assert "Named query 'forecast_by_account_name' failed its dry run" in capsys.readouterr().out
@@ -1,32 +1,123 @@
+import itertools
+import os
+import threading
+from typing import Dict, List, Optional
+
+from requests.adapters import HTTPAdapter
 from google.cloud import bigquery
+from google.cloud import bigquery_storage
+import google.auth.credentials
 import google.auth.transport.requests
-import google.oauth2.id_token
-import google.oauth2.credentials
-
-def get_credentials():
-    id_token = None
-    try:
-        credentials, project_id = google.auth.default()
-
-
-        target_audience = "https://vexel-service-662234851257.us-central1.run.app" # Replace with your IAP client ID
-        auth_req = google.auth.transport.requests.Request()
-        id_token = google.oauth2.id_token.fetch_id_token(auth_req, target_audience)
-
-        if id_token:
-            credentials.refresh(auth_req)
-            access_token = credentials.token
-            creds = google.oauth2.credentials.Credentials(token=id_token, refresh_token=access_token)
-            return creds
-        else:
-            return None
-    except Exception as e: print(e)
-
-    return None
-
-def get_bq_client() -> bigquery.Client:
-    # credentials = get_credentials()
-    # if credentials:
-    #     return bigquery.Client(project='concord-prod', credentials=credentials)
-    # else:
-    return bigquery.Client(project='concord-prod')
\ No newline at end of file
+
+from .credentials import AccessTokenSource, CachedToken, CachedTokenCredentials
+
+PROJECT_ID = 'concord-prod'
+
+# Clients are shared by every caller in the process, round robin within a credential identity
+CLIENT_POOL_SIZE = int(os.environ.get("CONCORD_BQ_CLIENT_POOL_SIZE", "4"))
+
+# Serve queries from the local DuckDB stand-in for concord-prod instead of BigQuery, see concord_sql_agent/emulator
+BQ_EMULATOR = os.environ.get("CONCORD_BQ_EMULATOR", "").lower() in ("1", "true", "yes")
+
+# Keep-alive connections each client's HTTP session may hold open
+HTTP_POOL_MAXSIZE = int(os.environ.get("CONCORD_BQ_HTTP_POOL_MAXSIZE", "32"))
+
+_pool_lock = threading.Lock()
+_bq_clients: Dict[str, List[bigquery.Client]] = {}
+_bq_client_counters: Dict[str, itertools.count] = {}
+_bqstorage_clients: Dict[str, bigquery_storage.BigQueryReadClient] = {}
+
+_access_token = CachedToken(AccessTokenSource(scopes=bigquery.Client.SCOPE))
+_credentials = CachedTokenCredentials(_access_token)
+
+
+def get_credentials() -> google.auth.credentials.Credentials:
+    """
+    Returns the process wide credentials of the application default principal. Their access
+    token is only minted when it is missing or about to expire, and is otherwise refreshed
+    in the background, so requests do not wait on token minting.
+    """
+    return _credentials
+
+
+def _credential_key(credentials: Optional[google.auth.credentials.Credentials]) -> Optional[str]:
+    """
+    Identifies the principal behind a set of credentials, so clients are never shared across principals.
+
+    Returns None when the credentials do not name their principal, such clients are not pooled.
+    """
+    if credentials is None:
+        return "default"
+    identity = (getattr(credentials, "service_account_email", None)
+                or getattr(credentials, "signer_email", None)
+                or getattr(credentials, "account", None))
+    if not identity:
+        return None
+    return f"{type(credentials).__name__}:{identity}"
+
+
+def _resolve_credentials(credentials: Optional[google.auth.credentials.Credentials]) -> google.auth.credentials.Credentials:
+    """Returns the given credentials, or the process wide cached token credentials."""
+    return credentials if credentials is not None else get_credentials()
+
+
+def _build_bq_client(credentials: google.auth.credentials.Credentials) -> bigquery.Client:
+    session = google.auth.transport.requests.AuthorizedSession(credentials)
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_MAXSIZE, pool_maxsize=HTTP_POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    return bigquery.Client(project=PROJECT_ID, credentials=credentials, _http=session)
+
+
+def get_bq_client(credentials: Optional[google.auth.credentials.Credentials] = None) -> bigquery.Client:
+    """
+    Returns a pooled BigQuery client for the given credentials.
+
+    Clients are built lazily, up to CLIENT_POOL_SIZE per credential identity, and then
+    handed out round robin. Each client keeps its HTTP connections alive between calls,
+    so back to back queries skip credential discovery and connection setup. Credentials
+    that do not name their principal are never pooled, each call builds a client of its own.
+
+    Args:
+        credentials: Optional credentials, defaults to those of `get_credentials`.
+    Returns:
+        A shared, thread-safe BigQuery client, or the emulator when CONCORD_BQ_EMULATOR is set.
+    """
+    if BQ_EMULATOR:
+        # Imported lazily, DuckDB is only installed with the emulator extra
+        from ..emulator.client import get_emulator_client
+        return get_emulator_client()
+    key = _credential_key(credentials)
+    if key is None:
+        return _build_bq_client(credentials)
+    with _pool_lock:
+        pool = _bq_clients.get(key, [])
+        if len(pool) >= CLIENT_POOL_SIZE:
+            return pool[next(_bq_client_counters[key]) % len(pool)]
+
+    # Client construction does network and file I/O, keep it off the lock
+    client = _build_bq_client(_resolve_credentials(credentials))
+    with _pool_lock:
+        pool = _bq_clients.setdefault(key, [])
+        counter = _bq_client_counters.setdefault(key, itertools.count())
+        if len(pool) < CLIENT_POOL_SIZE:
+            pool.append(client)
+            return client
+    # Other callers filled the pool while this client was built
+    client.close()
+    return pool[next(counter) % len(pool)]
+
+
+def get_bqstorage_client(credentials: Optional[google.auth.credentials.Credentials] = None) -> bigquery_storage.BigQueryReadClient:
+    """Returns a shared BigQuery Storage Read API client, its gRPC channel multiplexes concurrent reads."""
+    if BQ_EMULATOR:
+        # The emulator's results are read directly, without the Storage Read API
+        return None
+    key = _credential_key(credentials)
+    if key is None:
+        return bigquery_storage.BigQueryReadClient(credentials=credentials)
+    client = _bqstorage_clients.get(key)
+    if client is not None:
+        return client
+    client = bigquery_storage.BigQueryReadClient(credentials=_resolve_credentials(credentials))
+    with _pool_lock:
+        return _bqstorage_clients.setdefault(key, client)
@@ -0,0 +1,163 @@
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Callable, NamedTuple, Optional, Protocol, Sequence
+
+import google.auth
+import google.auth.credentials
+import google.auth.transport.requests
+
+# Tokens are refreshed in the background once they are this close to expiring
+REFRESH_MARGIN_SECONDS = 300
+
+# Below this remaining lifetime a token is not handed out, callers wait for the refresh
+MIN_VALIDITY_SECONDS = 30
+
+
+class Token(NamedTuple):
+    value: str
+    expiry: float
+
+
+class TokenSource(Protocol):
+    def fetch(self) -> Token:
+        """Mints a new token."""
+        ...
+
+
+class AccessTokenSource:
+    """Mints OAuth access tokens from the given or the application default credentials."""
+    def __init__(self, credentials: Optional[google.auth.credentials.Credentials] = None,
+                 scopes: Optional[Sequence[str]] = None):
+        self.credentials = credentials
+        self.scopes = scopes
+
+    def fetch(self) -> Token:
+        if self.credentials is None:
+            self.credentials, _ = google.auth.default(scopes=self.scopes)
+        self.credentials.refresh(google.auth.transport.requests.Request())
+        # google-auth reports expiry as a naive UTC datetime
+        expiry = self.credentials.expiry
+        expires_at = expiry.replace(tzinfo=timezone.utc).timestamp() if expiry else time.time() + 3600
+        return Token(self.credentials.token, expires_at)
+
+
+class FakeTokenSource:
+    """A local token source for tests, minting numbered tokens without any network calls."""
+    def __init__(self, lifetime_seconds: float = 3600, delay_seconds: float = 0.0,
+                 clock: Callable[[], float] = time.time):
+        self.lifetime_seconds = lifetime_seconds
+        self.delay_seconds = delay_seconds
+        self.clock = clock
+        self.fetches = 0
+        self.lock = threading.Lock()
+
+    def fetch(self) -> Token:
+        if self.delay_seconds:
+            time.sleep(self.delay_seconds)
+        with self.lock:
+            self.fetches += 1
+            return Token(f"fake-token-{self.fetches}", self.clock() + self.lifetime_seconds)
+
+
+class CachedToken:
+    """
+    Holds a token until shortly before it expires.
+
+    Once a token enters its refresh margin it is still handed out while a background
+    thread mints its replacement, so token minting stays off the request path. Only when
+    no usable token is left do callers wait, and concurrent callers then share a single
+    refresh in flight.
+    """
+    def __init__(self, source: TokenSource,
+                 refresh_margin_seconds: float = REFRESH_MARGIN_SECONDS,
+                 min_validity_seconds: float = MIN_VALIDITY_SECONDS,
+                 clock: Callable[[], float] = time.time):
+        self.source = source
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.min_validity_seconds = min_validity_seconds
+        self.clock = clock
+        self.lock = threading.Lock()
+        self._token: Optional[Token] = None
+        self._in_flight: Optional[Future] = None
+
+    def get(self) -> str:
+        """
+        Returns a valid token, minting one only if none is cached or it is about to expire.
+
+        Raises:
+            Exception: Whatever the token source raised, when no usable token is cached.
+        """
+        return self.get_token().value
+
+    def get_token(self) -> Token:
+        """Like `get`, but returns the token with its expiry."""
+        token = self._token
+        if token is not None:
+            remaining = token.expiry - self.clock()
+            if remaining > self.refresh_margin_seconds:
+                return token
+            if remaining > self.min_validity_seconds:
+                self._refresh_in_background()
+                return token
+        return self.refresh()
+
+    def refresh(self) -> Token:
+        """Mints a new token, joining the refresh already in flight if there is one."""
+        flight, leader = self._join_or_lead()
+        if leader:
+            self._mint(flight)
+        return flight.result()
+
+    def invalidate(self) -> None:
+        """Drops the cached token, e.g. after the server rejected it."""
+        self._token = None
+
+    def _join_or_lead(self) -> tuple[Future, bool]:
+        with self.lock:
+            if self._in_flight is not None:
+                return self._in_flight, False
+            self._in_flight = Future()
+            return self._in_flight, True
+
+    def _mint(self, flight: Future) -> None:
+        try:
+            token = self.source.fetch()
+            self._token = token
+            flight.set_result(token)
+        except Exception as e:
+            flight.set_exception(e)
+        finally:
+            with self.lock:
+                self._in_flight = None
+
+    def _refresh_in_background(self) -> None:
+        flight, leader = self._join_or_lead()
+        if leader:
+            flight.add_done_callback(_report_background_failure)
+            threading.Thread(target=self._mint, args=(flight,), daemon=True).start()
+
+
+class CachedTokenCredentials(google.auth.credentials.Credentials):
+    """
+    Credentials whose bearer token comes from a CachedToken.
+
+    Clients built on them share the cached token, so their requests only wait for a
+    token when the cache has none left, instead of each client minting its own.
+    """
+    def __init__(self, cached_token: CachedToken):
+        super().__init__()
+        self.cached_token = cached_token
+
+    def refresh(self, request) -> None:
+        token = self.cached_token.get_token()
+        self.token = token.value
+        # google-auth compares expiry against a naive UTC datetime
+        self.expiry = datetime.fromtimestamp(token.expiry, timezone.utc).replace(tzinfo=None)
+
+
+def _report_background_failure(flight: Future) -> None:
+    if flight.exception() is not None:
+        # The current token is still valid, the next caller will retry
+        print(f"Background token refresh failed: {flight.exception()}")
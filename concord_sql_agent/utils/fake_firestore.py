@@ -0,0 +1,310 @@
+import copy
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from google.api_core.exceptions import Aborted, AlreadyExists, FailedPrecondition, NotFound
+from google.cloud.firestore_v1.base_client import BaseClient
+from google.cloud.firestore_v1.base_query import And, FieldFilter, Or
+from google.cloud.firestore_v1.document import DocumentSnapshot
+from google.cloud.firestore_v1.watch import ChangeType, DocumentChange
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a is not None and a < b,
+    "<=": lambda a, b: a is not None and a <= b,
+    ">": lambda a, b: a is not None and a > b,
+    ">=": lambda a, b: a is not None and a >= b,
+    "in": lambda a, b: a in b,
+    "not-in": lambda a, b: a not in b,
+    "array_contains": lambda a, b: isinstance(a, list) and b in a,
+}
+
+
+def _field(data: dict, field_path: str) -> Any:
+    for part in field_path.split("."):
+        if not isinstance(data, dict) or part not in data:
+            return None
+        data = data[part]
+    return data
+
+
+def _matches(data: dict, condition) -> bool:
+    if isinstance(condition, Or):
+        return any(_matches(data, f) for f in condition.filters)
+    if isinstance(condition, And):
+        return all(_matches(data, f) for f in condition.filters)
+    return _OPERATORS[condition.op_string](_field(data, condition.field_path), condition.value)
+
+
+class FakeWatch:
+    def __init__(self, collection: "FakeCollectionReference", callback: Callable):
+        self.collection = collection
+        self.callback = callback
+        self.is_active = True
+
+    def unsubscribe(self) -> None:
+        self.is_active = False
+        self.collection._client._unwatch(self)
+
+
+class FakeDocumentReference:
+    def __init__(self, collection: "FakeCollectionReference", document_id: str):
+        self.parent = collection
+        self.id = document_id
+        self._client = collection._client
+
+    @property
+    def path(self) -> str:
+        return f"{self.parent.id}/{self.id}"
+
+    def get(self, field_paths=None, transaction: Optional["FakeTransaction"] = None, **kwargs) -> DocumentSnapshot:
+        snapshot = self._client._get(self)
+        if transaction is not None:
+            transaction._reads.setdefault(self.path, snapshot.update_time)
+        return snapshot
+
+    def create(self, document_data: dict) -> None:
+        self._client._commit({}, [("create", self, document_data, None)])
+
+    def set(self, document_data: dict, merge: bool = False) -> None:
+        self._client._commit({}, [("merge" if merge else "set", self, document_data, None)])
+
+    def update(self, field_updates: dict, option=None) -> None:
+        self._client._commit({}, [("update", self, field_updates, option)])
+
+    def delete(self, option=None) -> None:
+        self._client._commit({}, [("delete", self, None, option)])
+
+
+class FakeQuery:
+    def __init__(self, collection: "FakeCollectionReference", filters: tuple = (), limit: Optional[int] = None):
+        self._collection = collection
+        self._filters = filters
+        self._limit = limit
+
+    def where(self, field_path: Optional[str] = None, op_string: Optional[str] = None, value: Any = None,
+              filter=None) -> "FakeQuery":
+        condition = filter if filter is not None else FieldFilter(field_path, op_string, value)
+        return FakeQuery(self._collection, self._filters + (condition,), self._limit)
+
+    def limit(self, count: int) -> "FakeQuery":
+        return FakeQuery(self._collection, self._filters, count)
+
+    def stream(self, transaction: Optional["FakeTransaction"] = None, **kwargs) -> Iterator[DocumentSnapshot]:
+        snapshots = self._collection._client._query(self._collection, self._filters, self._limit)
+        if transaction is not None:
+            for snapshot in snapshots:
+                transaction._reads.setdefault(snapshot.reference.path, snapshot.update_time)
+        return iter(snapshots)
+
+    def get(self, transaction: Optional["FakeTransaction"] = None, **kwargs) -> List[DocumentSnapshot]:
+        return list(self.stream(transaction=transaction))
+
+
+class FakeCollectionReference(FakeQuery):
+    def __init__(self, client: "FakeFirestoreClient", collection_id: str):
+        super().__init__(self)
+        self.id = collection_id
+        self._client = client
+
+    def document(self, document_id: Optional[str] = None) -> FakeDocumentReference:
+        return FakeDocumentReference(self, document_id or uuid.uuid4().hex[:20])
+
+    def on_snapshot(self, callback: Callable) -> FakeWatch:
+        return self._client._watch(self, callback)
+
+
+class FakeWriteBatch:
+    def __init__(self, client: "FakeFirestoreClient"):
+        self._client = client
+        self._writes: List[tuple] = []
+
+    def __len__(self) -> int:
+        return len(self._writes)
+
+    def create(self, reference: FakeDocumentReference, document_data: dict) -> None:
+        self._writes.append(("create", reference, document_data, None))
+
+    def set(self, reference: FakeDocumentReference, document_data: dict, merge: bool = False) -> None:
+        self._writes.append(("merge" if merge else "set", reference, document_data, None))
+
+    def update(self, reference: FakeDocumentReference, field_updates: dict, option=None) -> None:
+        self._writes.append(("update", reference, field_updates, option))
+
+    def delete(self, reference: FakeDocumentReference, option=None) -> None:
+        self._writes.append(("delete", reference, None, option))
+
+    def commit(self, *args, **kwargs) -> list:
+        writes, self._writes = self._writes, []
+        self._client._commit({}, writes)
+        return []
+
+
+class FakeTransaction(FakeWriteBatch):
+    """
+    Buffers writes until commit, and aborts the commit if a document it read has changed since.
+
+    It has the attributes `firestore.transactional` drives, so transactional functions run
+    unchanged against the fake, including the retry when a commit is aborted.
+    """
+    def __init__(self, client: "FakeFirestoreClient", max_attempts: int = 5, read_only: bool = False):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._id = None
+        self._reads: Dict[str, Optional[datetime]] = {}
+
+    @property
+    def in_progress(self) -> bool:
+        return self._id is not None
+
+    def _clean_up(self) -> None:
+        self._id = None
+        self._reads = {}
+        self._writes = []
+
+    def _begin(self, retry_id=None) -> None:
+        self._id = uuid.uuid4().bytes
+
+    def _rollback(self) -> None:
+        self._clean_up()
+
+    def _commit(self) -> list:
+        try:
+            self._client._commit(self._reads, self._writes)
+        finally:
+            self._clean_up()
+        return []
+
+
+class FakeFirestoreClient:
+    """
+    An in-memory stand-in for `firestore.Client`, for tests of code that reads and writes Firestore.
+
+    It implements the subset of the client the tools use: document gets, batched gets and writes,
+    update time preconditions, batches, transactions, field filters, and snapshot
+    listeners, which are called synchronously after every write.
+    `reads` counts the document reads Firestore would bill, so tests can assert on them.
+    Code under test should use only these calls, so the same tests pass against the
+    Firestore emulator.
+    """
+    def __init__(self):
+        self.reads = 0
+        self._lock = threading.RLock()
+        self._documents: Dict[str, Dict[str, dict]] = {}
+        self._times: Dict[str, tuple[datetime, datetime]] = {}
+        self._watches: List[FakeWatch] = []
+        self._clock = datetime.now(timezone.utc)
+
+    write_option = staticmethod(BaseClient.write_option)
+
+    def collection(self, collection_id: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self, collection_id)
+
+    def _tick(self) -> datetime:
+        # Every write gets a distinct update time, as in Firestore
+        self._clock += timedelta(microseconds=1)
+        return self._clock
+
+    def _snapshot(self, ref: FakeDocumentReference) -> DocumentSnapshot:
+        data = self._documents.get(ref.parent.id, {}).get(ref.id)
+        created, updated = self._times.get(ref.path, (None, None))
+        return DocumentSnapshot(ref, data, data is not None, self._clock, created, updated)
+
+    def _get(self, ref: FakeDocumentReference) -> DocumentSnapshot:
+        with self._lock:
+            self.reads += 1
+            return self._snapshot(ref)
+
+    def _query(self, collection: FakeCollectionReference, filters: tuple, limit: Optional[int]) -> List[DocumentSnapshot]:
+        with self._lock:
+            refs = [collection.document(document_id)
+                    for document_id, data in sorted(self._documents.get(collection.id, {}).items())
+                    if all(_matches(data, condition) for condition in filters)]
+            refs = refs[:limit] if limit is not None else refs
+            self.reads += max(len(refs), 1)
+            return [self._snapshot(ref) for ref in refs]
+
+    def get_all(self, references: List[FakeDocumentReference], field_paths=None,
+                transaction: Optional[FakeTransaction] = None, **kwargs) -> Iterator[DocumentSnapshot]:
+        with self._lock:
+            self.reads += len(references)
+            snapshots = [self._snapshot(ref) for ref in references]
+        if transaction is not None:
+            for ref, snapshot in zip(references, snapshots):
+                transaction._reads.setdefault(ref.path, snapshot.update_time)
+        return iter(snapshots)
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def transaction(self, max_attempts: int = 5, read_only: bool = False) -> FakeTransaction:
+        return FakeTransaction(self, max_attempts, read_only)
+
+    def _commit(self, reads: Dict[str, Optional[datetime]], writes: List[tuple]) -> None:
+        """Applies writes atomically, after checking that no document read since changed."""
+        notifications = []
+        with self._lock:
+            for path, update_time in reads.items():
+                if self._times.get(path, (None, None))[1] != update_time:
+                    raise Aborted(f"Transaction aborted, {path} was modified concurrently.")
+            for kind, ref, _, option in writes:
+                exists = ref.id in self._documents.get(ref.parent.id, {})
+                if kind == "create" and exists:
+                    raise AlreadyExists(f"Document already exists: {ref.path}")
+                if kind == "update" and not exists:
+                    raise NotFound(f"No document to update: {ref.path}")
+                last_update_time = getattr(option, "_last_update_time", None)
+                if last_update_time is not None and self._times.get(ref.path, (None, None))[1] != last_update_time:
+                    raise FailedPrecondition(f"The document was updated since {last_update_time}: {ref.path}")
+
+            now = self._tick()
+            for kind, ref, data, _ in writes:
+                documents = self._documents.setdefault(ref.parent.id, {})
+                existing = documents.get(ref.id)
+                if kind == "delete":
+                    if existing is not None:
+                        notifications.append((ref, ChangeType.REMOVED, self._snapshot(ref)))
+                        del documents[ref.id]
+                        self._times.pop(ref.path, None)
+                    continue
+                document = copy.deepcopy(existing) if kind in ("merge", "update") and existing is not None else {}
+                document.update(copy.deepcopy(data))
+                documents[ref.id] = document
+                self._times[ref.path] = (self._times.get(ref.path, (now,))[0], now)
+                notifications.append((ref, ChangeType.MODIFIED if existing is not None else ChangeType.ADDED, None))
+        for ref, change_type, snapshot in notifications:
+            self._notify(ref, change_type, snapshot)
+
+    def _watch(self, collection: FakeCollectionReference, callback: Callable) -> FakeWatch:
+        watch = FakeWatch(collection, callback)
+        with self._lock:
+            self._watches.append(watch)
+            docs = [self._snapshot(collection.document(document_id))
+                    for document_id in sorted(self._documents.get(collection.id, {}))]
+            self.reads += len(docs)
+        changes = [DocumentChange(ChangeType.ADDED, doc, -1, i) for i, doc in enumerate(docs)]
+        callback(docs, changes, self._clock)
+        return watch
+
+    def _unwatch(self, watch: FakeWatch) -> None:
+        with self._lock:
+            if watch in self._watches:
+                self._watches.remove(watch)
+
+    def _notify(self, ref: FakeDocumentReference, change_type: ChangeType,
+                snapshot: Optional[DocumentSnapshot] = None) -> None:
+        with self._lock:
+            watches = [watch for watch in self._watches if watch.collection.id == ref.parent.id]
+            if not watches:
+                return
+            snapshot = snapshot or self._snapshot(ref)
+            docs = [self._snapshot(ref.parent.document(document_id))
+                    for document_id in sorted(self._documents.get(ref.parent.id, {}))]
+            self.reads += len(watches)
+        change = DocumentChange(change_type, snapshot, -1, -1)
+        for watch in watches:
+            watch.callback(docs, [change], self._clock)
@@ -0,0 +1,83 @@
+import hashlib
+import os
+import time
+import uuid
+from typing import Optional
+
+from google.api_core.exceptions import Conflict, NotFound
+from google.cloud import bigquery
+
+from .sql_text import sql_hash
+
+JOB_ID_PREFIX = "concord"
+
+# Identical queries from the same user and session within this window share one job
+JOB_REUSE_WINDOW_SECONDS = int(os.environ.get("CONCORD_JOB_REUSE_WINDOW_SECONDS", "900"))
+
+# A reattached job that failed is resubmitted under a numbered job id, at most this many times
+MAX_JOB_ATTEMPTS = 3
+
+
+def job_id_for(query: str, session_id: Optional[str] = None, parameters: Optional[dict] = None,
+               now: Optional[float] = None, user_id: Optional[str] = None) -> str:
+    """
+    Derives a deterministic BigQuery job id for a query.
+
+    The id combines the SQL hash, including any parameter values, the user, the session
+    and the current reuse window, so a retry of the same query in the same session maps
+    to the job that is already running or finished instead of starting a duplicate.
+    Callers with neither a user nor a session get a random id, so they never share jobs.
+
+    Args:
+        query: The SQL statement.
+        session_id: The agent session the query runs in, if known.
+        parameters: Optional mapping of query parameter names to values.
+        now: The current time, defaults to time.time().
+        user_id: The user running the query, if known.
+    Returns:
+        A valid BigQuery job id.
+    """
+    window = int((now if now is not None else time.time()) // JOB_REUSE_WINDOW_SECONDS)
+    if user_id is None and session_id is None:
+        caller = uuid.uuid4().hex[:12]
+    else:
+        caller = hashlib.sha256(f"{user_id or ''}\0{session_id or ''}".encode("utf-8")).hexdigest()[:12]
+    return f"{JOB_ID_PREFIX}_{sql_hash(query, parameters)[:32]}_{caller}_{window}"
+
+
+def _failed(query_job: bigquery.QueryJob) -> bool:
+    return query_job.state == "DONE" and query_job.error_result is not None
+
+
+def submit_query(client: bigquery.Client, query: str, job_id: str,
+                 job_config: Optional[bigquery.QueryJobConfig] = None,
+                 timeout: Optional[float] = None) -> bigquery.QueryJob:
+    """
+    Submits a query under a deterministic job id, reattaching to the job if it already exists.
+
+    A job id can only be used once, so when the existing job has failed the query is
+    resubmitted under the next numbered id, e.g. `<job_id>_2`.
+
+    Args:
+        client: The BigQuery client.
+        query: The SQL statement.
+        job_id: The job id, see `job_id_for`.
+        job_config: Optional job configuration, e.g. query parameters.
+        timeout: The timeout of the API request in seconds.
+    Returns:
+        The new or the reattached job.
+    """
+    for attempt in range(1, MAX_JOB_ATTEMPTS + 1):
+        attempt_id = job_id if attempt == 1 else f"{job_id}_{attempt}"
+        try:
+            return client.query(query, job_config=job_config, job_id=attempt_id, timeout=timeout)
+        except Conflict:
+            try:
+                query_job = client.get_job(attempt_id, location=client.location, timeout=timeout)
+            except NotFound:
+                # The insert conflicted but the job is not visible yet, try the next id
+                continue
+            if not _failed(query_job):
+                print(f"Reattached to job {attempt_id}.")
+                return query_job
+    return client.query(query, job_config=job_config, job_id_prefix=f"{job_id}_", timeout=timeout)
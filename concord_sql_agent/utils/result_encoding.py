@@ -0,0 +1,127 @@
+import base64
+import decimal
+import json
+from typing import Literal
+
+import pandas as pd
+import pyarrow as pa
+
+OutputFormat = Literal["auto", "markdown", "csv", "json", "arrow", "summary"]
+
+OUTPUT_FORMATS = ("auto", "markdown", "csv", "json", "arrow", "summary")
+
+# Results up to this many cells are small enough to render as a markdown table
+MARKDOWN_MAX_CELLS = 1000
+
+# Results whose CSV encoding stays below this size are returned in full as CSV
+CSV_MAX_BYTES = 32 * 1024
+
+# The summary shows this many leading rows, so its size does not grow with the result
+SUMMARY_ROWS = 20
+
+# Rows rendered to estimate the encoded size of a result without encoding all of it
+_SAMPLE_ROWS = 100
+
+_FLOAT_FORMAT = ",.2f"
+
+
+def estimate_csv_bytes(df: pd.DataFrame) -> int:
+    """Estimates the size of the CSV encoding of a result by encoding a leading sample of its rows."""
+    if df.empty:
+        return len(",".join(map(str, df.columns)))
+    sample = df.head(_SAMPLE_ROWS)
+    sample_bytes = len(sample.to_csv(index=False))
+    return int(sample_bytes / len(sample) * len(df))
+
+
+def choose_format(df: pd.DataFrame) -> OutputFormat:
+    """
+    Picks the encoding of a result from its row and byte counts.
+
+    Small results are rendered as markdown tables, medium ones as compact CSV, and
+    anything larger is truncated to a markdown summary so the response stays bounded.
+    """
+    if df.size <= MARKDOWN_MAX_CELLS:
+        return "markdown"
+    if estimate_csv_bytes(df) <= CSV_MAX_BYTES:
+        return "csv"
+    return "summary"
+
+
+def to_markdown(df: pd.DataFrame) -> str:
+    return df.to_markdown(index=False, floatfmt=_FLOAT_FORMAT)
+
+
+def to_csv(df: pd.DataFrame) -> str:
+    return df.to_csv(index=False)
+
+
+def to_columnar_json(df: pd.DataFrame) -> str:
+    """Encodes a result as one JSON array per column, which repeats no keys per row."""
+    columns = {str(name): df[name].astype(object).where(df[name].notna(), None).tolist() for name in df.columns}
+    return json.dumps({"row_count": len(df), "columns": columns}, default=str, separators=(",", ":"))
+
+
+def to_arrow_ipc(df: pd.DataFrame) -> bytes:
+    """Encodes a result as an Arrow IPC stream, the lossless handoff format between tools."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def from_arrow_ipc(data: bytes) -> pd.DataFrame:
+    """Decodes a result encoded by `to_arrow_ipc`."""
+    return pa.ipc.open_stream(data).read_all().to_pandas()
+
+
+def _numeric_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Returns the numeric columns, with BigQuery NUMERIC and BIGNUMERIC columns of Decimals as floats."""
+    numeric = df.select_dtypes("number")
+    decimals = {name for name in df.columns[df.dtypes == object]
+                if (values := df[name].dropna()).size and all(isinstance(v, decimal.Decimal) for v in values)}
+    if not decimals:
+        return numeric
+    columns = [name for name in df.columns if name in numeric.columns or name in decimals]
+    return df[columns].apply(lambda column: pd.to_numeric(column) if column.name in decimals else column)
+
+
+def to_summary(df: pd.DataFrame, rows: int = SUMMARY_ROWS) -> str:
+    """Renders the leading rows of a result followed by statistics of its numeric columns."""
+    parts = [f"Showing the first {min(rows, len(df))} of {len(df):,} rows and {len(df.columns)} columns.",
+             to_markdown(df.head(rows))]
+    numeric = _numeric_columns(df)
+    if not numeric.empty:
+        stats = numeric.agg(["count", "sum", "min", "mean", "max"]).T.reset_index(names="column")
+        parts.append("Summary of the numeric columns over all rows:\n" + to_markdown(stats))
+    return "\n\n".join(parts)
+
+
+def encode_results(df: pd.DataFrame, output_format: OutputFormat = "auto") -> str:
+    """
+    Encodes a query result for a tool response.
+
+    Args:
+        df: The query result.
+        output_format: One of auto, markdown, csv, json, arrow or summary. Auto picks
+            the encoding from the size of the result, arrow returns a base64 encoded
+            Arrow IPC stream.
+    Returns:
+        The encoded result.
+    Raises:
+        ValueError: If the output format is unknown.
+    """
+    if output_format == "auto":
+        output_format = choose_format(df)
+    if output_format == "markdown":
+        return to_markdown(df)
+    if output_format == "csv":
+        return to_csv(df)
+    if output_format == "json":
+        return to_columnar_json(df)
+    if output_format == "arrow":
+        return base64.b64encode(to_arrow_ipc(df)).decode("ascii")
+    if output_format == "summary":
+        return to_summary(df)
+    raise ValueError(f"Unknown output format '{output_format}', expected one of {', '.join(OUTPUT_FORMATS)}.")
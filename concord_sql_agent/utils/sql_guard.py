@@ -0,0 +1,102 @@
+import re
+from typing import List
+
+from .sql_text import _tokens, masked_sql
+
+_READ_ONLY_STATEMENTS = ("SELECT", "WITH")
+
+# Statements that change data, schema or permissions, or run dynamic SQL. Checked over the
+# whole statement so they cannot hide behind a leading SELECT, column references such as
+# t.update are not keywords.
+_FORBIDDEN_RE = re.compile(r"""(?=[IDUMTCAGREL])(?<![.\w])(
+      INSERT\s+(?:INTO\s+)?[\w`]
+    | DELETE\s+(?:FROM\s+)?[\w`]
+    | UPDATE\s+[\w`.\-]+\s+(?:\w+\s+)?SET\b
+    | MERGE\s+(?:INTO\s+)?[\w`]
+    | TRUNCATE\s+TABLE
+    | (?:CREATE|DROP|ALTER|UNDROP)\s+(?:OR\s+REPLACE\s+|TEMP\s+|TEMPORARY\s+|EXTERNAL\s+|MATERIALIZED\s+|SNAPSHOT\s+)*
+        (?:TABLE|VIEW|SCHEMA|FUNCTION|PROCEDURE|MODEL|ROW\s+ACCESS\s+POLICY|SEARCH\s+INDEX|VECTOR\s+INDEX|CAPACITY|RESERVATION|ASSIGNMENT)
+    | GRANT\s+[\w`"]
+    | REVOKE\s+[\w`"]
+    | EXECUTE\s+IMMEDIATE
+    | EXPORT\s+DATA
+    | LOAD\s+DATA
+)""", re.IGNORECASE | re.VERBOSE)
+
+# SELECT * directly from a table, selecting everything from a subquery or CTE costs nothing extra
+_SELECT_STAR_RE = re.compile(r"\bSELECT\s+(?:DISTINCT\s+)?\*\s+FROM\s+(?:`|\w[\w\-]*\.)", re.IGNORECASE)
+_ORDER_BY_RE = re.compile(r"\bORDER\s+BY\b", re.IGNORECASE)
+_LIMIT_RE = re.compile(r"\bLIMIT\s+\d+", re.IGNORECASE)
+
+
+class SqlGuardError(ValueError):
+    """Raised when a statement is not a single read-only query."""
+
+
+def _statements(masked: str) -> List[str]:
+    """
+    Splits masked SQL on semicolons outside of literals and quoted identifiers. Quoted
+    identifiers are blanked out, so a table named e.g. `drop table` cannot trip the keyword scan.
+    """
+    statements, current = [], []
+    for kind, text in _tokens(masked):
+        if kind == "ident":
+            current.append("``")
+        elif kind == "code" and ";" in text:
+            pieces = text.split(";")
+            current.append(pieces[0])
+            for piece in pieces[1:]:
+                statements.append("".join(current))
+                current = [piece]
+        else:
+            current.append(text)
+    statements.append("".join(current))
+    return [statement.strip() for statement in statements if statement.strip()]
+
+
+def check_read_only(query: str) -> None:
+    """
+    Verifies that a query is a single read-only SELECT or WITH statement.
+
+    The check is lexical: comments are dropped and string literals emptied before the
+    statement is inspected, so keywords hidden in either cannot affect the decision.
+
+    Args:
+        query: The SQL statement to check.
+    Raises:
+        SqlGuardError: If the query is empty, a multi-statement script, or not read-only.
+    """
+    statements = _statements(masked_sql(query))
+    if not statements:
+        raise SqlGuardError("The query is empty.")
+    if len(statements) > 1:
+        raise SqlGuardError("Only a single statement can be executed, the query contains "
+                            f"{len(statements)} statements.")
+
+    code = statements[0]
+    first_word = re.match(r"[\s(]*(\w+)", code)
+    if not first_word or first_word.group(1).upper() not in _READ_ONLY_STATEMENTS:
+        raise SqlGuardError("Only read-only (SELECT) queries are allowed.")
+
+    forbidden = _FORBIDDEN_RE.search(code)
+    if forbidden:
+        keyword = forbidden.group(1).split()[0].upper()
+        raise SqlGuardError(f"Only read-only (SELECT) queries are allowed, the query contains {keyword}.")
+
+
+def lint_sql(query: str) -> List[str]:
+    """
+    Returns advice for a read-only query that is valid but likely wasteful.
+
+    Args:
+        query: The SQL statement to lint.
+    Returns:
+        A list of human readable findings, empty when there are none.
+    """
+    code = " ".join(_statements(masked_sql(query)))
+    findings = []
+    if _SELECT_STAR_RE.search(code):
+        findings.append("SELECT * scans every column of the table, select only the columns needed.")
+    if _ORDER_BY_RE.search(code) and not _LIMIT_RE.search(code):
+        findings.append("ORDER BY without LIMIT sorts the whole result, add a LIMIT if only the top rows are needed.")
+    return findings
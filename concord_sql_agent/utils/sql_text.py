@@ -0,0 +1,116 @@
+import hashlib
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+# Lexical tokens that must be preserved verbatim (literals and quoted identifiers),
+# or that carry no meaning for execution (comments). The code between them, including
+# its whitespace, is handled in whole runs rather than token by token. The lookahead lets
+# the scanner skip every position that cannot start one of these tokens.
+_TOKEN_RE = re.compile(r"""
+    (?=[rRbB'"`\#/\-])
+    (?:
+      (?P<string>[rRbB]?'''.*?'''|[rRbB]?\"\"\".*?\"\"\"|[rRbB]?'(?:[^'\\\n]|\\.)*'|[rRbB]?"(?:[^"\\\n]|\\.)*")
+    | (?P<ident>`[^`]*`)
+    | (?P<comment>--[^\n]*|\#[^\n]*|/\*.*?\*/)
+    )
+""", re.VERBOSE | re.DOTALL)
+
+_SPACE_RE = re.compile(r"\s+")
+
+_TABLE_REF_RE = re.compile(r"\b(?:FROM|JOIN)\s+(`[^`]+`|[A-Za-z_][\w\-]*(?:\.[A-Za-z_][\w\-]*){1,2})", re.IGNORECASE)
+
+_NON_DETERMINISTIC_RE = re.compile(
+    r"\b(CURRENT_DATE|CURRENT_DATETIME|CURRENT_TIMESTAMP|CURRENT_TIME)\b", re.IGNORECASE)
+
+_UNCACHEABLE_RE = re.compile(r"\b(RAND|GENERATE_UUID|SESSION_USER)\s*\(", re.IGNORECASE)
+
+
+def _tokens(query: str):
+    """Yields (kind, text) pairs where kind is one of string, ident, comment or code."""
+    pos = 0
+    for match in _TOKEN_RE.finditer(query):
+        if match.start() > pos:
+            yield "code", query[pos:match.start()]
+        yield match.lastgroup, match.group()
+        pos = match.end()
+    if pos < len(query):
+        yield "code", query[pos:]
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Normalizes SQL text so that formatting differences do not change its identity.
+
+    Comments are removed, runs of whitespace are collapsed to a single space and trailing
+    semicolons are dropped. String literals and quoted identifiers are kept verbatim, and
+    no case folding is applied since BigQuery table names are case-sensitive.
+
+    Args:
+        query: The SQL statement to normalize.
+    Returns:
+        The normalized SQL text.
+    """
+    parts: List[str] = []
+    code: List[str] = []
+    for kind, text in _tokens(query):
+        if kind in ("string", "ident"):
+            parts.append(_SPACE_RE.sub(" ", "".join(code)))
+            parts.append(text)
+            code = []
+        else:
+            code.append(" " if kind == "comment" else text)
+    parts.append(_SPACE_RE.sub(" ", "".join(code)))
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def masked_sql(query: str) -> str:
+    """
+    Returns the normalized SQL with string literals replaced by empty literals, so keyword
+    and table scans cannot be fooled by the contents of a string.
+    """
+    parts: List[str] = []
+    for kind, text in _tokens(normalize_sql(query)):
+        parts.append("''" if kind == "string" else text)
+    return "".join(parts)
+
+
+def sql_hash(query: str, parameters: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Computes a stable hash of the normalized SQL text and, when given, its query parameters.
+
+    Args:
+        query: The SQL statement.
+        parameters: Optional mapping of query parameter names to values.
+    Returns:
+        A hex encoded sha256 digest.
+    """
+    digest = hashlib.sha256(normalize_sql(query).encode("utf-8"))
+    if parameters:
+        digest.update(json.dumps(parameters, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def referenced_tables(query: str) -> List[str]:
+    """
+    Lists the fully qualified tables a query reads from, in order of first appearance.
+
+    Only references following FROM or JOIN are considered, which excludes nested column
+    paths such as `usd_revenue_metrics.sales_revenue.sales_revenue`.
+    """
+    tables: List[str] = []
+    for match in _TABLE_REF_RE.finditer(masked_sql(query)):
+        ref = match.group(1).strip("`")
+        if ref.count(".") == 2 and ref not in tables:
+            tables.append(ref)
+    return tables
+
+
+def is_deterministic(query: str) -> bool:
+    """Returns False when the query depends on the current date or time."""
+    return _NON_DETERMINISTIC_RE.search(masked_sql(query)) is None
+
+
+def is_cacheable(query: str) -> bool:
+    """Returns False when the query produces different results on every run."""
+    return _UNCACHEABLE_RE.search(masked_sql(query)) is None
@@ -0,0 +1,116 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from concord_sql_agent.utils.credentials import CachedToken, CachedTokenCredentials, FakeTokenSource
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_is_cached_until_refresh_margin():
+    clock = FakeClock()
+    source = FakeTokenSource(lifetime_seconds=3600, clock=clock)
+    cached = CachedToken(source, refresh_margin_seconds=300, clock=clock)
+
+    assert cached.get() == "fake-token-1"
+    clock.now += 3000
+    assert cached.get() == "fake-token-1"
+    assert source.fetches == 1
+
+
+def test_refresh_margin_serves_current_token_and_refreshes_in_background():
+    clock = FakeClock()
+    source = FakeTokenSource(lifetime_seconds=3600, delay_seconds=0.05, clock=clock)
+    cached = CachedToken(source, refresh_margin_seconds=300, min_validity_seconds=30, clock=clock)
+    cached.get()
+
+    clock.now += 3400
+    assert cached.get() == "fake-token-1"
+
+    deadline = time.time() + 2
+    while source.fetches < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.01)
+    assert cached.get() == "fake-token-2"
+
+
+def test_concurrent_callers_share_one_refresh():
+    source = FakeTokenSource(delay_seconds=0.1)
+    cached = CachedToken(source)
+    results = []
+
+    def worker():
+        results.append(cached.get())
+
+    threads = [threading.Thread(target=worker) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert source.fetches == 1
+    assert set(results) == {"fake-token-1"}
+
+
+def test_expired_token_blocks_on_refresh():
+    clock = FakeClock()
+    source = FakeTokenSource(lifetime_seconds=60, clock=clock)
+    cached = CachedToken(source, refresh_margin_seconds=30, min_validity_seconds=10, clock=clock)
+    cached.get()
+
+    clock.now += 55
+    assert cached.get() == "fake-token-2"
+
+
+def test_failed_refresh_is_raised_to_every_waiter():
+    class FailingSource:
+        def __init__(self):
+            self.fetches = 0
+
+        def fetch(self):
+            self.fetches += 1
+            time.sleep(0.1)
+            raise RuntimeError("metadata server unavailable")
+
+    source = FailingSource()
+    cached = CachedToken(source)
+    errors = []
+
+    def worker():
+        try:
+            cached.get()
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert source.fetches == 1
+    assert len(errors) == 10
+
+    with pytest.raises(RuntimeError):
+        cached.get()
+    assert source.fetches == 2
+
+
+def test_credentials_take_their_token_from_the_cache():
+    clock = FakeClock()
+    source = FakeTokenSource(lifetime_seconds=3600, clock=clock)
+    credentials = CachedTokenCredentials(CachedToken(source, clock=clock))
+
+    credentials.refresh(None)
+    assert credentials.token == "fake-token-1"
+    assert credentials.expiry == datetime.fromtimestamp(clock.now + 3600, timezone.utc).replace(tzinfo=None)
+    credentials.refresh(None)
+    assert source.fetches == 1
@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+from google.api_core.exceptions import Conflict, NotFound
+
+from concord_sql_agent.utils.jobs import JOB_REUSE_WINDOW_SECONDS, job_id_for, submit_query
+
+NOW = 1_000 * JOB_REUSE_WINDOW_SECONDS
+
+
+class FakeClient:
+    """Keeps jobs by id and, like BigQuery, refuses to insert a job id twice."""
+    location = "US"
+
+    def __init__(self, failed=(), invisible=()):
+        self.jobs = {}
+        self.failed = set(failed)
+        self.invisible = set(invisible)
+        self.submitted = []
+
+    def query(self, query, job_config=None, job_id=None, job_id_prefix=None, timeout=None):
+        job_id = job_id or f"{job_id_prefix}random"
+        self.submitted.append(job_id)
+        if job_id in self.jobs or job_id in self.invisible:
+            raise Conflict(f"Already Exists: Job {job_id}")
+        failed = job_id in self.failed
+        self.jobs[job_id] = SimpleNamespace(job_id=job_id, state="DONE" if failed else "RUNNING",
+                                            error_result={"reason": "invalid"} if failed else None)
+        return self.jobs[job_id]
+
+    def get_job(self, job_id, location=None, timeout=None):
+        if job_id not in self.jobs:
+            raise NotFound(f"Not found: Job {job_id}")
+        return self.jobs[job_id]
+
+
+def test_job_ids_are_shared_within_a_user_session_and_reuse_window():
+    job_id = job_id_for("SELECT 1", "session-1", now=NOW, user_id="alice")
+    assert job_id_for("SELECT 1", "session-1", now=NOW + JOB_REUSE_WINDOW_SECONDS - 1, user_id="alice") == job_id
+    assert job_id_for("SELECT 1", "session-1", now=NOW + JOB_REUSE_WINDOW_SECONDS, user_id="alice") != job_id
+    assert job_id_for("SELECT 1", "session-1", now=NOW, user_id="bob") != job_id
+    assert job_id_for("SELECT 1", "session-2", now=NOW, user_id="alice") != job_id
+    assert job_id_for("SELECT 2", "session-1", now=NOW, user_id="alice") != job_id
+    assert job_id_for("SELECT 1", "session-1", {"a": 1}, now=NOW, user_id="alice") != job_id
+
+
+def test_callers_without_user_or_session_never_share_jobs():
+    assert job_id_for("SELECT 1", now=NOW) != job_id_for("SELECT 1", now=NOW)
+    assert job_id_for("SELECT 1", now=NOW, user_id="alice") == job_id_for("SELECT 1", now=NOW, user_id="alice")
+
+
+def test_retry_reattaches_to_the_running_job():
+    client = FakeClient()
+    first = submit_query(client, "SELECT 1", "job")
+    assert submit_query(client, "SELECT 1", "job") is first
+    assert client.submitted == ["job", "job"]
+
+
+def test_failed_jobs_are_resubmitted_under_numbered_ids():
+    client = FakeClient(failed={"job"})
+    submit_query(client, "SELECT 1", "job")
+    retried = submit_query(client, "SELECT 1", "job")
+    assert retried.job_id == "job_2"
+    assert submit_query(client, "SELECT 1", "job") is retried
+
+
+def test_invisible_conflicts_and_exhausted_attempts_fall_back_to_a_prefixed_id():
+    client = FakeClient(failed={"job", "job_3"}, invisible={"job_2"})
+    client.query("SELECT 1", job_id="job")
+    client.query("SELECT 1", job_id="job_3")
+    query_job = submit_query(client, "SELECT 1", "job")
+    assert query_job.job_id == "job_random"
+    assert client.submitted[2:] == ["job", "job_2", "job_3", "job_random"]
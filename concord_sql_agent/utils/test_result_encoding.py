@@ -0,0 +1,42 @@
+import decimal
+import json
+
+import numpy as np
+import pandas as pd
+
+from concord_sql_agent.utils.result_encoding import (CSV_MAX_BYTES, MARKDOWN_MAX_CELLS, SUMMARY_ROWS, choose_format,
+                                                     encode_results, from_arrow_ipc, to_arrow_ipc)
+
+
+def frame(rows: int, columns: int = 4) -> pd.DataFrame:
+    return pd.DataFrame(np.arange(rows * columns, dtype="float64").reshape(rows, columns),
+                        columns=[f"c{i}" for i in range(columns)])
+
+
+def test_format_is_chosen_by_size():
+    assert choose_format(frame(MARKDOWN_MAX_CELLS // 4)) == "markdown"
+    assert choose_format(frame(MARKDOWN_MAX_CELLS // 4 + 1)) == "csv"
+    assert choose_format(frame(CSV_MAX_BYTES)) == "summary"
+
+
+def test_summary_size_does_not_grow_with_the_result():
+    small = encode_results(frame(10_000), "summary")
+    large = encode_results(frame(1_000_000), "summary")
+    assert abs(len(large) - len(small)) < 0.2 * len(small)
+    assert f"first {SUMMARY_ROWS} of 1,000,000 rows" in large
+
+
+def test_columnar_json_and_arrow_are_lossless():
+    df = pd.DataFrame({"name": ["a", None], "amount": [1.123456789, np.nan]})
+    decoded = json.loads(encode_results(df, "json"))
+    assert decoded == {"row_count": 2, "columns": {"name": ["a", None], "amount": [1.123456789, None]}}
+    pd.testing.assert_frame_equal(from_arrow_ipc(to_arrow_ipc(df)), df)
+
+
+def test_summary_includes_decimal_columns():
+    df = pd.DataFrame({"account": ["a", "b", "c"],
+                       "revenue": [decimal.Decimal("1.50"), None, decimal.Decimal("2.25")]})
+    summary = encode_results(df, "summary")
+    assert "Summary of the numeric columns" in summary
+    assert "revenue" in summary.split("Summary of the numeric columns")[1]
+    assert "3.75" in summary
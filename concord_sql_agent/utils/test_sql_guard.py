@@ -0,0 +1,39 @@
+import pytest
+
+from concord_sql_agent.utils.sql_guard import SqlGuardError, check_read_only, lint_sql
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT 1",
+    "  select * from `concord-prod.ds.t` where name = 'DROP TABLE x; DELETE FROM y'  ;",
+    "WITH a AS (SELECT 1 AS x) SELECT x FROM a",
+    "(SELECT 1) UNION ALL (SELECT 2)",
+    "-- DELETE FROM t\nSELECT update_time, deleted FROM `ds.delete from`",
+    "SELECT t.set, t.call FROM ds.t AS t",
+])
+def test_read_only_queries_are_allowed(query):
+    check_read_only(query)
+
+
+@pytest.mark.parametrize("query", [
+    "",
+    "-- only a comment",
+    "DELETE FROM ds.t WHERE true",
+    "UPDATE ds.t SET a = 1 WHERE true",
+    "INSERT INTO ds.t VALUES (1)",
+    "MERGE ds.t USING ds.s ON false WHEN NOT MATCHED THEN INSERT ROW",
+    "CREATE OR REPLACE TABLE ds.t AS SELECT 1",
+    "SELECT 1; DROP TABLE ds.t",
+    "SELECT 1 /* ; */; SELECT 2",
+    "EXPORT DATA OPTIONS(uri='gs://b/*') AS SELECT 1",
+    "WITH a AS (SELECT 1) SELECT * FROM a; EXECUTE IMMEDIATE 'DROP TABLE ds.t'",
+    "DECLARE x INT64; SELECT x",
+])
+def test_everything_else_is_rejected(query):
+    with pytest.raises(SqlGuardError):
+        check_read_only(query)
+
+
+def test_lint_flags_select_star_and_unbounded_sort():
+    assert len(lint_sql("SELECT * FROM ds.t ORDER BY a")) == 2
+    assert lint_sql("SELECT a FROM ds.t ORDER BY a LIMIT 10") == []
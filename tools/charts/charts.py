@@ -1,17 +1,100 @@
 
 
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 import base64
-from io import BytesIO
-from typing import Optional
+import json
+from typing import List, Optional
 from tools.types import SalesTrajectoryResponse, Chart, StatusMessage
+from tools.charts.columnar import COLUMN_TYPES, ColumnarFallback, trajectory_columns
+from tools.charts.render_cache import chart_key, get_chart_cache
+from tools.charts.renderer import CHART_TYPES, IMAGE_FORMATS, ChartSpec, Series, get_chart_renderer
+from tools.charts.vega_lite import VEGA_LITE_MIME_TYPE, to_vega_lite
+
+# Image formats, and "vega-lite" for a spec the frontend draws
+OUTPUT_FORMATS = (*IMAGE_FORMATS, "vega-lite")
+
+
+def _validated_series(sales_trajectory: str, chart_type: str, x_axis: str, y_axis: str,
+                      group_by: Optional[str]) -> List[Series]:
+    # The row by row path, validating every row as a WeeklyRevenue
+    tj = SalesTrajectoryResponse.model_validate_json(sales_trajectory)
+
+    series = []
+    if tj and tj.data and tj.status.status == "success":
+        # Use a list comprehension to call .model_dump() on each Pydantic object
+        list_of_dicts = [entry.model_dump(by_alias=True) for entry in tj.data]
+        # Create the DataFrame from the list of dictionaries
+        df = pd.DataFrame(list_of_dicts)
+
+        # Convert date column and sort values for prettier line charts
+        if x_axis in df.columns:
+            df[x_axis] = pd.to_datetime(df[x_axis])
+            df = df.sort_values(by=x_axis)
+
+        if group_by and group_by in df.columns:
+            if chart_type not in ['line', 'scatter']:
+                raise ValueError(f"Grouping is only supported for 'line' and 'scatter' charts, not '{chart_type}'.")
+
+            for name, group in df.groupby(group_by):
+                series.append(Series(group[x_axis].to_numpy(), group[y_axis].to_numpy(), label=str(name)))
+        else:
+            series.append(Series(df[x_axis].to_numpy(), df[y_axis].to_numpy()))
+    return series
+
+
+def _columnar_series(sales_trajectory: str, chart_type: str, x_axis: str, y_axis: str,
+                     group_by: Optional[str]) -> List[Series]:
+    # The same series as _validated_series, built from column arrays without a model or dict per row
+    grouped = bool(group_by) and group_by in COLUMN_TYPES
+    columns = trajectory_columns(sales_trajectory, x_axis, y_axis, *([group_by] if grouped else []))
+    if columns is None:
+        return []
+
+    x, y = np.asarray(columns[x_axis]), np.asarray(columns[y_axis])
+    order = np.argsort(x, kind="stable")
+    if not grouped:
+        return [Series(x[order], y[order])]
+    if chart_type not in ['line', 'scatter']:
+        raise ValueError(f"Grouping is only supported for 'line' and 'scatter' charts, not '{chart_type}'.")
+
+    groups = columns[group_by]
+    if not isinstance(groups, pd.Categorical):
+        groups = pd.Categorical(groups)
+    codes = groups.codes[order]
+    # Rows ordered by group, and by x within each group, then split where the group changes
+    order = order[np.argsort(codes, kind="stable")]
+    codes = groups.codes[order]
+    bounds = np.flatnonzero(np.diff(codes)) + 1
+    return [Series(x[rows], y[rows], label=str(groups.categories[groups.codes[rows[0]]]))
+            for rows in np.split(order, bounds)]
+
+
+def _chart_spec(sales_trajectory: str, chart_type: str, x_axis: str, y_axis: str, title: str,
+                group_by: Optional[str], **options) -> ChartSpec:
+    if chart_type not in CHART_TYPES:
+        raise ValueError(f"Unsupported chart type: {chart_type}")
+
+    try:
+        series = _columnar_series(sales_trajectory, chart_type, x_axis, y_axis, group_by)
+    except ColumnarFallback:
+        # Values WeeklyRevenue would convert or reject, its validation handles them
+        series = _validated_series(sales_trajectory, chart_type, x_axis, y_axis, group_by)
+
+    legend = any(s.label is not None for s in series)
+    return ChartSpec(chart_type, series, title=title, x_label=x_axis, y_label=y_axis, legend=legend,
+                     legend_title=group_by if legend else "", **options)
 
 
-def create_chart_tool(sales_trajectory: str, chart_type: str = "bar", x_axis: str = 'revenue_usage_week', y_axis: str = 'revenue_revenue_sales', title: str = "Sales Trajectory", group_by: Optional[str] = None) -> Chart:
+def create_chart_tool(sales_trajectory: str, chart_type: str = "bar", x_axis: str = 'revenue_usage_week', y_axis: str = 'revenue_revenue_sales', title: str = "Sales Trajectory", group_by: Optional[str] = None,
+                      image_format: str = "png", width: float = 10, height: float = 6, dpi: int = 100) -> Chart:
     """
     Generates a chart from a SalesTrajectorResponse and returns its image as a base64 string.
 
+    Charts are cached by the hash of the payload and every parameter, so rendering the
+    same chart again costs a lookup. SVG and lossy WebP images are far smaller than a PNG,
+    and a Vega-Lite spec is not rendered on the server at all.
+
     Args:
         sales_trajectory (str): The response from sales trajectory calls.
         chart_type (str, optional): The type of chart (e.g., "bar", "line", "scatter"). Defaults to "bar".
@@ -19,68 +102,49 @@ def create_chart_tool(sales_trajectory: str, chart_type: str = "bar", x_axis: st
         y_axis (str, optional): The column for the y-axis. Defaults to 'revenue_revenue_sales'.
         title (str, optional): The chart title. Defaults to "Sales Trajectory".
         group_by (str, optional): The column to group by for multi-series charts. Defaults to None.
+        image_format (str, optional): "png", "webp", "svg", or "vega-lite" for a chart spec. Defaults to "png".
+        width (float, optional): The width in inches. Defaults to 10.
+        height (float, optional): The height in inches. Defaults to 6.
+        dpi (int, optional): Pixels per inch of PNG and WebP images. Defaults to 100.
 
     Returns:
-        dict: A dictionary containing the chart image as a base64 string and a description.
+        dict: A dictionary containing the chart image as a base64 string, or the Vega-Lite spec, and a description.
     """
     try:
-        # Create the chart using Matplotlib
-        plt.figure(figsize=(10, 6))
-
-        tj = SalesTrajectoryResponse.model_validate_json(sales_trajectory)
-
-        if tj and tj.data and tj.status == "success":
-            # Use a list comprehension to call .model_dump() on each Pydantic object
-            list_of_dicts = [entry.model_dump() for entry in tj.data]
-            # Create the DataFrame from the list of dictionaries
-            df = pd.DataFrame(list_of_dicts)
-            
-            # Convert date column and sort values for prettier line charts
-            if x_axis in df.columns:
-                df[x_axis] = pd.to_datetime(df[x_axis])
-                df = df.sort_values(by=x_axis)
-
-            if group_by and group_by in df.columns:
-                if chart_type not in ['line', 'scatter']:
-                    raise ValueError(f"Grouping is only supported for 'line' and 'scatter' charts, not '{chart_type}'.")
-                
-                for name, group in df.groupby(group_by):
-                    if chart_type == "line":
-                        plt.plot(group[x_axis], group[y_axis], label=name)
-                    elif chart_type == "scatter":
-                        plt.scatter(group[x_axis], group[y_axis], label=name)
-                plt.legend()
+        if image_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported image format: {image_format}, use one of {list(OUTPUT_FORMATS)}")
+        key = chart_key(sales_trajectory, chart_type=chart_type, x_axis=x_axis, y_axis=y_axis, title=title,
+                        group_by=group_by, image_format=image_format, width=width, height=height, dpi=dpi)
+        cache = get_chart_cache()
+        image = cache.get(key)
+        if image is None:
+            spec = _chart_spec(sales_trajectory, chart_type, x_axis, y_axis, title, group_by,
+                               figsize=(width, height), dpi=dpi,
+                               image_format=image_format if image_format in IMAGE_FORMATS else "png")
+            if image_format == "vega-lite":
+                image = json.dumps(to_vega_lite(spec), separators=(",", ":")).encode("utf-8")
             else:
-                if chart_type == "bar":
-                    plt.bar(df[x_axis], df[y_axis])
-                elif chart_type == "line":
-                    plt.plot(df[x_axis], df[y_axis])
-                elif chart_type == "scatter":
-                    plt.scatter(df[x_axis], df[y_axis])
-                else:
-                    raise ValueError(f"Unsupported chart type: {chart_type}")
-
-        plt.xlabel(x_axis)
-        plt.ylabel(y_axis)
-        plt.title(title)
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-
-        # Save the chart to a bytes buffer
-        buf = BytesIO()
-        plt.savefig(buf, format="png")
-        buf.seek(0)
-        img_base64 = base64.b64encode(buf.read()).decode("utf-8")
-        plt.close()
+                # Drawn on its own Figure in a worker process, so concurrent charts do not share pyplot's state
+                image = get_chart_renderer().render(spec)
+            cache.put(key, image)
         
         chart_description = f"A {chart_type} chart titled '{title}' showing {y_axis} against {x_axis}'."
         if group_by:
             chart_description += f" Grouped by {group_by}."
 
+        if image_format == "vega-lite":
+            return Chart(
+                status=StatusMessage(status="success", message="Chart spec generated successfully."),
+                chart_image=None,
+                chart_description=chart_description,
+                mime_type=VEGA_LITE_MIME_TYPE,
+                chart_spec=json.loads(image)
+            )
         return Chart(
             status=StatusMessage(status="success", message=f"Chart generated successfully."),
-            chart_image=img_base64,
-            chart_description=chart_description
+            chart_image=base64.b64encode(image).decode("utf-8"),
+            chart_description=chart_description,
+            mime_type=IMAGE_FORMATS[image_format]
         )
     except Exception as e:
         return Chart(
@@ -90,15 +154,18 @@ def create_chart_tool(sales_trajectory: str, chart_type: str = "bar", x_axis: st
         )
 
 
-def create_bar_chart(sales_trajectory: str) -> Chart:
+def create_bar_chart(sales_trajectory: str, image_format: str = "png") -> Chart:
     """
     Generates a bar chart from a Sales Trajectory and returns its image as a base64 string.
 
+    Bars are not grouped by product, grouping is only supported for line and scatter charts.
+
     Args:
         sales_trajectory (SalesTrajectoryResponse): The response from sales trajectory calls.
         x_axis (str, optional): The column to use for the x-axis. Defaults to None.
         y_axis (str, optional): The column to use for the y-axis. Defaults to None.
         title (str, optional): The chart title. Defaults to "Chart Title".
+        image_format (str, optional): "png", "webp", "svg", or "vega-lite" for a chart spec. Defaults to "png".
 
     Returns:
         dict: A dictionary containing the chart image as a base64 string and a description.
@@ -108,15 +175,16 @@ def create_bar_chart(sales_trajectory: str) -> Chart:
                              x_axis='revenue_usage_week',
                              y_axis='revenue_revenue_sales',
                              title='Sales Trajectory',
-                             group_by= "products_product")
+                             image_format=image_format)
 
 
-def create_line_chart(sales_trajectory: str) -> Chart:
+def create_line_chart(sales_trajectory: str, image_format: str = "png") -> Chart:
     """
     Generates a line chart from a Sales Trajectory JSON representation and returns its image as a base64 string.
 
     Args:
         sales_trajectory (str): The response from sales trajectory calls.
+        image_format (str, optional): "png", "webp", "svg", or "vega-lite" for a chart spec. Defaults to "png".
 
     Returns:
         dict: A dictionary containing the chart image as a base64 string and a description.
@@ -128,19 +196,21 @@ def create_line_chart(sales_trajectory: str) -> Chart:
         'revenue_usage_week', 
         'revenue_revenue_sales',
         title=title,
-        group_by= "products_product"
+        group_by= "products_product",
+        image_format=image_format
     )
 
 
-def create_scatter_chart(sales_trajectory: str) -> Chart:
+def create_scatter_chart(sales_trajectory: str, image_format: str = "png") -> Chart:
     """
     Generates a scatter chart from a Sales Trajectory and returns its image as a base64 string.
 
     Args:
         sales_trajectory (str): The json representation of s sale trajectory
+        image_format (str, optional): "png", "webp", "svg", or "vega-lite" for a chart spec. Defaults to "png".
 
     Returns:
         dict: A dictionary containing the chart image as a base64 string and a description.
     """
-    return create_chart_tool(sales_trajectory, "scatter", 'revenue_usage_week', 'revenue_revenue_sales', "Sales Trajectory",  group_by= "products_product")
+    return create_chart_tool(sales_trajectory, "scatter", 'revenue_usage_week', 'revenue_revenue_sales', "Sales Trajectory",  group_by= "products_product", image_format=image_format)
 
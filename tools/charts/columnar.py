@@ -0,0 +1,76 @@
+import datetime
+import json
+from typing import Dict, Optional, get_args
+
+import numpy as np
+import pandas as pd
+
+from tools.types import ProductEnum, StatusMessage, WeeklyRevenue
+
+# The type of every WeeklyRevenue column, by the alias the payload uses
+COLUMN_TYPES = {field.alias: next(t for t in get_args(field.annotation) or (field.annotation,) if t is not type(None))
+                for field in WeeklyRevenue.model_fields.values()}
+_REQUIRED = [field.alias for field in WeeklyRevenue.model_fields.values() if field.is_required()]
+_PRODUCTS = pd.Index(sorted(product.value for product in ProductEnum))
+
+
+class ColumnarFallback(ValueError):
+    """Raised when a payload needs the row by row validation of WeeklyRevenue."""
+
+
+def _column(values: list, column_type) -> np.ndarray:
+    if column_type is datetime.date:
+        try:
+            array = np.array(values, dtype="datetime64[D]")
+        except (TypeError, ValueError) as e:
+            raise ColumnarFallback(str(e))
+        if np.isnat(array).any():
+            raise ColumnarFallback("A date is missing.")
+        return array
+    if column_type is float:
+        try:
+            return np.array(values, dtype=np.float64)
+        except (TypeError, ValueError) as e:
+            raise ColumnarFallback(str(e))
+    if column_type is ProductEnum:
+        # Category codes over the products in name order, the order groups are drawn in
+        codes = _PRODUCTS.get_indexer(values)
+        if (codes < 0).any():
+            raise ColumnarFallback("A product is not a known product, or is padded with whitespace.")
+        return pd.Categorical.from_codes(codes, categories=_PRODUCTS)
+    if not all(isinstance(value, str) for value in values):
+        raise ColumnarFallback("A text column holds a value that is not text.")
+    return np.array(values, dtype=object)
+
+
+def trajectory_columns(sales_trajectory: str, *columns: str) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Decodes a sales trajectory payload straight into typed column arrays.
+
+    Dates become datetime64[D], products a Categorical of product codes, and revenue
+    float64, without building a WeeklyRevenue model and a dict for every row.
+
+    Args:
+        sales_trajectory: The JSON response of a sales trajectory call.
+        columns: The columns to return, by the aliases the payload uses.
+    Returns:
+        The requested columns, or None if the response is not a success or holds no data.
+    Raises:
+        ColumnarFallback: If a value needs WeeklyRevenue's validation, which converts or rejects it.
+        KeyError: If a requested column is not a WeeklyRevenue column.
+    """
+    payload = json.loads(sales_trajectory)
+    status = StatusMessage.model_validate(payload["status"])
+    rows = payload.get("data")
+    if not rows or status.status != "success":
+        return None
+    try:
+        # Every required field must be present, as WeeklyRevenue requires
+        values = {column: [row[column] for row in rows] for column in _REQUIRED}
+        for column in columns:
+            if column not in values:
+                values[column] = [row.get(column) for row in rows]
+    except (KeyError, TypeError) as e:
+        raise ColumnarFallback(f"A row lacks the field {e}.")
+    typed = {column: _column(values[column], COLUMN_TYPES[column]) for column in values}
+    return {column: typed[column] for column in columns}
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+# In-memory tier, bounded by the size of the images it holds
+MEMORY_MAX_BYTES = int(os.environ.get("CONCORD_CHART_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# On-disk tier, shared by every process on the host, an empty directory disables it
+DISK_MAX_BYTES = int(os.environ.get("CONCORD_CHART_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+CACHE_DIR = os.environ.get("CONCORD_CHART_CACHE_DIR",
+                           os.path.join(os.path.expanduser("~"), ".cache", "vexel", "charts"))
+
+# Minimum interval between sweeps of the on-disk tier
+PRUNE_INTERVAL_SECONDS = 600
+
+# Part of every key, bump it when a change to the renderer changes how charts look
+RENDER_VERSION = "3"
+
+
+def chart_key(payload: str, **parameters: Any) -> str:
+    """Returns the content address of a chart, a hash of its input data and every chart parameter."""
+    digest = hashlib.sha256(payload.encode("utf-8"))
+    digest.update(json.dumps([RENDER_VERSION, sorted(parameters.items())], default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ChartCache:
+    """
+    A two tier cache of rendered chart images keyed on the hash of their inputs.
+
+    The first tier is an in-process LRU bounded by the bytes of the images it holds, the
+    second is a directory of image files that every process on the host can share, bounded
+    by its total size. Keys are content addresses, so entries never go stale and need no TTL.
+    """
+    def __init__(self, max_bytes: int = MEMORY_MAX_BYTES, disk_max_bytes: int = DISK_MAX_BYTES,
+                 cache_dir: Optional[str] = CACHE_DIR):
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.cache_dir = cache_dir or None
+        self.lock = threading.Lock()
+        self._images: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._last_prune = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Looks up a chart image, first in memory and then on disk."""
+        with self.lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+                return image
+
+        image = self._read_disk(key)
+        with self.lock:
+            if image is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._remember(key, image)
+        return image
+
+    def put(self, key: str, image: bytes) -> None:
+        """Stores a chart image in both tiers."""
+        self._remember(key, image)
+        self._write_disk(key, image)
+
+    def clear(self) -> None:
+        """Empties the in-memory tier."""
+        with self.lock:
+            self._images.clear()
+            self._bytes = 0
+
+    def _remember(self, key: str, image: bytes) -> None:
+        if len(image) > self.max_bytes:
+            return
+        with self.lock:
+            previous = self._images.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._images[key] = image
+            self._bytes += len(image)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".img")
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                image = f.read()
+            # The modification time orders entries for eviction, a read makes an entry recent again
+            os.utime(self._path(key))
+            return image
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            print(f"Unable to read chart cache entry {key}: {e}")
+            return None
+
+    def _write_disk(self, key: str, image: bytes) -> None:
+        if not self.cache_dir or len(image) > self.disk_max_bytes:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temporary file first so readers in other processes never see partial entries
+            tmp_path = self._path(key) + f".{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(image)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"Unable to write chart cache entry {key}: {e}")
+        self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        """Removes the least recently used entries while the on-disk tier is over its size."""
+        now = time.time()
+        if now - self._last_prune < PRUNE_INTERVAL_SECONDS:
+            return
+        self._last_prune = now
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(".img"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+_chart_cache: Optional[ChartCache] = None
+_chart_cache_lock = threading.Lock()
+
+
+def get_chart_cache() -> ChartCache:
+    """Returns the process wide chart cache, creating it on first use."""
+    global _chart_cache
+    if _chart_cache is None:
+        with _chart_cache_lock:
+            if _chart_cache is None:
+                _chart_cache = ChartCache()
+    return _chart_cache
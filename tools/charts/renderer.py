@@ -0,0 +1,233 @@
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import Future, InvalidStateError
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Set
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image
+
+# Worker processes rendering charts, 0 renders on the calling thread
+CHART_WORKERS = int(os.environ.get("CONCORD_CHART_WORKERS", str(min(os.cpu_count() or 1, 8))))
+# Renders allowed to wait for a worker, beyond those running, before new ones are turned away
+CHART_QUEUE_SIZE = int(os.environ.get("CONCORD_CHART_QUEUE_SIZE", "32"))
+CHART_TIMEOUT_SECONDS = float(os.environ.get("CONCORD_CHART_TIMEOUT_SECONDS", "60"))
+# Workers are forked from a single-threaded server process, never from the multi-threaded app
+CHART_START_METHOD = os.environ.get("CONCORD_CHART_START_METHOD",
+                                    "spawn" if sys.platform == "win32" else "forkserver")
+# Imported once by the fork server, so every worker starts with them loaded. The server does not
+# see the app's sys.path, and loading the standard library's `logging` first keeps the app's
+# top-level `logging` package from shadowing it when workers import this module
+_FORKSERVER_PRELOAD = ["logging", "numpy", "PIL.Image", "matplotlib.figure", "matplotlib.backends.backend_agg",
+                       __name__]
+
+# WebP quality, lossy WebP keeps charts legible at a fraction of a PNG's size
+CHART_WEBP_QUALITY = int(os.environ.get("CONCORD_CHART_WEBP_QUALITY", "80"))
+
+CHART_TYPES = ("bar", "line", "scatter")
+IMAGE_FORMATS = {"png": "image/png", "webp": "image/webp", "svg": "image/svg+xml"}
+
+
+class ChartRenderError(Exception):
+    """Raised when a chart cannot be rendered, because the queue is full or the render timed out."""
+
+
+@dataclass
+class Series:
+    x: Any
+    y: Any
+    label: Optional[str] = None
+
+
+@dataclass
+class ChartSpec:
+    """
+    Everything needed to draw a chart, with the data as arrays so it is cheap to send to a worker.
+    """
+    chart_type: str
+    series: List[Series]
+    title: str = ""
+    x_label: str = ""
+    y_label: str = ""
+    figsize: tuple[float, float] = (10, 6)
+    image_format: str = "png"
+    dpi: int = 100
+    legend: bool = False
+    legend_title: str = ""
+
+
+def render(spec: ChartSpec) -> bytes:
+    """
+    Draws a chart on its own Figure and Agg canvas and returns the encoded image.
+
+    It does not touch pyplot's global state, so charts can be drawn on several threads at once.
+    PNGs are reduced to a 256 colour palette, which charts' flat colours survive intact at
+    about a third of the size.
+    """
+    if spec.chart_type not in CHART_TYPES:
+        raise ValueError(f"Unsupported chart type: {spec.chart_type}")
+    if spec.image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Unsupported image format: {spec.image_format}, use one of {list(IMAGE_FORMATS)}")
+    figure = Figure(figsize=spec.figsize, dpi=spec.dpi)
+    canvas = FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    for series in spec.series:
+        if spec.chart_type == "bar":
+            axes.bar(series.x, series.y, label=series.label)
+        elif spec.chart_type == "line":
+            axes.plot(series.x, series.y, label=series.label)
+        else:
+            axes.scatter(series.x, series.y, label=series.label)
+    if spec.legend:
+        axes.legend(title=spec.legend_title or None)
+    axes.set_xlabel(spec.x_label)
+    axes.set_ylabel(spec.y_label)
+    axes.set_title(spec.title)
+    axes.tick_params(axis="x", labelrotation=45)
+    figure.tight_layout()
+
+    buf = BytesIO()
+    if spec.image_format == "svg":
+        canvas.print_figure(buf, format="svg", dpi=spec.dpi)
+        return buf.getvalue()
+    canvas.draw()
+    image = Image.frombuffer("RGBA", canvas.get_width_height(), canvas.buffer_rgba()).convert("RGB")
+    if spec.image_format == "png":
+        image.quantize(256, method=Image.Quantize.FASTOCTREE).save(buf, "PNG", optimize=True)
+    else:
+        image.save(buf, "WEBP", quality=CHART_WEBP_QUALITY, method=4)
+    return buf.getvalue()
+
+
+def _warm_up() -> None:
+    # Pays for the font cache and the backend import once per worker, not on its first chart
+    render(ChartSpec("line", [Series([0, 1], [0, 1])], figsize=(1, 1), dpi=10))
+
+
+def _settle(future: Future, image: Optional[bytes] = None, error: Optional[BaseException] = None) -> None:
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(image)
+    except InvalidStateError:
+        # The render already failed, its pool was discarded while it ran
+        pass
+
+
+class ChartRenderer:
+    """
+    Renders charts in a pool of warm worker processes.
+
+    Rendering is CPU bound and holds the GIL, so processes let charts render in parallel
+    on every core. At most `workers + queue_size` renders are admitted at once, further
+    renders fail right away instead of queueing without bound. A render that exceeds its
+    timeout fails and the pool is replaced, so a stuck worker does not hold a process,
+    and the other renders still running on the old pool fail right away.
+    """
+    def __init__(self, workers: int = CHART_WORKERS, queue_size: int = CHART_QUEUE_SIZE,
+                 timeout_seconds: float = CHART_TIMEOUT_SECONDS, start_method: str = CHART_START_METHOD):
+        self.workers = workers
+        self.start_method = start_method
+        self.timeout_seconds = timeout_seconds
+        self.lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + queue_size)
+        self._pool = None
+        self._in_flight: Dict[Any, Set[Future]] = {}
+
+    def _get_pool(self):
+        with self.lock:
+            if self._pool is None:
+                context = multiprocessing.get_context(self.start_method)
+                if self.start_method == "forkserver":
+                    context.set_forkserver_preload(_FORKSERVER_PRELOAD)
+                self._pool = context.Pool(self.workers, initializer=_warm_up)
+                self._in_flight[self._pool] = set()
+            return self._pool
+
+    def _submit(self, pool, spec: ChartSpec) -> Future:
+        future = Future()
+        with self.lock:
+            renders = self._in_flight.get(pool)
+            if renders is None:
+                raise ChartRenderError("The chart workers were restarted, try again shortly.")
+            renders.add(future)
+        future.add_done_callback(lambda _: self._forget(pool, future))
+        try:
+            pool.apply_async(render, (spec,), callback=lambda image: _settle(future, image),
+                             error_callback=lambda error: _settle(future, error=error))
+        except ValueError:
+            # The pool was terminated since it was looked up
+            _settle(future, error=ChartRenderError("The chart workers were restarted, try again shortly."))
+        return future
+
+    def _forget(self, pool, future: Future) -> None:
+        with self.lock:
+            self._in_flight.get(pool, set()).discard(future)
+
+    def _discard_pool(self, pool, reason: str) -> None:
+        with self.lock:
+            if self._pool is pool:
+                self._pool = None
+            renders = self._in_flight.pop(pool, set())
+        for future in renders:
+            _settle(future, error=ChartRenderError(reason))
+        pool.terminate()
+
+    def start(self) -> None:
+        """
+        Starts the warm worker processes ahead of the first chart.
+
+        Optional, the first render starts them otherwise. Call it from a server's start-up
+        hook, not at import time, so importing the agent starts no processes.
+        """
+        if self.workers > 0:
+            self._get_pool()
+
+    def render(self, spec: ChartSpec, timeout: Optional[float] = None) -> bytes:
+        """
+        Renders a chart in a worker process.
+
+        Raises:
+            ChartRenderError: If too many renders are waiting, the render timed out, or the
+                workers were restarted while it waited.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise ChartRenderError("Too many charts are being rendered, try again shortly.")
+        try:
+            if self.workers <= 0:
+                return render(spec)
+            pool = self._get_pool()
+            future = self._submit(pool, spec)
+            try:
+                return future.result(timeout if timeout is not None else self.timeout_seconds)
+            except FutureTimeoutError:
+                self._discard_pool(pool, "The chart workers were restarted after another render timed out.")
+                raise ChartRenderError(f"Rendering the {spec.chart_type} chart '{spec.title}' timed out.")
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        with self.lock:
+            pool = self._pool
+        if pool is not None:
+            self._discard_pool(pool, "The chart renderer was closed.")
+
+
+_chart_renderer: Optional[ChartRenderer] = None
+_chart_renderer_lock = threading.Lock()
+
+
+def get_chart_renderer() -> ChartRenderer:
+    """Returns the process wide chart renderer, creating it on first use."""
+    global _chart_renderer
+    if _chart_renderer is None:
+        with _chart_renderer_lock:
+            if _chart_renderer is None:
+                _chart_renderer = ChartRenderer()
+    return _chart_renderer
@@ -0,0 +1,32 @@
+import base64
+import json
+
+import pytest
+
+from tools.charts import render_cache
+from tools.charts.charts import create_bar_chart, create_chart_tool, create_line_chart, create_scatter_chart
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PAYLOAD = json.dumps({"status": {"status": "success", "message": "ok"}, "data": [
+    {"products_product": product, "products_product__sort_": "1", "revenue_usage_week": week,
+     "revenue_revenue_sales": sales}
+    for product, week, sales in [("Looker", "2025-01-06", 1.0), ("Looker", "2025-01-13", 2.0),
+                                 ("Apigee", "2025-01-06", 3.0), ("Apigee", "2025-01-13", 4.0)]]})
+
+
+@pytest.fixture(autouse=True)
+def no_chart_cache(monkeypatch):
+    monkeypatch.setattr(render_cache, "_chart_cache", render_cache.ChartCache(max_bytes=0, cache_dir=None))
+
+
+@pytest.mark.parametrize("create_chart", [create_bar_chart, create_line_chart, create_scatter_chart])
+def test_chart_wrappers_render(create_chart):
+    chart = create_chart(PAYLOAD)
+    assert chart.status.status == "success", chart.status.message
+    assert base64.b64decode(chart.chart_image).startswith(PNG_SIGNATURE)
+
+
+def test_grouped_bar_charts_are_an_error():
+    chart = create_chart_tool(PAYLOAD, "bar", group_by="products_product")
+    assert chart.status.status == "error"
+    assert "only supported for 'line' and 'scatter'" in chart.status.message
@@ -0,0 +1,51 @@
+import json
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from tools.charts import charts
+from tools.charts.columnar import ColumnarFallback, trajectory_columns
+
+X, Y, GROUP = "revenue_usage_week", "revenue_revenue_sales", "products_product"
+
+
+def payload(rows: list, status: str = "success") -> str:
+    return json.dumps({"status": {"status": status, "message": ""}, "data": rows})
+
+
+def row(product: str, week: str, sales) -> dict:
+    return {GROUP: product, "products_product__sort_": "01", X: week, Y: sales}
+
+
+ROWS = [row("Looker", "2025-01-13", 3.0), row("Apigee", "2025-01-13", 1.5), row("Looker", "2025-01-06", None),
+        row("Apigee", "2025-01-06", 2.0), row("Geo", "2025-01-20", 4)]
+
+
+def test_columns_are_typed_arrays():
+    columns = trajectory_columns(payload(ROWS), X, Y, GROUP)
+    assert columns[X].dtype == np.dtype("datetime64[D]")
+    assert columns[Y].dtype == np.float64 and np.isnan(columns[Y][2])
+    assert list(columns[GROUP]) == ["Looker", "Apigee", "Looker", "Apigee", "Geo"]
+    assert trajectory_columns(payload(ROWS, status="error"), X) is None
+
+
+@pytest.mark.parametrize("chart_type,group_by", [("line", GROUP), ("scatter", GROUP), ("bar", None)])
+def test_columnar_series_match_the_validated_series(chart_type, group_by):
+    expected = charts._validated_series(payload(ROWS), chart_type, X, Y, group_by)
+    actual = charts._columnar_series(payload(ROWS), chart_type, X, Y, group_by)
+    assert [s.label for s in actual] == [s.label for s in expected]
+    for a, e in zip(actual, expected):
+        assert np.array_equal(a.x, e.x.astype("datetime64[D]"))
+        assert np.array_equal(a.y, e.y.astype(float), equal_nan=True)
+
+
+def test_values_needing_validation_fall_back_to_it():
+    padded = payload([row(" Looker ", "2025-01-06", "1.5")])
+    with pytest.raises(ColumnarFallback):
+        trajectory_columns(padded, X, Y, GROUP)
+    spec = charts._chart_spec(padded, "line", X, Y, "", GROUP)
+    assert [(s.label, list(s.y)) for s in spec.series] == [("Looker", [1.5])]
+
+    with pytest.raises(ValidationError):
+        charts._chart_spec(payload([row("Not a product", "2025-01-06", 1.0)]), "line", X, Y, "", GROUP)
@@ -0,0 +1,32 @@
+import os
+
+from tools.charts.render_cache import ChartCache, chart_key
+
+
+def test_key_covers_the_payload_and_every_parameter():
+    key = chart_key("{}", chart_type="line", title="Revenue")
+    assert key == chart_key("{}", title="Revenue", chart_type="line")
+    assert key != chart_key("{} ", chart_type="line", title="Revenue")
+    assert key != chart_key("{}", chart_type="bar", title="Revenue")
+
+
+def test_memory_tier_is_bounded_by_bytes():
+    cache = ChartCache(max_bytes=250, cache_dir=None)
+    for key in "abc":
+        cache.put(key, key.encode() * 100)
+    assert cache.get("a") is None
+    assert cache.get("b") == b"b" * 100 and cache.get("c") == b"c" * 100
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_disk_tier_is_shared_and_pruned(tmp_path):
+    writer = ChartCache(cache_dir=str(tmp_path), disk_max_bytes=250)
+    writer.put("a", b"a" * 100)
+    assert ChartCache(cache_dir=str(tmp_path)).get("a") == b"a" * 100
+
+    os.utime(tmp_path / "a.img", (0, 0))
+    writer._last_prune = 0
+    writer.put("b", b"b" * 100)
+    writer._last_prune = 0
+    writer.put("c", b"c" * 100)
+    assert sorted(os.listdir(tmp_path)) == ["b.img", "c.img"]
@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from tools.charts.renderer import ChartRenderer, ChartRenderError, ChartSpec, Series, render
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def spec(chart_type: str, points: int = 500) -> ChartSpec:
+    x = np.arange("2025-01-06", points * 7, 7, dtype="datetime64[D]")[:points] if chart_type != "scatter" \
+        else np.arange(points)
+    return ChartSpec(chart_type, [Series(x, np.sin(np.arange(points)), label="sin")], title=chart_type, legend=True)
+
+
+def test_charts_render_concurrently_on_threads():
+    specs = [spec(chart_type) for chart_type in ("bar", "line", "scatter") * 4]
+    expected = [render(s) for s in specs]
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        assert list(executor.map(render, specs)) == expected
+    assert all(image.startswith(PNG_SIGNATURE) for image in expected)
+
+
+def test_renderer_renders_in_worker_processes():
+    renderer = ChartRenderer(workers=2, queue_size=2)
+    try:
+        assert renderer.render(spec("line")) == render(spec("line"))
+        with pytest.raises(ValueError, match="Unsupported chart type"):
+            renderer.render(ChartSpec("pie", []))
+    finally:
+        renderer.close()
+
+
+def test_renders_on_a_discarded_pool_fail_right_away():
+    renderer = ChartRenderer(workers=1, queue_size=2)
+    try:
+        renderer.start()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            waiting = executor.submit(renderer.render, spec("bar", 5000), 60)
+            time.sleep(0.2)
+            started = time.monotonic()
+            with pytest.raises(ChartRenderError, match="timed out"):
+                renderer.render(spec("bar", 5000), timeout=0.01)
+            with pytest.raises(ChartRenderError, match="restarted"):
+                waiting.result()
+            assert time.monotonic() - started < 5
+        assert renderer.render(spec("line")) == render(spec("line"))
+    finally:
+        renderer.close()
+
+
+def test_renderer_turns_renders_away_when_the_queue_is_full():
+    renderer = ChartRenderer(workers=0, queue_size=0)
+    renderer._slots.acquire()
+    with pytest.raises(ChartRenderError, match="Too many charts"):
+        renderer.render(spec("line"))
+
+
+@pytest.mark.parametrize("image_format,signature", [("png", PNG_SIGNATURE), ("webp", b"RIFF"), ("svg", b"<?xml")])
+def test_image_formats(image_format, signature):
+    chart = spec("line")
+    chart.image_format = image_format
+    assert render(chart).startswith(signature)
@@ -0,0 +1,31 @@
+import json
+
+from tools.charts import render_cache
+from tools.charts.charts import create_chart_tool
+
+PAYLOAD = json.dumps({"status": {"status": "success", "message": "ok"}, "data": [
+    {"products_product": product, "products_product__sort_": "1", "revenue_usage_week": week,
+     "revenue_revenue_sales": sales}
+    for product, week, sales in [("Looker", "2025-01-13", 2.0), ("Looker", "2025-01-06", 1.0),
+                                 ("Apigee", "2025-01-06", None)]]})
+
+
+def test_vega_lite_spec_is_built_without_rendering(monkeypatch):
+    monkeypatch.setattr(render_cache, "_chart_cache", render_cache.ChartCache(cache_dir=None))
+    chart = create_chart_tool(PAYLOAD, "line", group_by="products_product", image_format="vega-lite", width=8, height=4)
+
+    assert chart.status.status == "success", chart.status.message
+    assert chart.chart_image is None and chart.mime_type == "application/vnd.vegalite.v5+json"
+    spec = chart.chart_spec
+    assert (spec["mark"]["type"], spec["width"], spec["height"]) == ("line", 800, 400)
+    assert spec["encoding"]["x"] == {"field": "x", "type": "temporal", "title": "revenue_usage_week",
+                                     "axis": {"labelAngle": -45}}
+    assert spec["encoding"]["color"]["title"] == "products_product"
+    assert spec["data"]["values"] == [{"x": "2025-01-06", "y": None, "s": "Apigee"},
+                                      {"x": "2025-01-06", "y": 1.0, "s": "Looker"},
+                                      {"x": "2025-01-13", "y": 2.0, "s": "Looker"}]
+
+
+def test_unknown_format_is_an_error():
+    chart = create_chart_tool(PAYLOAD, "line", image_format="gif")
+    assert chart.status.status == "error" and "Unsupported image format" in chart.status.message
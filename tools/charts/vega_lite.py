@@ -0,0 +1,59 @@
+from typing import Any, Dict, List
+
+import numpy as np
+
+from tools.charts.renderer import CHART_TYPES, ChartSpec
+
+VEGA_LITE_SCHEMA = "https://vega.github.io/schema/vega-lite/v5.json"
+VEGA_LITE_MIME_TYPE = "application/vnd.vegalite.v5+json"
+
+_MARKS = {"bar": "bar", "line": "line", "scatter": "point"}
+
+
+def _values(array: Any) -> tuple[List[Any], str]:
+    """Converts a column to JSON values and its Vega-Lite field type."""
+    array = np.asarray(array)
+    if array.dtype.kind == "M":
+        # Weekly data, dates are enough and keep the spec short
+        return np.datetime_as_string(array, unit="D").tolist(), "temporal"
+    if array.dtype.kind in "iuf":
+        return [None if value != value else value for value in array.tolist()], "quantitative"
+    return [str(value) for value in array.tolist()], "nominal"
+
+
+def to_vega_lite(spec: ChartSpec) -> Dict[str, Any]:
+    """
+    Describes a chart as a Vega-Lite spec, for the browser to draw instead of the server.
+
+    The data is inlined as rows of short keys, `x`, `y` and `s` for the series, and the
+    column names are kept as axis titles.
+    """
+    if spec.chart_type not in CHART_TYPES:
+        raise ValueError(f"Unsupported chart type: {spec.chart_type}")
+
+    rows: List[Dict[str, Any]] = []
+    x_type, y_type = "quantitative", "quantitative"
+    for series in spec.series:
+        xs, x_type = _values(series.x)
+        ys, y_type = _values(series.y)
+        if spec.legend:
+            rows.extend({"x": x, "y": y, "s": series.label} for x, y in zip(xs, ys))
+        else:
+            rows.extend({"x": x, "y": y} for x, y in zip(xs, ys))
+
+    encoding: Dict[str, Any] = {
+        "x": {"field": "x", "type": x_type, "title": spec.x_label, "axis": {"labelAngle": -45}},
+        "y": {"field": "y", "type": y_type, "title": spec.y_label},
+    }
+    if spec.legend:
+        encoding["color"] = {"field": "s", "type": "nominal", "title": spec.legend_title or None}
+
+    return {
+        "$schema": VEGA_LITE_SCHEMA,
+        "title": spec.title,
+        "width": int(spec.figsize[0] * spec.dpi),
+        "height": int(spec.figsize[1] * spec.dpi),
+        "mark": {"type": _MARKS[spec.chart_type], "tooltip": True},
+        "encoding": encoding,
+        "data": {"values": rows},
+    }
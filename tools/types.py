@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, ConfigDict, field_validator
 from typing import Any, List, Literal, Optional
-from datetime import datetime
+from datetime import date
 from enum import Enum
 
 class StatusMessage(BaseModel):
@@ -15,6 +15,9 @@ class Chart(BaseModel):
     status: StatusMessage
     chart_image: str | None
     chart_description: str | None
+    # The media type of chart_image, or of chart_spec for a Vega-Lite spec drawn by the browser
+    mime_type: str | None = None
+    chart_spec: dict[str, Any] | None = None
 
 class ProductEnum(str, Enum):
     """
@@ -56,7 +59,7 @@ class WeeklyRevenue(BaseModel):
         alias="products_product__sort_",
         description="A key used for sorting the product categories."
     )
-    usage_week: datetime.date = Field(
+    usage_week: date = Field(
         ...,
         alias="revenue_usage_week",
         description="The Monday of the week for which the revenue is reported."
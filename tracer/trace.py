@@ -1,6 +1,6 @@
 from typing import Optional, Dict, Any, Iterator, ContextManager
 from contextlib import contextmanager
-from common.py.libs.logging.logging import get_logger
+import logging
 
 # Try to import OpenTelemetry and Google Cloud Trace
 try:
@@ -16,7 +16,8 @@ try:
 except ImportError:
     OPEN_TELEMETRY_AVAILABLE = False
 
-logger = get_logger("trace")
+# Logs under the default logger of logging/logging.py, which cannot be imported past the stdlib package
+logger = logging.getLogger("sales_team.trace")
 
 class Tracer:
     """